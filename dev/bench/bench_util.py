@@ -0,0 +1,70 @@
+#  Copyright 2020-2024 Capypara and the SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+"""
+Helpers shared by the benchmark scripts in this directory.
+
+The scripts import SkyTemple, run them with SkyTemple installed or with PYTHONPATH=. from the
+repository root. Each result is printed as one JSON line.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import statistics
+import time
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any
+
+import gi
+
+gi.require_version("Gtk", "3.0")
+
+if TYPE_CHECKING:
+    from skytemple.core.rom_project import RomProject
+
+
+def open_rom(fn: str) -> RomProject:
+    """Loads the modules and opens the ROM without the UI, the same way `skytemple batch` does."""
+    from skytemple.cli import confirm_approved_plugins
+    from skytemple.core.modules import Modules
+    from skytemple.core.rom_project import RomProject
+    from skytemple.core.settings import SkyTempleSettingsStore
+
+    if len(Modules.all()) == 0:
+        Modules.load(SkyTempleSettingsStore(), confirm_approved_plugins)
+    project = RomProject(fn, lambda _: None)
+    RomProject._current = project
+    asyncio.run(project.load())
+    return project
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> dict[str, float]:
+    """Runs fn `repeat` times and returns the best and mean time in milliseconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return {
+        "best_ms": round(min(times), 3),
+        "mean_ms": round(statistics.mean(times), 3),
+    }
+
+
+def report(**values: Any):
+    print(json.dumps(values), flush=True)
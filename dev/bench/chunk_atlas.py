@@ -0,0 +1,152 @@
+#  Copyright 2020-2024 Capypara and the SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+"""
+Benchmarks rendering the chunks of the map backgrounds: Building the ChunkAtlas of every layer and
+the weird palette check (uses_weird_palette) for every map background (BMA/BPC pair) of a ROM, and,
+for comparison, the per-chunk rendering and per-pixel palette check the map background editor
+used before.
+
+    python dev/bench/chunk_atlas.py ROM [--repeat 3]
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+from collections.abc import Sequence
+from typing import Optional
+
+from bench_util import measure, open_rom, report
+from skytemple_files.graphics.bma import MASK_PAL
+from skytemple_files.graphics.bpa.protocol import BpaProtocol
+from skytemple_files.graphics.bpc.protocol import BpcProtocol
+from skytemple_files.graphics.bpl import BPL_NORMAL_MAX_PAL
+from skytemple_files.graphics.bpl.protocol import BplProtocol
+
+from skytemple.core.img_utils import pil_to_cairo_surface
+from skytemple.module.map_bg.chunk_atlas import (
+    CHUNKS_PER_ROW,
+    ChunkAtlas,
+    uses_weird_palette,
+)
+
+
+def layers(bpc: BpcProtocol) -> list[int]:
+    return [1, 0] if bpc.number_of_layers > 1 else [0]
+
+
+def render_old(
+    bpc: BpcProtocol,
+    layer: int,
+    bpl: BplProtocol,
+    bpas: Sequence[Optional[BpaProtocol]],
+):
+    """The per-chunk rendering of the map background editor, before ChunkAtlas."""
+    weird_palette = False
+    chunks = []
+    for chunk_idx in range(0, bpc.layers[layer].chunk_tilemap_len):
+        pal_ani_frames = []
+        chunks.append(pal_ani_frames)
+        chunk_data = bpc.get_chunk(layer, chunk_idx)
+        chunk_images = bpc.single_chunk_animated_to_pil(
+            layer, chunk_idx, bpl.palettes, bpas
+        )
+        if not weird_palette:
+            for x in chunk_images:
+                for n in x.tobytes("raw", "P"):
+                    n //= 16
+                    if n >= bpl.number_palettes or n >= BPL_NORMAL_MAX_PAL:
+                        weird_palette = True
+                        break
+                if weird_palette:
+                    break
+        has_pal_ani = any(
+            bpl.is_palette_affected_by_animation(chunk.pal_idx) for chunk in chunk_data
+        )
+        len_pal_ani = len(bpl.animation_palette) if has_pal_ani else 1
+        for pal_ani in range(0, len_pal_ani):
+            bpa_ani_frames = []
+            pal_ani_frames.append(bpa_ani_frames)
+            for img in chunk_images:
+                if has_pal_ani:
+                    img.putpalette(
+                        itertools.chain.from_iterable(
+                            bpl.apply_palette_animations(pal_ani)
+                        )
+                    )
+                img_mask = img.copy()
+                img_mask.putpalette(MASK_PAL)
+                img_mask = img_mask.convert("1")
+                img = img.convert("RGBA")
+                img.putalpha(img_mask)
+                bpa_ani_frames.append(pil_to_cairo_surface(img))
+    return chunks, weird_palette
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("rom")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    project = open_rom(args.rom)
+    map_bg = project.get_module("map_bg")
+
+    totals = {"atlas": 0.0, "weird_palette": 0.0, "old": 0.0}
+    slowest = ("", 0.0)
+    for item_id, level in enumerate(map_bg.bgs.level):
+        bpc = map_bg.get_bpc(item_id)
+        bpl = map_bg.get_bpl(item_id)
+        bpas = map_bg.get_bpas(item_id)
+
+        atlas_ms = measure(
+            lambda: [ChunkAtlas(bpc, layer, bpl, bpas) for layer in layers(bpc)],
+            args.repeat,
+        )["best_ms"]
+        frames = [
+            img
+            for layer in layers(bpc)
+            for img in bpc.chunks_animated_to_pil(
+                layer, bpl.palettes, bpas, CHUNKS_PER_ROW
+            )
+        ]
+        weird_ms = measure(
+            lambda: [uses_weird_palette(img, bpl) for img in frames], args.repeat
+        )["best_ms"]
+        old_ms = measure(
+            lambda: [render_old(bpc, layer, bpl, bpas) for layer in layers(bpc)],
+            args.repeat,
+        )["best_ms"]
+
+        totals["atlas"] += atlas_ms
+        totals["weird_palette"] += weird_ms
+        totals["old"] += old_ms
+        if atlas_ms > slowest[1]:
+            slowest = (level.bma_name, atlas_ms)
+
+    report(
+        maps=len(map_bg.bgs.level),
+        atlas_total_ms=round(totals["atlas"], 3),
+        weird_palette_total_ms=round(totals["weird_palette"], 3),
+        old_per_chunk_total_ms=round(totals["old"], 3),
+        slowest_map=slowest[0],
+        slowest_atlas_ms=round(slowest[1], 3),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#  Copyright 2020-2024 Capypara and the SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+"""
+Benchmarks get_list_store_iter_by_idx: Looking up every row of a large Gtk.ListStore by its index,
+the way ListIconRenderer does when it refreshes the icons of a list, with the previous lookup that
+walked the store from the first row and with the current lookup by path.
+
+Only needs Gtk, no ROM and no display.
+
+    python dev/bench/list_store_lookup.py [--rows 2048]
+"""
+
+from __future__ import annotations
+
+import argparse
+
+from bench_util import measure, report
+from gi.repository import Gtk
+
+from skytemple.core.ui_utils import get_list_store_iter_by_idx
+
+
+def get_list_store_iter_by_idx_old(store: Gtk.ListStore, idx):
+    liter = store.get_iter_first()
+    for i in range(0, idx):
+        assert liter is not None
+        liter = store.iter_next(liter)
+    return liter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=2048)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    store = Gtk.ListStore(int, str)
+    for i in range(args.rows):
+        store.append([i, f"Entry {i}"])
+
+    for idx in (0, args.rows // 2, args.rows - 1):
+        old = get_list_store_iter_by_idx_old(store, idx)
+        new = get_list_store_iter_by_idx(store, idx)
+        assert new is not None and store[old][0] == store[new][0] == idx
+
+    for name, lookup in (
+        ("walk_from_first", get_list_store_iter_by_idx_old),
+        ("by_path", get_list_store_iter_by_idx),
+    ):
+        report(
+            case=name,
+            rows=args.rows,
+            **measure(
+                lambda: [lookup(store, idx) for idx in range(args.rows)], args.repeat
+            ),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#  Copyright 2020-2024 Capypara and the SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+"""
+Benchmarks opening scenes: How long it takes until the sprites of all actors of a scene are loaded,
+with the "Thread-based" async configuration (one AsyncTaskRunner thread) and with the "Thread pool"
+configuration (ThreadPoolRunner) with different numbers of workers.
+
+The sprites are requested the same way the scene editor does when it draws a scene, the sprite cache
+is cleared before every scene. Needs a display, since the sprite provider loads its icons from the
+icon theme.
+
+    python dev/bench/scene_open.py ROM [--scenes 50] [--workers 2 4 8]
+"""
+
+from __future__ import annotations
+
+import argparse
+import threading
+import time
+
+from bench_util import open_rom, report
+from gi.repository import Gdk
+
+from skytemple.core.async_tasks.delegator import AsyncConfiguration, AsyncTaskDelegator
+from skytemple.core.async_tasks.pool import TaskPriority, ThreadPoolRunner
+from skytemple.core.rom_project import RomProject
+from skytemple.core.sprite_provider import SpriteProvider
+
+SCENE_EXTS = ("ssa", "sse", "sss")
+SCENE_TIMEOUT_S = 120
+
+
+def find_scenes(project: RomProject, limit: int) -> list[tuple[str, list[tuple]]]:
+    """The `limit` scenes with the most different actor sprites, with those sprites."""
+    script = project.get_module("script")
+    scenes = []
+    for ext in SCENE_EXTS:
+        for path in project.get_files_with_ext(ext, "SCRIPT"):
+            ssa = script.get_ssa(path)
+            sprites = set()
+            for layer in ssa.layer_list:
+                for actor in layer.actors:
+                    direction = actor.pos.direction.id if actor.pos.direction else 0
+                    if actor.actor.entid == 0:
+                        sprites.add(("placeholder", actor.actor.id, direction))
+                    else:
+                        sprites.add(("monster", actor.actor.entid, direction))
+            scenes.append((path, sorted(sprites)))
+    scenes.sort(key=lambda scene: len(scene[1]), reverse=True)
+    return scenes[:limit]
+
+
+def open_scene(provider: SpriteProvider, sprites: list[tuple]) -> float:
+    """Requests all sprites and waits until they are loaded. Returns the time it took in seconds."""
+    provider.reset()
+    loader = provider.get_loader()[0]
+    remaining = len(sprites)
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def loaded():
+        nonlocal remaining
+        with lock:
+            remaining -= 1
+            if remaining == 0:
+                done.set()
+
+    start = time.perf_counter()
+    for kind, idx, direction in sprites:
+        if kind == "placeholder":
+            sprite = provider.get_actor_placeholder(
+                idx, direction, loaded, TaskPriority.VISIBLE
+            )
+        else:
+            sprite = provider.get_monster(idx, direction, loaded, TaskPriority.VISIBLE)
+        if sprite[0] is not loader:
+            loaded()
+    if len(sprites) > 0 and not done.wait(SCENE_TIMEOUT_S):
+        raise TimeoutError("Loading the sprites of the scene timed out.")
+    return time.perf_counter() - start
+
+
+def run(
+    name: str,
+    provider: SpriteProvider,
+    scenes: list[tuple[str, list[tuple]]],
+    repeat: int,
+):
+    best: dict[str, float] = {}
+    for _ in range(repeat):
+        for path, sprites in scenes:
+            seconds = open_scene(provider, sprites)
+            best[path] = min(best.get(path, seconds), seconds)
+    report(
+        configuration=name,
+        scenes=len(scenes),
+        sprites=sum(len(sprites) for _, sprites in scenes),
+        total_ms=round(sum(best.values()) * 1000, 3),
+        max_scene_ms=round(max(best.values(), default=0) * 1000, 3),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("rom")
+    parser.add_argument(
+        "--scenes",
+        type=int,
+        default=50,
+        help="Number of scenes, the ones with the most actors are used.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=[2, 4, 0],
+        help="Worker counts of the thread pool to compare (0: one per CPU core).",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    screen = Gdk.Screen.get_default()
+    if screen is None:
+        raise SystemExit("This benchmark needs a display.")
+    project = open_rom(args.rom)
+    scenes = find_scenes(project, args.scenes)
+    provider = SpriteProvider(project)
+    provider.init_loader(screen)
+
+    AsyncTaskDelegator._config_type = AsyncConfiguration.THREAD_BASED
+    run("thread_based", provider, scenes, args.repeat)
+    AsyncTaskDelegator._config_type = AsyncConfiguration.THREAD_POOL
+    for workers in args.workers:
+        ThreadPoolRunner.end()
+        ThreadPoolRunner._instance = ThreadPoolRunner(workers)
+        run(f"thread_pool-{workers}", provider, scenes, args.repeat)
+    ThreadPoolRunner.end()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#  Copyright 2020-2024 Capypara and the SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+"""
+Benchmarks the per-sprite post-processing of the sprite provider: The striped actor placeholders
+and the item alpha masks, with the per-pixel Python loops SkyTemple used before and with the
+Image.point / ImageChops / tiled stripes code it uses now.
+
+Uses random sprites, no ROM is needed. Also checks that both versions produce the same images.
+
+    python dev/bench/sprite_postprocess.py [--sizes 32 64 128] [--sprites 200]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+
+from bench_util import measure, report
+from PIL import Image, ImageFilter
+
+from skytemple.core.sprite_provider import (
+    _LUT_ITEM_ALPHA,
+    SpriteProvider,
+    _make_red_transparent,
+)
+from skytemple.core.ui_utils import data_dir
+
+
+def random_sprite(rng: random.Random, size: int) -> Image.Image:
+    """A random RGBA monster sprite: A blob of opaque pixels on a transparent background."""
+    img = Image.frombytes("RGBA", (size, size), rng.randbytes(size * size * 4))
+    alpha = Image.new("L", img.size, 0)
+    alpha.paste(255, (size // 4, size // 8, size - size // 4, size - size // 8))
+    img.putalpha(alpha)
+    return img
+
+
+def random_item(rng: random.Random) -> Image.Image:
+    """A random 16x16 item sprite with a 256 color palette, like ImgItm.to_pil returns."""
+    img = Image.frombytes("P", (16, 16), rng.randbytes(16 * 16))
+    img.putpalette(rng.randbytes(256 * 3))
+    return img
+
+
+def placeholder_old(stripes: Image.Image, sprite_img: Image.Image) -> Image.Image:
+    alpha_sprite = sprite_img.getchannel("A")
+    im_outline = sprite_img.filter(ImageFilter.FIND_EDGES)
+    alpha_outline = im_outline.getchannel("A")
+
+    out_sprite = Image.new("RGBA", im_outline.size)
+    for i in range(0, out_sprite.width, stripes.width):
+        for j in range(0, out_sprite.height, stripes.height):
+            out_sprite.paste(stripes, (i, j))
+
+    im_outline = Image.new("RGBA", im_outline.size, color="white")
+    out_sprite.paste(
+        im_outline, (0, 0, im_outline.width, im_outline.height), alpha_outline
+    )
+
+    out_sprite.putalpha(alpha_sprite)
+    data = out_sprite.getdata()
+    new_data = []
+    for item in data:
+        if item[0] > 200 and item[1] < 200 and item[2] < 200:
+            new_data.append((255, 255, 255, 0))
+        else:
+            new_data.append(item)
+    out_sprite.putdata(new_data)  # type: ignore
+    return out_sprite
+
+
+def placeholder_new(provider: SpriteProvider, sprite_img: Image.Image) -> Image.Image:
+    alpha_sprite = sprite_img.getchannel("A")
+    im_outline = sprite_img.filter(ImageFilter.FIND_EDGES)
+    alpha_outline = im_outline.getchannel("A")
+
+    out_sprite = provider._get_stripes(im_outline.width, im_outline.height)
+
+    im_outline = Image.new("RGBA", im_outline.size, color="white")
+    out_sprite.paste(
+        im_outline, (0, 0, im_outline.width, im_outline.height), alpha_outline
+    )
+
+    out_sprite.putalpha(alpha_sprite)
+    _make_red_transparent(out_sprite)
+    return out_sprite
+
+
+def item_old(img: Image.Image) -> Image.Image:
+    alpha = [px % 16 != 0 for px in img.getdata()]
+    img = img.convert("RGBA")
+    alphaimg = Image.new("1", (img.width, img.height))
+    alphaimg.putdata(alpha)
+    img.putalpha(alphaimg)
+    return img
+
+
+def item_new(img: Image.Image) -> Image.Image:
+    alphaimg = img.point(_LUT_ITEM_ALPHA, "L")
+    img = img.convert("RGBA")
+    img.putalpha(alphaimg)
+    return img
+
+
+def stripes_provider() -> SpriteProvider:
+    """A sprite provider with only the stripes loaded, enough for _get_stripes."""
+    provider = SpriteProvider.__new__(SpriteProvider)
+    provider._stripes = Image.open(os.path.join(data_dir(), "stripes.png"))
+    provider._stripes_tiled = provider._stripes
+    return provider
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[32, 64, 128])
+    parser.add_argument(
+        "--sprites", type=int, default=200, help="Sprites processed per run."
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    provider = stripes_provider()
+    stripes = provider._stripes
+
+    for size in args.sizes:
+        sprites = [random_sprite(rng, size) for _ in range(args.sprites)]
+        for sprite in sprites[:10]:
+            if (
+                placeholder_old(stripes, sprite).tobytes()
+                != placeholder_new(provider, sprite).tobytes()
+            ):
+                raise SystemExit(f"Placeholder output differs for size {size}.")
+        for name, fn in (
+            ("placeholder_old", lambda s: placeholder_old(stripes, s)),
+            ("placeholder_new", lambda s: placeholder_new(provider, s)),
+        ):
+            result = measure(lambda: [fn(s) for s in sprites], args.repeat)
+            report(
+                case=name,
+                size=size,
+                per_sprite_us=round(result["best_ms"] * 1000 / len(sprites), 3),
+                **result,
+            )
+
+    items = [random_item(rng) for _ in range(args.sprites)]
+    for item in items[:10]:
+        if item_old(item).tobytes() != item_new(item).tobytes():
+            raise SystemExit("Item output differs.")
+    for name, fn in (("item_old", item_old), ("item_new", item_new)):
+        result = measure(lambda: [fn(i) for i in items], args.repeat)
+        report(
+            case=name,
+            size=16,
+            per_sprite_us=round(result["best_ms"] * 1000 / len(items), 3),
+            **result,
+        )
+
+
+if __name__ == "__main__":
+    main()
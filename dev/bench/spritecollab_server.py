@@ -0,0 +1,515 @@
+#  Copyright 2020-2024 Capypara and the SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+"""
+Local stand-in for a SpriteCollab GraphQL server, to benchmark the SpriteCollab browser cache
+(skytemple.module.spritecollab.cache) without network access.
+
+The server implements the part of the SpriteCollab schema that the browser uses, with generated
+monsters, and serves portrait sheets and preview portraits with ETags. Every request is delayed by
+a configurable latency, and the server counts the requests and the maximum number of concurrent
+requests.
+
+    # Just run the server (eg. to point the SpriteCollab browser at it):
+    python dev/bench/spritecollab_server.py serve --port 8123 --latency 0.1
+    # Run the benchmark against an in-process server, with an empty cache directory:
+    python dev/bench/spritecollab_server.py bench --latency 0.1 --monsters 500
+
+The benchmark imports SkyTemple, run it with SkyTemple installed or with PYTHONPATH=. from the
+repository root. Each step prints one JSON line with its duration and the request statistics.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any, Optional
+
+from aiohttp import web
+from graphql import build_schema, graphql
+from PIL import Image
+
+SCHEMA = """
+type Query {
+    apiVersion: String!
+    config: Config!
+    monster(filter: [Int!]): [Monster!]!
+}
+
+type Config {
+    portraitSize: Int!
+    portraitTileX: Int!
+    portraitTileY: Int!
+    emotions: [String!]!
+    actions: [String!]!
+    completionEmotions: [[Int!]!]!
+    completionActions: [[Int!]!]!
+    actionMap: [ActionId!]!
+}
+
+type ActionId {
+    id: Int!
+    name: String!
+}
+
+type Monster {
+    id: Int!
+    rawId: String!
+    name: String!
+    forms: [MonsterForm!]!
+    get(formId: Int!, shiny: Boolean!, female: Boolean!): MonsterForm
+    manual(path: String!): MonsterForm
+}
+
+type MonsterForm {
+    monsterId: Int!
+    path: String!
+    fullPath: String!
+    name: String!
+    fullName: String!
+    isShiny: Boolean!
+    isFemale: Boolean!
+    canon: Boolean!
+    portraits: MonsterFormPortraits!
+    sprites: MonsterFormSprites!
+}
+
+enum Phase {
+    INCOMPLETE
+    EXISTS
+    FULL
+    UNKNOWN
+}
+
+enum KnownLicenseType {
+    UNKNOWN
+    UNSPECIFIED
+    PMDCOLLAB1
+    PMDCOLLAB2
+    CC_BY_NC4
+}
+
+type Credit {
+    id: String!
+    name: String
+    contact: String
+    discordHandle: String
+}
+
+type KnownLicense {
+    license: KnownLicenseType!
+}
+
+type OtherLicense {
+    name: String!
+}
+
+union License = KnownLicense | OtherLicense
+
+type MonsterHistory {
+    credit: Credit
+    modifiedDate: String!
+    modifications: [String!]!
+    obsolete: Boolean!
+    license: License!
+}
+
+type Portrait {
+    emotion: String!
+    locked: Boolean!
+    url: String!
+}
+
+type MonsterFormPortraits {
+    required: Boolean!
+    phase: Phase!
+    phaseRaw: Int!
+    creditPrimary: Credit
+    creditSecondary: [Credit!]!
+    sheetUrl: String!
+    recolorSheetUrl: String!
+    modifiedDate: String
+    history: [MonsterHistory!]!
+    historyUrl: String
+    previewEmotion: Portrait
+    emotions: [Portrait!]!
+    emotionsFlipped: [Portrait!]!
+    emotion(emotion: String!): Portrait
+    emotionFlipped(emotion: String!): Portrait
+}
+
+type Sprite {
+    action: String!
+    locked: Boolean!
+    animUrl: String!
+    offsetsUrl: String!
+    shadowsUrl: String!
+}
+
+type CopyOf {
+    action: String!
+    locked: Boolean!
+    copyOf: String!
+}
+
+union SpriteUnion = Sprite | CopyOf
+
+type MonsterFormSprites {
+    required: Boolean!
+    phase: Phase!
+    phaseRaw: Int!
+    creditPrimary: Credit
+    creditSecondary: [Credit!]!
+    animDataXml: String
+    zipUrl: String
+    recolorSheetUrl: String
+    modifiedDate: String
+    history: [MonsterHistory!]!
+    historyUrl: String
+    actions: [SpriteUnion!]!
+    action(action: String!): SpriteUnion
+}
+"""
+
+EMOTIONS = ["Normal", "Happy", "Pain", "Angry", "Worried", "Sad", "Crying"]
+MODIFIED_DATE = "2024-01-01T00:00:00+00:00"
+CREDIT = {
+    "id": "bench",
+    "name": "Benchmark",
+    "contact": None,
+    "discordHandle": None,
+}
+
+
+class StandInServer:
+    """The aiohttp application of the stand-in server and its request statistics."""
+
+    def __init__(self, monster_count: int, latency: float):
+        self.monster_count = monster_count
+        self.latency = latency
+        self.base_url = ""
+        self.requests = 0
+        self.not_modified = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._schema = build_schema(SCHEMA)
+        self._assets: dict[str, bytes] = {}
+        self.app = web.Application(middlewares=[self._track])
+        self.app.router.add_post("/graphql", self._graphql)
+        self.app.router.add_get("/assets/{name}", self._asset)
+        self.app.router.add_get("/stats", self._stats)
+
+    def reset_stats(self):
+        self.requests = 0
+        self.not_modified = 0
+        self.max_in_flight = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "requests": self.requests,
+            "not_modified": self.not_modified,
+            "max_in_flight": self.max_in_flight,
+        }
+
+    @web.middleware
+    async def _track(
+        self,
+        request: web.Request,
+        handler: Callable[[web.Request], Awaitable[web.StreamResponse]],
+    ) -> web.StreamResponse:
+        if request.path == "/stats":
+            return await handler(request)
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            return await handler(request)
+        finally:
+            self.in_flight -= 1
+
+    async def _graphql(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        result = await graphql(
+            self._schema,
+            body["query"],
+            root_value=self._root(),
+            variable_values=body.get("variables"),
+            operation_name=body.get("operationName"),
+        )
+        response: dict[str, Any] = {"data": result.data}
+        if result.errors:
+            response["errors"] = [error.formatted for error in result.errors]
+        return web.json_response(response)
+
+    async def _asset(self, request: web.Request) -> web.Response:
+        name = request.match_info["name"]
+        data = self._asset_data(name)
+        etag = f'"{hashlib.sha1(data).hexdigest()}"'
+        if request.headers.get("If-None-Match") == etag:
+            self.not_modified += 1
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(body=data, content_type="image/png", headers={"ETag": etag})
+
+    async def _stats(self, _request: web.Request) -> web.Response:
+        return web.json_response(self.stats())
+
+    def _asset_data(self, name: str) -> bytes:
+        data = self._assets.get(name)
+        if data is None:
+            # Sheets have the layout of SpriteCollab portrait sheets (5x8 portraits of 40x40).
+            size = (200, 320) if name.startswith("sheet") else (40, 40)
+            seed = int(hashlib.sha1(name.encode()).hexdigest()[:6], 16)
+            img = Image.new("RGBA", size, (seed >> 16, (seed >> 8) & 0xFF, seed & 0xFF))
+            buffer = io.BytesIO()
+            img.save(buffer, "PNG")
+            data = buffer.getvalue()
+            self._assets[name] = data
+        return data
+
+    def _root(self) -> dict[str, Any]:
+        def monster(_info: Any, filter: Optional[list[int]] = None) -> list[dict]:
+            ids = range(self.monster_count) if filter is None else filter
+            return [self._monster(i) for i in ids if 0 <= i < self.monster_count]
+
+        return {
+            "apiVersion": "1.0",
+            "config": {
+                "portraitSize": 40,
+                "portraitTileX": 5,
+                "portraitTileY": 8,
+                "emotions": EMOTIONS,
+                "actions": ["Idle", "Walk"],
+                "completionEmotions": [[0], [0, 1, 2, 3, 4, 5, 6]],
+                "completionActions": [[0, 1]],
+                "actionMap": [{"id": 0, "name": "Idle"}, {"id": 1, "name": "Walk"}],
+            },
+            "monster": monster,
+        }
+
+    def _monster(self, monster_id: int) -> dict[str, Any]:
+        forms = [self._form(monster_id, path) for path in ("", "0001")]
+
+        def manual(_info: Any, path: str) -> Optional[dict]:
+            for form in forms:
+                if form["path"] == path:
+                    return form
+            return None
+
+        return {
+            "id": monster_id,
+            "rawId": f"{monster_id:04}",
+            "name": f"Monster {monster_id}",
+            "forms": forms,
+            "get": None,
+            "manual": manual,
+        }
+
+    def _form(self, monster_id: int, path: str) -> dict[str, Any]:
+        full_path = f"{monster_id:04}/{path}".rstrip("/")
+        asset = full_path.replace("/", "_")
+        history = [
+            {
+                "credit": CREDIT,
+                "modifiedDate": MODIFIED_DATE,
+                "modifications": EMOTIONS,
+                "obsolete": False,
+                "license": {"__typename": "KnownLicense", "license": "PMDCOLLAB2"},
+            }
+        ]
+        portraits = [
+            {
+                "emotion": emotion,
+                "locked": False,
+                "url": f"{self.base_url}/assets/{asset}_{emotion}.png",
+            }
+            for emotion in EMOTIONS
+        ]
+        return {
+            "monsterId": monster_id,
+            "path": path,
+            "fullPath": full_path,
+            "name": "Alternate" if path else "Normal",
+            "fullName": "Alternate" if path else "",
+            "isShiny": False,
+            "isFemale": False,
+            "canon": True,
+            "portraits": {
+                "required": True,
+                "phase": "FULL",
+                "phaseRaw": 2,
+                "creditPrimary": CREDIT,
+                "creditSecondary": [],
+                "sheetUrl": f"{self.base_url}/assets/sheet_{asset}.png",
+                "recolorSheetUrl": f"{self.base_url}/assets/sheet_{asset}.png",
+                "modifiedDate": MODIFIED_DATE,
+                "history": history,
+                "historyUrl": None,
+                "previewEmotion": portraits[0],
+                "emotions": portraits,
+                "emotionsFlipped": [],
+                "emotion": None,
+                "emotionFlipped": None,
+            },
+            "sprites": {
+                "required": True,
+                "phase": "INCOMPLETE",
+                "phaseRaw": 0,
+                "creditPrimary": None,
+                "creditSecondary": [],
+                "animDataXml": None,
+                "zipUrl": None,
+                "recolorSheetUrl": None,
+                "modifiedDate": None,
+                "history": [],
+                "historyUrl": None,
+                "actions": [],
+                "action": None,
+            },
+        }
+
+
+async def start(
+    server: StandInServer, host: str = "127.0.0.1", port: int = 0
+) -> web.AppRunner:
+    runner = web.AppRunner(server.app)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]  # type: ignore
+    server.base_url = f"http://{host}:{bound_port}"
+    return runner
+
+
+async def serve(args: argparse.Namespace):
+    server = StandInServer(args.monsters, args.latency)
+    await start(server, args.host, args.port)
+    print(f"Stand-in SpriteCollab server on {server.base_url}/graphql", flush=True)
+    await asyncio.Event().wait()
+
+
+async def bench(args: argparse.Namespace):
+    from skytemple_files.common.spritecollab.client import SpriteCollabClient
+
+    from skytemple.module.spritecollab.cache import (
+        MAX_CONCURRENT_REQUESTS,
+        DiskCachedRequestAdapter,
+    )
+
+    server = StandInServer(args.monsters, args.latency)
+    runner = await start(server)
+    cache_dir = args.cache_dir or tempfile.mkdtemp(prefix="spritecollab_bench_")
+    results = []
+
+    async def measure(name: str, coro_fn: Callable[[], Awaitable[Any]]):
+        server.reset_stats()
+        start_time = time.perf_counter()
+        await coro_fn()
+        results.append(
+            {
+                "step": name,
+                "seconds": round(time.perf_counter() - start_time, 3),
+                **server.stats(),
+            }
+        )
+
+    async def browse(adapter: DiskCachedRequestAdapter):
+        # Same calls as the SpriteCollab browser: list all forms, fetch the preview portraits
+        # and open a few entries.
+        client = SpriteCollabClient(
+            server_url=f"{server.base_url}/graphql", request_adapter=adapter
+        )
+        async with client as session:
+            forms = await session.list_monster_forms(True)
+            previews = forms[: args.previews]
+            await asyncio.gather(*(f.fetch_preview_portrait() for f in previews))
+            for i in range(min(args.details, args.monsters)):
+                details = await session.monster_form_details([(i, "")])
+                await details[0].fetch_portrait_sheet()
+
+    try:
+        adapter = DiskCachedRequestAdapter(cache_dir)
+        await measure("cold", lambda: browse(adapter))
+        # Same session, everything is in memory.
+        await measure("warm-memory", lambda: browse(adapter))
+        # New session (eg. the browser was reopened), read from disk.
+        await measure("warm-disk", lambda: browse(DiskCachedRequestAdapter(cache_dir)))
+        # Entries are older than the TTL and revalidated with the server (304 responses).
+        _expire(cache_dir)
+        await measure("revalidate", lambda: browse(DiskCachedRequestAdapter(cache_dir)))
+    finally:
+        await runner.cleanup()
+    # The server is gone now, everything must come from the disk cache.
+    _expire(cache_dir)
+    await measure("offline", lambda: browse(DiskCachedRequestAdapter(cache_dir)))
+
+    for result in results:
+        print(json.dumps(result))
+    print(
+        f"Concurrency limit: {MAX_CONCURRENT_REQUESTS}, cache directory: {cache_dir}",
+        file=sys.stderr,
+    )
+
+
+def _expire(cache_dir: str):
+    """Makes all cache entries outdated."""
+    for entry in os.scandir(cache_dir):
+        if entry.name.endswith(".json"):
+            with open(entry.path) as f:
+                meta = json.load(f)
+            meta["fetched_at"] = 0
+            with open(entry.path, "w") as f:
+                json.dump(meta, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("command", choices=["serve", "bench"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8123)
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="Delay of every request in seconds."
+    )
+    parser.add_argument("--monsters", type=int, default=200)
+    parser.add_argument(
+        "--previews",
+        type=int,
+        default=100,
+        help="Number of preview portraits fetched (bench).",
+    )
+    parser.add_argument(
+        "--details",
+        type=int,
+        default=10,
+        help="Number of entries opened, including their portrait sheet (bench).",
+    )
+    parser.add_argument(
+        "--cache-dir", help="Cache directory (bench). Defaults to a new directory."
+    )
+    args = parser.parse_args()
+    asyncio.run(serve(args) if args.command == "serve" else bench(args))
+
+
+if __name__ == "__main__":
+    main()
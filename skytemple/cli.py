@@ -0,0 +1,587 @@
+#  Copyright 2020-2024 Capypara and the SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+"""
+Headless batch mode (``skytemple batch ROM [options]``).
+
+Opens a ROM without any windows, applies patches, imports and exports assets using the module APIs
+and saves the ROM. Asset conversion runs in worker processes, the converted assets are then
+imported into the ROM one by one. Progress is streamed to stdout, either as text or as JSON lines.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import dataclasses
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, Any, Callable, Optional
+from xml.etree import ElementTree
+from zipfile import ZipFile
+
+from skytemple_files.common.types.file_types import FileType
+from skytemple_files.graphics.kao import SUBENTRIES
+from skytemple_files.graphics.kao.sprite_bot_sheet import SpriteBotSheet
+
+if TYPE_CHECKING:
+    from skytemple.core.rom_project import RomProject
+    from skytemple.core.settings import SkyTempleSettingsStore
+
+# Only skytemple_files is imported at module level: The conversion functions below run in worker
+# processes, which import this module, and those don't need Gtk or the modules.
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_TEXT = "text"
+PROGRESS_JSON = "json"
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+
+RawPortraits = list[Optional[tuple[bytes, bytes]]]
+
+
+@dataclasses.dataclass
+class ConvertedSprite:
+    """A sprite sheet converted to the three prepared sprite files, as imported by `SpriteModule`."""
+
+    monster: bytes
+    ground: bytes
+    attack: bytes
+    shadow_size: int
+    # Action index -> name, for the sprconf.json.
+    actions: dict[int, str]
+
+
+class Progress:
+    """Streams progress output. Every line is flushed, so the output can be followed by a build log."""
+
+    def __init__(self, fmt: str, out=sys.stdout):
+        self.fmt = fmt
+        self.out = out
+        self.failed = 0
+
+    def step(
+        self,
+        task: str,
+        item: str,
+        done: int,
+        total: int,
+        error: Optional[BaseException] = None,
+        **extra: Any,
+    ):
+        if error is not None:
+            self.failed += 1
+        if self.fmt == PROGRESS_JSON:
+            event = {
+                "event": "step",
+                "task": task,
+                "item": item,
+                "done": done,
+                "total": total,
+                "ok": error is None,
+                "error": str(error) if error is not None else None,
+            }
+            event.update(extra)
+            self._write(json.dumps(event))
+        else:
+            width = len(str(total))
+            status = "ok" if error is None else f"FAILED: {error}"
+            details = "".join(f" {k}={v}" for k, v in extra.items())
+            self._write(f"[{done:>{width}}/{total}] {task} {item}: {status}{details}")
+
+    def message(self, msg: str, **extra: Any):
+        if self.fmt == PROGRESS_JSON:
+            event = {"event": "message", "message": msg}
+            event.update(extra)
+            self._write(json.dumps(event))
+        else:
+            details = "".join(f" {k}={v}" for k, v in extra.items())
+            self._write(msg + details)
+
+    def _write(self, line: str):
+        print(line, file=self.out, flush=True)
+
+
+def _portrait_name(subindex: int) -> str:
+    return str(subindex)
+
+
+def convert_portrait_sheet(fn: str) -> RawPortraits:
+    """Converts a SpriteBot portrait sheet to raw (image, palette) pairs, one entry per subindex."""
+    kao = FileType.KAO.new(1)
+    portraits: RawPortraits = [None] * SUBENTRIES
+    for subindex, image in SpriteBotSheet.load(fn, _portrait_name):
+        kao.set_from_img(0, subindex, image)
+        portrait = kao.get(0, subindex)
+        if portrait is not None:
+            portraits[subindex] = portrait.raw()
+    return portraits
+
+
+def convert_sprite(path: str) -> ConvertedSprite:
+    """Converts a sprite sheet directory or zip file (with AnimData.xml) for import."""
+    if path.endswith(".zip"):
+        wan = FileType.WAN.CHARA.import_sheets_from_zip(path)
+        with ZipFile(path, "r") as zip_obj:
+            tree = ElementTree.fromstring(zip_obj.read("AnimData.xml"))
+    else:
+        wan = FileType.WAN.CHARA.import_sheets(path)
+        tree = ElementTree.parse(os.path.join(path, "AnimData.xml")).getroot()
+    monster, ground, attack = FileType.WAN.CHARA.split_wan(wan)
+
+    # Same as SpriteModule.prepare_monster_sprite.
+    def prepare(data, compress: bool) -> bytes:
+        data = FileType.WAN.CHARA.serialize(data)
+        if compress:
+            data = FileType.PKDPX.serialize(FileType.PKDPX.compress(data))
+        return data
+
+    shadow_size = tree.find("ShadowSize")
+    if shadow_size is None or shadow_size.text is None:
+        raise ValueError("AnimData.xml has no ShadowSize.")
+    actions = {}
+    anims = tree.find("Anims")
+    for action in anims if anims is not None else []:
+        name = action.find("Name")
+        index = action.find("Index")
+        if name is not None and name.text and index is not None and index.text:
+            actions[int(index.text)] = name.text
+
+    return ConvertedSprite(
+        monster=prepare(monster, True),
+        ground=prepare(ground, False),
+        attack=prepare(attack, True),
+        shadow_size=int(shadow_size.text),
+        actions=actions,
+    )
+
+
+def confirm_approved_plugins(
+    plugin_names: Sequence[str], settings: SkyTempleSettingsStore, plugin_dir: str
+) -> bool:
+    """
+    Plugin confirmation for `Modules.load` without a UI: Plugins are only loaded if exactly these
+    plugins were already approved in the UI before.
+    """
+    if sorted(plugin_names) == settings.get_approved_plugins():
+        return True
+    logger.warning(
+        f"Not loading the plugins in {plugin_dir}, since they were not approved yet. "
+        f"Start SkyTemple once to approve them."
+    )
+    return False
+
+
+def collect_inputs(
+    directory: str, extensions: tuple[str, ...]
+) -> list[tuple[int, str]]:
+    """
+    Returns (Pokémon ID, path) pairs for all entries of the directory named after a Pokémon ID,
+    optionally with one of the given extensions (an empty string matches directories).
+    """
+    inputs = []
+    for entry in sorted(os.listdir(directory)):
+        path = os.path.join(directory, entry)
+        stem, ext = os.path.splitext(entry)
+        if not stem.isdigit():
+            continue
+        if ext == "" and "" in extensions and os.path.isdir(path):
+            inputs.append((int(stem), path))
+        elif ext != "" and ext.lower() in extensions and os.path.isfile(path):
+            inputs.append((int(stem), path))
+    return sorted(inputs)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="skytemple batch",
+        description="Edit a ROM without opening the SkyTemple UI.",
+    )
+    parser.add_argument("rom", help="The ROM to open.")
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="Where to save the ROM to. Required if the ROM is modified. May be the input ROM.",
+    )
+    parser.add_argument(
+        "--patch",
+        action="append",
+        default=[],
+        metavar="NAME",
+        help="Apply an ASM patch (and the patches it depends on). Can be given multiple times.",
+    )
+    parser.add_argument(
+        "--patch-config",
+        metavar="JSON",
+        help='JSON file with the parameters of the patches: {"PatchName": {"Parameter": value}}.',
+    )
+    parser.add_argument(
+        "--import-portraits",
+        metavar="DIR",
+        help="Import SpriteBot portrait sheets named <Pokémon ID>.png.",
+    )
+    parser.add_argument(
+        "--import-sprites",
+        metavar="DIR",
+        help="Import sprite sheets, as directories or zip files named <Pokémon ID>[.zip].",
+    )
+    parser.add_argument(
+        "--export-portraits",
+        metavar="DIR",
+        help="Export the portraits of all Pokémon as SpriteBot sheets named <Pokémon ID>.png.",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of worker processes for converting assets.",
+    )
+    parser.add_argument(
+        "--progress",
+        choices=(PROGRESS_TEXT, PROGRESS_JSON),
+        default=PROGRESS_TEXT,
+        help="Format of the progress output.",
+    )
+    parser.add_argument(
+        "--keep-going",
+        action="store_true",
+        help="Save the ROM even if some assets could not be imported.",
+    )
+    parser.add_argument(
+        "--benchmark",
+        action="store_true",
+        help="Load all modules and print how long opening the ROM, module init and saving took.",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        help="Write a trace of the run in the Chrome trace event format.",
+    )
+    return parser
+
+
+class BatchRunner:
+    def __init__(self, args: argparse.Namespace, progress: Progress):
+        self.args = args
+        self.progress = progress
+        self.project: Optional[RomProject] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def run(self) -> int:
+        args = self.args
+        try:
+            self.load_modules()
+            self.project = self.open(args.rom)
+            if args.patch:
+                self.apply_patches(args.patch, self._read_patch_config())
+                if self.progress.failed > 0 and not args.keep_going:
+                    return EXIT_FAILED
+            if args.import_portraits:
+                self.import_portraits(args.import_portraits)
+            if args.import_sprites:
+                self.import_sprites(args.import_sprites)
+            if args.export_portraits:
+                self.export_portraits(args.export_portraits)
+            if self._is_modified():
+                if self.progress.failed > 0 and not args.keep_going:
+                    self.progress.message(
+                        "Not saving the ROM, since some assets failed. Use --keep-going to save anyway.",
+                        failed=self.progress.failed,
+                    )
+                    return EXIT_FAILED
+                self.save()
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+        return EXIT_FAILED if self.progress.failed > 0 else EXIT_OK
+
+    def load_modules(self):
+        from skytemple.core.modules import Modules
+        from skytemple.core.settings import SkyTempleSettingsStore
+
+        start = time.perf_counter()
+        Modules.load(SkyTempleSettingsStore(), confirm_approved_plugins)
+        self.progress.message(
+            f"Loaded {len(Modules.all())} modules.",
+            seconds=round(time.perf_counter() - start, 3),
+        )
+
+    def open(self, fn: str) -> RomProject:
+        from skytemple.core.profiling import record_transaction
+        from skytemple.core.rom_project import RomProject
+
+        start = time.perf_counter()
+        with record_transaction("__open-rom") as transaction:
+            # Lazy loading makes sure only the modules that are actually used are initialized,
+            # unless all of them should be benchmarked.
+            project = RomProject(
+                fn, lambda _: None, lazy_modules=not self.args.benchmark
+            )
+            RomProject._current = project
+            asyncio.run(project.load(transaction))
+        self.progress.message(
+            f"Opened {fn}.", seconds=round(time.perf_counter() - start, 3)
+        )
+        return project
+
+    def apply_patches(self, names: list[str], config: dict[str, dict[str, Any]]):
+        from skytemple_files.patch.handler.abstract import DependantPatch
+
+        project = self._project()
+        patcher = project.create_patcher()
+        to_apply: list[str] = []
+        for name in names:
+            # Dependencies first, same order as in the patch UI.
+            to_check = [name]
+            deps: list[str] = []
+            while len(to_check) > 0:
+                patch = patcher.get(to_check.pop())
+                if isinstance(patch, DependantPatch):
+                    for patch_name in patch.depends_on():
+                        if patch_name in deps:
+                            deps.remove(patch_name)
+                        deps.append(patch_name)
+                        to_check.append(patch_name)
+            for patch_name in list(reversed(deps)) + [name]:
+                if patch_name not in to_apply:
+                    to_apply.append(patch_name)
+
+        applied = 0
+        for i, name in enumerate(to_apply):
+            try:
+                if patcher.is_applied(name):
+                    self.progress.step(
+                        "patch", name, i + 1, len(to_apply), skipped="already-applied"
+                    )
+                    continue
+                patcher.apply(name, config.get(name))
+                applied += 1
+                self.progress.step("patch", name, i + 1, len(to_apply))
+            except Exception as err:
+                logger.debug(f"Applying patch {name} failed.", exc_info=err)
+                self.progress.step("patch", name, i + 1, len(to_apply), error=err)
+                # The following patches may depend on this one.
+                break
+
+        if applied > 0 and (self.progress.failed == 0 or self.args.keep_going):
+            # Patches change the binaries the modules have already read, so the ROM is
+            # saved and opened again, same as the UI does after applying patches.
+            project.filename = self._output()
+            project.save_as_is()
+            self.project = self.open(project.filename)
+
+    def import_portraits(self, directory: str):
+        from skytemple_files.graphics.kao.protocol import KaoImageProtocol
+
+        project = self._project()
+        portrait_module = project.get_module("portrait")
+        image_cls = FileType.KAO.get_image_model_cls()
+
+        def apply(md_idx: int, raw: RawPortraits):
+            prt_idx = md_idx - 1
+            if not portrait_module.is_idx_supported(prt_idx):
+                raise ValueError("This Pokémon does not support portraits.")
+            portraits: list[Optional[KaoImageProtocol]] = [
+                image_cls.create_from_raw(*p) if p is not None else None for p in raw
+            ]
+            portrait_module.import_portraits(prt_idx, portraits)
+
+        self._convert_and_apply(
+            "import-portrait",
+            collect_inputs(directory, (".png",)),
+            convert_portrait_sheet,
+            apply,
+        )
+
+    def import_sprites(self, directory: str):
+        from skytemple_files.common.ppmdu_config.data import Pmd2Index, Pmd2Sprite
+        from skytemple_files.data.md.protocol import ShadowSize
+
+        from skytemple.module.monster.module import MONSTER_MD_FILE
+
+        project = self._project()
+        sprite_module = project.get_module("sprite")
+        monster_module = project.get_module("monster")
+
+        def apply(md_idx: int, sprite: ConvertedSprite):
+            sprite_idx = monster_module.get_sprite_idx(md_idx)
+            if not sprite_module.is_idx_supported(sprite_idx):
+                raise ValueError("This Pokémon does not support sprites.")
+            sprite_module.save_monster_sprite_prepared(
+                sprite_idx, sprite.monster, sprite.ground, sprite.attack
+            )
+            # The setters of the monster module also update the item tree, which doesn't exist here.
+            monster_module.get_entry(md_idx).shadow_size = ShadowSize(
+                sprite.shadow_size  # type: ignore
+            ).value
+            project.mark_as_modified(MONSTER_MD_FILE)
+            sprite_module.update_sprconf(
+                Pmd2Sprite(
+                    sprite_idx,
+                    {
+                        idx: Pmd2Index(idx, [name])
+                        for idx, name in sprite.actions.items()
+                    },
+                )
+            )
+
+        self._convert_and_apply(
+            "import-sprite",
+            collect_inputs(directory, ("", ".zip")),
+            convert_sprite,
+            apply,
+        )
+
+    def export_portraits(self, directory: str):
+        project = self._project()
+        kao = project.get_module("portrait").kao
+        os.makedirs(directory, exist_ok=True)
+        indices = [
+            idx
+            for idx in range(0, kao.n_entries())
+            if any(kao.get(idx, sub) is not None for sub in range(0, SUBENTRIES))
+        ]
+        for i, prt_idx in enumerate(indices):
+            md_idx = prt_idx + 1
+            try:
+                SpriteBotSheet.create(kao, prt_idx).save(
+                    os.path.join(directory, f"{md_idx}.png")
+                )
+                self.progress.step("export-portrait", str(md_idx), i + 1, len(indices))
+            except Exception as err:
+                logger.debug(f"Exporting portraits {md_idx} failed.", exc_info=err)
+                self.progress.step(
+                    "export-portrait", str(md_idx), i + 1, len(indices), error=err
+                )
+
+    def save(self):
+        project = self._project()
+        project.filename = self._output()
+        start = time.perf_counter()
+        project.save_blocking()
+        self.progress.message(
+            f"Saved {project.filename}.",
+            seconds=round(time.perf_counter() - start, 3),
+        )
+
+    def _convert_and_apply(
+        self,
+        task: str,
+        inputs: list[tuple[int, str]],
+        convert: Callable[[str], Any],
+        apply: Callable[[int, Any], None],
+    ):
+        """
+        Converts the inputs in the worker processes. The results are applied to the ROM in the
+        order the conversions finish, on this thread, since the models are not shared with the workers.
+        """
+        pool = self._get_pool()
+        futures: dict[Future, int] = {
+            pool.submit(convert, path): md_idx for md_idx, path in inputs
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            md_idx = futures[future]
+            try:
+                apply(md_idx, future.result())
+                self.progress.step(task, str(md_idx), done, len(inputs))
+            except Exception as err:
+                logger.debug(f"{task} {md_idx} failed.", exc_info=err)
+                self.progress.step(task, str(md_idx), done, len(inputs), error=err)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # "spawn" is used, same as for the dungeon floor statistics: Forking a process with threads is not safe.
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=max(1, self.args.jobs),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    def _read_patch_config(self) -> dict[str, dict[str, Any]]:
+        if self.args.patch_config is None:
+            return {}
+        with open(self.args.patch_config) as f:
+            return json.load(f)
+
+    def _is_modified(self) -> bool:
+        project = self._project()
+        return (
+            project.has_modifications()
+            or self.args.output is not None
+            and os.path.abspath(self.args.output) != os.path.abspath(project.filename)
+        )
+
+    def _output(self) -> str:
+        if self.args.output is None:
+            raise ValueError("The ROM was modified, but no --output was given.")
+        return self.args.output
+
+    def _project(self) -> RomProject:
+        assert self.project is not None
+        return self.project
+
+
+def print_benchmark(progress: Progress):
+    """Prints the total time of the recorded transactions and spans, slowest first."""
+    from skytemple.core.profiling import get_trace_events
+
+    totals: dict[tuple[str, str], list[int]] = defaultdict(lambda: [0, 0])
+    for event in get_trace_events():
+        entry = totals[(event.op or "transaction", event.name)]
+        entry[0] += 1
+        entry[1] += event.end_ns - event.start_ns
+    for (op, name), (count, total_ns) in sorted(
+        totals.items(), key=lambda item: item[1][1], reverse=True
+    ):
+        progress.message(
+            f"benchmark {op} {name}", count=count, ms=round(total_ns / 1_000_000, 3)
+        )
+
+
+def main(argv: list[str]) -> int:
+    args = build_parser().parse_args(argv)
+    progress = Progress(args.progress)
+
+    if args.benchmark or args.trace:
+        from skytemple.core.profiling import ENV_SKYTEMPLE_PROFILE, reset_impls_cache
+
+        os.environ[ENV_SKYTEMPLE_PROFILE] = "1"
+        reset_impls_cache()
+
+    try:
+        exit_code = BatchRunner(args, progress).run()
+    except Exception as err:
+        logger.error("Batch run failed.", exc_info=err)
+        progress.message(f"Error: {err}", failed=True)
+        exit_code = EXIT_FAILED
+
+    if args.benchmark:
+        print_benchmark(progress)
+    if args.trace:
+        from skytemple.core.profiling import export_chrome_trace
+
+        export_chrome_trace(args.trace)
+    return exit_code
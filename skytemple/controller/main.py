@@ -17,8 +17,10 @@
 
 import os
 import sys
+import time
 import traceback
 import webbrowser
+from functools import partial
 from threading import current_thread
 from typing import Optional, TYPE_CHECKING, cast, Union
 import packaging.version
@@ -31,8 +33,14 @@ from gi.repository.GdkPixbuf import Pixbuf
 from skytemple.controller.settings import SettingsController
 from skytemple.controller.tilequant_dialog import TilequantController
 from skytemple.core.abstract_module import AbstractModule
-from skytemple.core.item_tree import ItemTree, ItemTreeEntryRef
-from skytemple.core.profiling import record_span
+from skytemple.core.item_tree import ItemTree, ItemTreeEntryRef, SearchMode
+from skytemple.core.profiling import (
+    record_span,
+    get_trace_events,
+    export_chrome_trace,
+    export_speedscope,
+)
+from skytemple.core.view_cache import ViewCache, ViewCacheKey
 from skytemple.core.view_loader import load_view
 from skytemple.core.error_handler import display_error, capture_error, ask_user_report
 from skytemple.core.events.events import EVT_VIEW_SWITCH, EVT_PROJECT_OPEN
@@ -75,6 +83,7 @@ main_thread = current_thread()
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 COL_VISIBLE = 7
+SEARCH_DEBOUNCE_MS = 150
 SKYTEMPLE_WIKI_LINK = "https://wiki.skytemple.org"
 
 
@@ -124,6 +133,11 @@ class MainController:
             threadsafe=False,
         )
 
+    @classmethod
+    def view_cache_stats(cls) -> dict[str, Union[int, float]]:
+        """Returns hit rate and build time metrics of the cache of recently used views."""
+        return cls._instance._view_cache.stats()
+
     @classmethod
     def view_info(
         cls,
@@ -168,11 +182,20 @@ class MainController:
         window.connect("destroy", self.on_destroy)
 
         self._search_text: Optional[str] = None
+        self._search_timeout_id: Optional[int] = None
         self._current_view_module: Optional[AbstractModule] = None
         self._current_view: Union[AbstractController, Gtk.Widget, None] = None
         self._current_view_item_id: Optional[int] = None
+        # Key of the view currently shown in the editor stack, if it can be cached.
+        self._loaded_view_key: Optional[ViewCacheKey] = None
+        # Names of the ROM files requested by the view currently shown and by the view being loaded.
+        self._loaded_view_files: set[str] = set()
+        self._loading_view_files: set[str] = set()
+        self._view_load_started: Optional[float] = None
+        self._view_cache = ViewCache(self.settings.get_view_cache_size())
         self._resize_timeout_id: Optional[int] = None
         self._loaded_map_bg_module: Optional["MapBgModule"] = None
+        self._lazy_module_roots: dict[str, Optional[ItemTreeEntryRef]] = {}
         self._current_breadcrumbs: list[str] = []
         self._after_save_action = None
         self._view_load_sentry_event_id: Optional[str] = None
@@ -375,6 +398,12 @@ class MainController:
             # Init the sprite provider
             project = RomProject.get_current()
             assert project is not None
+            # Views of the previous ROM can not be re-used.
+            self._view_cache.invalidate()
+            self._loaded_view_key = None
+            self._loaded_view_files = set()
+            self._loading_view_files = set()
+            project.set_modified_callback(self._on_project_modified)
             with record_span("ui", "init-sprite-loader"):
                 project.get_sprite_provider().init_loader(self._window.get_screen())
 
@@ -399,10 +428,24 @@ class MainController:
                 # Tell the debugger
                 self._debugger_manager.handle_project_change()
 
-                # Load item tree items
-                for module in sorted(
-                    project.get_modules(False), key=lambda m: m.sort_order()
+                # Load item tree items. Modules that are not loaded yet get a placeholder.
+                lazy_modules = project.get_lazy_modules()
+                tree_entries: list[
+                    tuple[int, Union[AbstractModule, tuple[str, type[AbstractModule]]]]
+                ] = [(m.sort_order(), m) for m in project.get_modules(False)]
+                tree_entries += [
+                    (m.sort_order(), (n, m)) for n, m in lazy_modules.items()
+                ]
+                for _sort_order, module_or_lazy in sorted(
+                    tree_entries, key=lambda e: e[0]
                 ):
+                    if isinstance(module_or_lazy, tuple):
+                        lazy_name, lazy_module = module_or_lazy
+                        icon, label = assert_not_none(lazy_module.lazy_tree_root())
+                        logger.debug(f"Adding placeholder for module {lazy_name}...")
+                        self._tree_repr.add_lazy_placeholder(lazy_name, icon, label)
+                        continue
+                    module = module_or_lazy
                     with record_span("load-tree-items", module.__class__.__name__):
                         logger.debug(
                             f"Loading {module.__class__.__name__} module tree items..."
@@ -417,6 +460,15 @@ class MainController:
                 with record_span("ui", "finalize-tree"):
                     self._tree_repr.finalize()
 
+                # Replace placeholders once their modules are loaded on demand.
+                project.set_module_loaded_callback(self.on_lazy_module_loaded)
+                for lazy_name in self._tree_repr.lazy_placeholder_modules():
+                    if lazy_name not in project.get_lazy_modules():
+                        self.on_lazy_module_loaded(
+                            lazy_name,
+                            project.get_module(lazy_name),  # type: ignore
+                        )
+
                 # Trigger event
                 EventManager.instance().trigger(EVT_PROJECT_OPEN, project=project)
 
@@ -481,8 +533,74 @@ class MainController:
                 and treeiter is not None
                 and RomProject.get_current() is not None
             ):
+                module_name = self._lazy_placeholder_module_for_row(model, treeiter)
+                if module_name is not None:
+                    new_root = self._load_lazy_module(module_name)
+                    if new_root is not None:
+                        self.load_view_main_list(new_root)
+                    return
                 self.load_view(model, treeiter, tree, False)
 
+    def on_main_item_list_test_expand_row(
+        self, tree: Gtk.TreeView, treeiter: Gtk.TreeIter, path: Gtk.TreePath
+    ):
+        """If the node of a module that is not loaded yet is expanded, load it first."""
+        assert current_thread() == main_thread
+        model = tree.get_model()
+        if model is None or RomProject.get_current() is None:
+            return False
+        module_name = self._lazy_placeholder_module_for_row(model, treeiter)
+        if module_name is None:
+            return False
+        new_root = self._load_lazy_module(module_name)
+        if new_root is not None:
+            # The placeholder is gone, expand the real node instead.
+            GLib.idle_add(lambda: self._expand_main_list_node(new_root))
+        return True
+
+    def on_lazy_module_loaded(self, name: str, module: AbstractModule):
+        """A module was loaded on demand. Replace its placeholder in the item tree."""
+        if current_thread() != main_thread:
+            GLib.idle_add(lambda: self.on_lazy_module_loaded(name, module))
+            return
+        with record_span("load-tree-items", module.__class__.__name__):
+            self._lazy_module_roots[name] = self._tree_repr.replace_lazy_placeholder(
+                name, module
+            )
+        if module.__class__.__name__ == "MapBgModule":
+            self._loaded_map_bg_module = module  # type: ignore
+
+    def _lazy_placeholder_module_for_row(
+        self, model: Gtk.TreeModel, treeiter: Gtk.TreeIter
+    ) -> Optional[str]:
+        """
+        If the row of the main item list is the placeholder of a module that is not loaded yet,
+        return the name of the module.
+        """
+        if model == self._main_item_filter:
+            treeiter = cast(
+                Gtk.TreeModelFilter, self._main_item_filter
+            ).convert_iter_to_child_iter(treeiter)
+        return self._tree_repr.get_lazy_placeholder_module(treeiter)
+
+    def _load_lazy_module(self, module_name: str) -> Optional[ItemTreeEntryRef]:
+        """Load a module on demand and return the node that replaced its placeholder, if any."""
+        project = RomProject.get_current()
+        if project is None:
+            return None
+        with record_span("ui", "load-lazy-module"):
+            project.get_module(module_name)  # type: ignore
+        return self._lazy_module_roots.pop(module_name, None)
+
+    def _expand_main_list_node(self, node: ItemTreeEntryRef):
+        assert self._main_item_list is not None
+        assert self._main_item_filter is not None
+        filter_path = self._main_item_filter.convert_child_path_to_path(
+            self._item_store.get_path(node._self)
+        )
+        if filter_path is not None:
+            self._main_item_list.expand_row(filter_path, False)
+
     def load_view_main_list(self, treeiter: ItemTreeEntryRef):
         assert self._main_item_list is not None
         return self.load_view(self._item_store, treeiter._self, self._main_item_list)
@@ -507,16 +625,42 @@ class MainController:
         self._current_view_module = selected_node[2]
         self._current_view_controller_class = selected_node[3]
         self._current_view_item_id = selected_node[4]
-        # Fully load the view and the controller
-        AsyncTaskDelegator.run_task(
-            load_view(
-                assert_not_none(self._current_view_module),
-                self._current_view_controller_class,
-                self._current_view_item_id,
-                self,
-            ),
-            threadsafe=False,
+        view_key = ViewCache.make_key(
+            assert_not_none(self._current_view_module),
+            self._current_view_controller_class,
+            self._current_view_item_id,
         )
+        cached = self._view_cache.take(view_key) if view_key is not None else None
+        self._record_loading_view_files(
+            assert_not_none(self._current_view_module),
+            cached[2] if cached is not None else set(),
+        )
+        if cached is not None:
+            # Re-use the view from the last time it was opened.
+            logger.debug("View found in cache.")
+            cached_view, cached_widget, cached_files = cached
+            GLib.idle_add(
+                partial(
+                    self.on_view_loaded,
+                    assert_not_none(self._current_view_module),
+                    cached_view,
+                    self._current_view_item_id,
+                    cached_widget,
+                    cached_files,
+                )
+            )
+        else:
+            self._view_load_started = time.monotonic()
+            # Fully load the view and the controller
+            AsyncTaskDelegator.run_task(
+                load_view(
+                    assert_not_none(self._current_view_module),
+                    self._current_view_controller_class,
+                    self._current_view_item_id,
+                    self,
+                ),
+                threadsafe=False,
+            )
         # Expand the node
         tree.expand_to_path(path)
         # Select node
@@ -530,8 +674,14 @@ class MainController:
         module: AbstractModule,
         in_view: Union[AbstractController, Gtk.Widget],
         item_id: int,
+        view_widget: Optional[Gtk.Widget] = None,
+        view_files: Optional[set[str]] = None,
     ):
-        """A new module view was loaded! Present it!"""
+        """
+        A new module view was loaded! Present it!
+        If the view was taken from the view cache, view_widget is the widget that was previously shown for it
+        and view_files the names of the files it requested.
+        """
         assert current_thread() == main_thread
         with record_span("ui", "on-view-loaded"):
             # Check if current view still matches expected
@@ -540,7 +690,9 @@ class MainController:
             old_view = self._editor_stack.get_child_by_name("es__loaded_view")
             view: Gtk.Widget
             try:
-                if isinstance(in_view, Gtk.Widget):
+                if view_widget is not None:
+                    view = view_widget
+                elif isinstance(in_view, Gtk.Widget):
                     view = in_view
                 else:
                     view = in_view.get_view()
@@ -557,24 +709,63 @@ class MainController:
                     self._current_view.unload()
                 if isinstance(in_view, AbstractController):
                     in_view.unload()
+                self._loaded_view_key = None
+                self._stop_recording_view_files(self._loaded_view_files)
+                self._stop_recording_view_files(self._loading_view_files)
+                self._loaded_view_files = set()
+                self._loading_view_files = set()
                 return
+            view_key = ViewCache.make_key(module, in_view.__class__, item_id)
             if (
                 self._current_view_module != module
                 or self._current_view_controller_class != in_view.__class__
                 or self._current_view_item_id != item_id
             ):
                 logger.warning("Loaded view not matching selection.")
-                view.destroy()
+                if view_widget is not None and view_key is not None:
+                    self._view_cache.put(
+                        view_key,
+                        (
+                            in_view,
+                            view,
+                            view_files if view_files is not None else set(),
+                        ),
+                    )
+                else:
+                    view.destroy()
                 return
+            if view_widget is None and self._view_load_started is not None:
+                self._view_cache.record_build(
+                    time.monotonic() - self._view_load_started
+                )
+            self._view_load_started = None
             if old_view:
-                logger.debug("Destroying old view...")
                 self._editor_stack.remove(old_view)
-                old_view.destroy()
-            if self._current_view is not None and isinstance(
-                self._current_view, AbstractController
+            if (
+                old_view
+                and self._current_view is not None
+                and self._loaded_view_key is not None
+                and self._loaded_view_key != view_key
+                and self._view_cache.enabled
             ):
-                self._current_view.unload()
+                logger.debug("Keeping old view in cache...")
+                self._view_cache.put(
+                    self._loaded_view_key,
+                    (self._current_view, old_view, self._loaded_view_files),
+                )
+            else:
+                if old_view:
+                    logger.debug("Destroying old view...")
+                    old_view.destroy()
+                if self._current_view is not None and isinstance(
+                    self._current_view, AbstractController
+                ):
+                    self._current_view.unload()
+            self._stop_recording_view_files(self._loaded_view_files)
             self._current_view = in_view
+            self._loaded_view_key = view_key
+            self._loaded_view_files = self._loading_view_files
+            self._loading_view_files = set()
             logger.debug("Adding and showing new view...")
             self._editor_stack.add_named(view, "es__loaded_view")
             view.show_all()
@@ -588,6 +779,32 @@ class MainController:
                 breadcrumbs=self._current_breadcrumbs,
             )
 
+    def _on_project_modified(self, file: Optional[str]):
+        # Cached views may show data that was just changed.
+        if current_thread() == main_thread:
+            self._view_cache.invalidate(file)
+        else:
+            GLib.idle_add(partial(self._view_cache.invalidate, file))
+
+    def _record_loading_view_files(self, module: AbstractModule, files: set[str]):
+        """
+        Records the files requested from now on into files, for the view that is being loaded. The view
+        also depends on the files its module requested while it was loaded.
+        """
+        project = RomProject.get_current()
+        if project is None:
+            return
+        self._stop_recording_view_files(self._loading_view_files)
+        files.update(project.get_module_files(module))
+        self._loading_view_files = files
+        project.record_file_access(files)
+
+    @staticmethod
+    def _stop_recording_view_files(files: set[str]):
+        project = RomProject.get_current()
+        if project is not None:
+            project.stop_recording_file_access(files)
+
     def on_view_loaded_error(self, ex: BaseException):
         """An error during module view load happened :("""
         assert current_thread() == main_thread
@@ -632,7 +849,12 @@ class MainController:
     def on_main_item_list_search_search_changed(self, search: Gtk.SearchEntry):
         """Filter the main item view using the search field"""
         self._search_text = search.get_text().strip()
-        self._filter__refresh_results()
+        # Typing quickly only filters once the user paused.
+        if self._search_timeout_id is not None:
+            GLib.source_remove(self._search_timeout_id)
+        self._search_timeout_id = GLib.timeout_add(
+            SEARCH_DEBOUNCE_MS, self._filter__on_search_timeout
+        )
 
     def on_settings_show_assistant_clicked(self, *args):
         assistant: Gtk.Assistant = builder_get_assert(
@@ -646,6 +868,7 @@ class MainController:
 
     def on_settings_open_settings_clicked(self, *args):
         self.settings_controller.run()
+        self._view_cache.set_max_views(self.settings.get_view_cache_size())
 
     def on_intro_dialog_created_with_clicked(self, *args):
         if RomProject.get_current() is None or self._loaded_map_bg_module is None:
@@ -671,6 +894,57 @@ class MainController:
     def on_settings_spritecollab_clicked(self, *args):
         self.show_spritecollab_browser()
 
+    def on_settings_export_trace_clicked(self, *args):
+        if len(get_trace_events()) == 0:
+            md = SkyTempleMessageDialog(
+                self._window,
+                Gtk.DialogFlags.DESTROY_WITH_PARENT,
+                Gtk.MessageType.INFO,
+                Gtk.ButtonsType.OK,
+                _(
+                    "Nothing was recorded yet. Enable 'Record performance traces locally' in the settings first."
+                ),
+            )
+            md.run()
+            md.destroy()
+            return
+
+        dialog = Gtk.FileChooserNative.new(
+            _("Export performance trace..."),
+            self._window,
+            Gtk.FileChooserAction.SAVE,
+            None,
+            None,
+        )
+        dialog.set_current_name("skytemple-trace.json")
+        filter_chrome = Gtk.FileFilter()
+        filter_chrome.set_name(_("Chrome trace (*.json)"))
+        filter_chrome.add_pattern("*.json")
+        dialog.add_filter(filter_chrome)
+        filter_speedscope = Gtk.FileFilter()
+        filter_speedscope.set_name(_("speedscope (*.speedscope.json)"))
+        filter_speedscope.add_pattern("*.speedscope.json")
+        dialog.add_filter(filter_speedscope)
+
+        response = dialog.run()
+        fn = dialog.get_filename()
+        is_speedscope = dialog.get_filter() == filter_speedscope
+        dialog.destroy()
+
+        if response == Gtk.ResponseType.ACCEPT and fn is not None:
+            try:
+                if is_speedscope or fn.endswith(".speedscope.json"):
+                    export_speedscope(add_extension_if_missing(fn, "speedscope.json"))
+                else:
+                    export_chrome_trace(add_extension_if_missing(fn, "json"))
+            except BaseException as ex:
+                display_error(
+                    sys.exc_info(),
+                    str(ex),
+                    _("Error exporting the performance trace."),
+                    should_report=False,
+                )
+
     def on_settings_about_clicked(self, *args):
         about: Gtk.AboutDialog = builder_get_assert(
             self.builder, Gtk.AboutDialog, "about_dialog"
@@ -887,64 +1161,45 @@ class MainController:
         # TODO: Recent and Favorites
 
     # TODO: CODE DUPLICATION BETWEEN SKYTEMPLE AND SSB DEBUGGER -- If we ever make a common package, this must go into it!
+    def _filter__on_search_timeout(self):
+        self._search_timeout_id = None
+        self._filter__refresh_results()
+        return False
+
     def _filter__refresh_results(self):
         """Filter the main item view"""
-        if self._search_text == "":
-            self._item_store.foreach(self._filter__reset_row, True)
-        else:
+        index = self._tree_repr.search_index
+        visible: Optional[set[int]] = None
+        matches: list[Gtk.TreeIter] = []
+        if self._search_text:
+            query, mode = self._filter__parse_query(self._search_text)
+            matches, visible = index.search(query, mode)
+        # Only touch rows whose visibility actually changes, every change makes the filter model
+        # emit signals and re-evaluate the row.
+        for key, iter in index.iters().items():
+            make_visible = visible is None or key in visible
+            if self._item_store.get_value(iter, COL_VISIBLE) != make_visible:
+                self._item_store.set_value(iter, COL_VISIBLE, make_visible)
+        if visible is not None:
             assert self._main_item_list is not None
             assert self._main_item_filter is not None
+            item_filter = cast(Gtk.TreeModelFilter, self._main_item_filter)
             self._main_item_list.collapse_all()
-            self._item_store.foreach(self._filter__reset_row, False)
-            self._item_store.foreach(self._filter__show_matches)
-            self._main_item_filter.foreach(self._filter__expand_all_visible)
-
-    def _filter__reset_row(self, model, path, iter, make_visible):
-        """Change the visibility of the given row"""
-        self._item_store[iter][COL_VISIBLE] = make_visible
-        return False
-
-    def _filter__make_path_visible(self, model, iter):
-        """Make a row and its ancestors visible"""
-        while iter:
-            self._item_store[iter][COL_VISIBLE] = True
-            iter = model.iter_parent(iter)
-
-    def _filter__make_subtree_visible(self, model, iter):
-        """Make descendants of a row visible"""
-        for i in range(model.iter_n_children(iter)):
-            subtree = model.iter_nth_child(iter, i)
-            if model[subtree][COL_VISIBLE]:
-                # Subtree already visible
-                continue
-            self._item_store[subtree][COL_VISIBLE] = True
-            self._filter__make_subtree_visible(model, subtree)
-
-    def _filter__expand_all_visible(self, model: Gtk.TreeStore, path, iter):
-        """
-        This is super annoying. Because of the two different "views" on the model,
-        we can't do this in show_matches, because we have to use the filter model here!
-        """
-        if self._search_text is None:
-            return True
-        search_query = self._search_text.lower()
-        text = model[iter][1].lower()
-        if search_query in text:
-            assert self._main_item_list is not None
-            self._main_item_list.expand_to_path(path)
-        return False
-
-    def _filter__show_matches(self, model: Gtk.TreeStore, path, iter):
-        if self._search_text is None:
-            return True
-        search_query = self._search_text.lower()
-        text = model[iter][1].lower()
-        if search_query in text:
-            # Propagate visibility change up
-            self._filter__make_path_visible(model, iter)
-            # Propagate visibility change down
-            self._filter__make_subtree_visible(model, iter)
-        return False
+            for iter in matches:
+                path = item_filter.convert_child_path_to_path(
+                    self._item_store.get_path(iter)
+                )
+                if path is not None:
+                    self._main_item_list.expand_to_path(path)
+
+    @staticmethod
+    def _filter__parse_query(text: str) -> tuple[str, SearchMode]:
+        """A leading "^" searches for word prefixes, a leading "~" does a fuzzy search."""
+        if text.startswith("^"):
+            return text[1:], SearchMode.PREFIX
+        if text.startswith("~"):
+            return text[1:], SearchMode.FUZZY
+        return text, SearchMode.CONTAINS
 
     # END CODE DUPLICATION
 
@@ -957,6 +1212,10 @@ class MainController:
 
     def _init_window_after_rom_load(self, rom_name):
         """Set the titlebar and make buttons sensitive after a ROM load"""
+        if self._search_timeout_id is not None:
+            GLib.source_remove(self._search_timeout_id)
+            self._search_timeout_id = None
+        self._tree_repr.search_index.clear()
         self._item_store.clear()
         builder_get_assert(self.builder, Gtk.Button, "save_button").set_sensitive(True)
         builder_get_assert(self.builder, Gtk.Button, "save_as_button").set_sensitive(
@@ -23,6 +23,7 @@ from typing import Optional
 
 from gi.repository import Gtk, GLib
 
+from skytemple.core import profiling
 from skytemple.core.async_tasks.delegator import AsyncConfiguration
 from skytemple.core.message_dialog import SkyTempleMessageDialog
 from skytemple.core.settings import SkyTempleSettingsStore
@@ -66,6 +67,18 @@ class SettingsController:
         builder_get_assert(self.builder, Gtk.Button, "setting_help_async").connect(
             "clicked", self.on_setting_help_async_clicked
         )
+        builder_get_assert(
+            self.builder, Gtk.Button, "setting_help_lazy_modules"
+        ).connect("clicked", self.on_setting_help_lazy_modules_clicked)
+        builder_get_assert(
+            self.builder, Gtk.Button, "setting_help_model_cache"
+        ).connect("clicked", self.on_setting_help_model_cache_clicked)
+        builder_get_assert(self.builder, Gtk.Button, "setting_help_view_cache").connect(
+            "clicked", self.on_setting_help_view_cache_clicked
+        )
+        builder_get_assert(
+            self.builder, Gtk.Button, "setting_help_local_profiling"
+        ).connect("clicked", self.on_setting_help_local_profiling_clicked)
         builder_get_assert(self.builder, Gtk.Label, "setting_help_privacy").connect(
             "activate-link", self.on_help_privacy_activate_link
         )
@@ -155,6 +168,54 @@ class SettingsController:
         )
         settings_csd_enable.set_active(csd_before)
 
+        # Lazy module loading
+        lazy_modules_before = self.settings.get_lazy_module_loading()
+        settings_lazy_modules = builder_get_assert(
+            self.builder, Gtk.Switch, "setting_lazy_modules"
+        )
+        settings_lazy_modules.set_active(lazy_modules_before)
+
+        # Model cache
+        model_cache_before = self.settings.get_model_cache_enabled()
+        settings_model_cache = builder_get_assert(
+            self.builder, Gtk.Switch, "setting_model_cache"
+        )
+        settings_model_cache.set_active(model_cache_before)
+
+        # Sprite cache size
+        sprite_cache_size_before = self.settings.get_sprite_cache_size_mb()
+        settings_sprite_cache_size = builder_get_assert(
+            self.builder, Gtk.SpinButton, "setting_sprite_cache_size"
+        )
+        settings_sprite_cache_size.set_range(16, 4096)
+        settings_sprite_cache_size.set_increments(16, 128)
+        settings_sprite_cache_size.set_value(sprite_cache_size_before)
+
+        # View cache size
+        view_cache_size_before = self.settings.get_view_cache_size()
+        settings_view_cache_size = builder_get_assert(
+            self.builder, Gtk.SpinButton, "setting_view_cache_size"
+        )
+        settings_view_cache_size.set_range(0, 32)
+        settings_view_cache_size.set_increments(1, 4)
+        settings_view_cache_size.set_value(view_cache_size_before)
+
+        # Thread pool workers
+        async_pool_workers_before = self.settings.get_async_pool_workers()
+        settings_async_pool_workers = builder_get_assert(
+            self.builder, Gtk.SpinButton, "setting_async_pool_workers"
+        )
+        settings_async_pool_workers.set_range(0, 64)
+        settings_async_pool_workers.set_increments(1, 4)
+        settings_async_pool_workers.set_value(async_pool_workers_before)
+
+        # Local profiling
+        local_profiling_before = self.settings.get_local_profiling_enabled()
+        settings_local_profiling = builder_get_assert(
+            self.builder, Gtk.Switch, "setting_local_profiling"
+        )
+        settings_local_profiling.set_active(local_profiling_before)
+
         response = self.window.run()
 
         have_to_restart = False
@@ -203,6 +264,11 @@ class SettingsController:
             if before_async != async_mode:
                 self.settings.set_async_configuration(async_mode)
                 have_to_restart = True
+            async_pool_workers_new = settings_async_pool_workers.get_value_as_int()
+            if async_pool_workers_before != async_pool_workers_new:
+                self.settings.set_async_pool_workers(async_pool_workers_new)
+                if async_mode == AsyncConfiguration.THREAD_POOL:
+                    have_to_restart = True
 
             # Sentry
             allow_sentry_enabled = settings_allow_sentry_enable.get_active()
@@ -222,6 +288,32 @@ class SettingsController:
                 self.settings.set_csd_enabled(csd_new)
                 have_to_restart = True
 
+            # Lazy module loading (applies to the next opened ROM)
+            lazy_modules_new = settings_lazy_modules.get_active()
+            if lazy_modules_before != lazy_modules_new:
+                self.settings.set_lazy_module_loading(lazy_modules_new)
+
+            # Model cache (applies to the next opened ROM)
+            model_cache_new = settings_model_cache.get_active()
+            if model_cache_before != model_cache_new:
+                self.settings.set_model_cache_enabled(model_cache_new)
+
+            # Sprite cache size (applies to the next opened ROM)
+            sprite_cache_size_new = settings_sprite_cache_size.get_value_as_int()
+            if sprite_cache_size_before != sprite_cache_size_new:
+                self.settings.set_sprite_cache_size_mb(sprite_cache_size_new)
+
+            # View cache size
+            view_cache_size_new = settings_view_cache_size.get_value_as_int()
+            if view_cache_size_before != view_cache_size_new:
+                self.settings.set_view_cache_size(view_cache_size_new)
+
+            # Local profiling
+            local_profiling_new = settings_local_profiling.get_active()
+            if local_profiling_before != local_profiling_new:
+                self.settings.set_local_profiling_enabled(local_profiling_new)
+                profiling.reset_impls_cache()
+
         self.window.hide()
 
         if have_to_restart:
@@ -251,6 +343,68 @@ class SettingsController:
         md.run()
         md.destroy()
 
+    def on_setting_help_lazy_modules_clicked(self, *args):
+        md = SkyTempleMessageDialog(
+            self.window,
+            Gtk.DialogFlags.DESTROY_WITH_PARENT,
+            Gtk.MessageType.INFO,
+            Gtk.ButtonsType.OK,
+            _(
+                "If this is enabled, some of the larger sections of the ROM (such as Scenes and Dungeons) "
+                "are only loaded once you expand or open them for the first time. This makes opening "
+                "ROMs faster. The setting applies to the next ROM you open."
+            ),
+        )
+        md.run()
+        md.destroy()
+
+    def on_setting_help_model_cache_clicked(self, *args):
+        md = SkyTempleMessageDialog(
+            self.window,
+            Gtk.DialogFlags.DESTROY_WITH_PARENT,
+            Gtk.MessageType.INFO,
+            Gtk.ButtonsType.OK,
+            _(
+                "If this is enabled, SkyTemple stores some of the files it loaded from the ROM in its "
+                "configuration directory, so that opening the same ROM again is faster. "
+                "Files that changed in the ROM are loaded again. The setting applies to the next ROM you open."
+            ),
+        )
+        md.run()
+        md.destroy()
+
+    def on_setting_help_local_profiling_clicked(self, *args):
+        md = SkyTempleMessageDialog(
+            self.window,
+            Gtk.DialogFlags.DESTROY_WITH_PARENT,
+            Gtk.MessageType.INFO,
+            Gtk.ButtonsType.OK,
+            _(
+                "Records how long SkyTemple takes for things like opening ROMs, loading views and saving. "
+                "Nothing is sent anywhere. The recording can be saved with 'Export performance trace...' "
+                "in the main menu and opened with chrome://tracing, Perfetto or speedscope.\n\n"
+                "This can also be enabled by setting the environment variable SKYTEMPLE_PROFILE=1."
+            ),
+        )
+        md.run()
+        md.destroy()
+
+    def on_setting_help_view_cache_clicked(self, *args):
+        md = SkyTempleMessageDialog(
+            self.window,
+            Gtk.DialogFlags.DESTROY_WITH_PARENT,
+            Gtk.MessageType.INFO,
+            Gtk.ButtonsType.OK,
+            _(
+                "The number of editors SkyTemple keeps open in the background after you switch to "
+                "another one. Switching back to one of these editors is instant. Editors kept open "
+                "use additional memory and are closed when something they show is changed. "
+                "Set this to 0 to disable this."
+            ),
+        )
+        md.run()
+        md.destroy()
+
     def on_setting_help_async_clicked(self, *args):
         md = SkyTempleMessageDialog(
             self.window,
@@ -263,6 +417,8 @@ class SettingsController:
                 "unless you know what you are doing or are running into crashes or other issues.\n\n\n"
                 "Thread-based: SkyTemple spawns an extra thread to run asynchronous operations. "
                 "This could lead to thread safety issues, but is the 'smoothest' loading experience.\n\n"
+                "Thread pool: Same as 'Thread-based', but sprites and portraits are loaded on multiple threads "
+                "at once, the ones currently shown first. The number of threads can be set below.\n\n"
                 "Synchronous: Asynchronous operations run immediately. The SkyTemple UI freezes briefly during that.\n\n"
                 "GLib: Same has 'Synchronous' but the UI gets the chance to finish displaying loaders etc. "
                 "before they are run.\n\n"
@@ -65,6 +65,18 @@ class AbstractModule(ABC):
         Where to sort this module in the item tree, lower numbers mean higher.
         """
 
+    @classmethod
+    def lazy_tree_root(cls) -> tuple[str, str] | None:
+        """
+        Icon name and label of the root node this module adds to the item tree.
+        Modules returning this support being loaded on demand: If lazy module loading is enabled,
+        the module is only constructed when its node is first expanded or opened or when
+        it is requested via `RomProject.get_module`. Until then a placeholder with this icon and label
+        is shown instead.
+        If not implemented, always returns None and the module is loaded when the ROM is opened.
+        """
+        return None
+
     @abstractmethod
     def load_tree_items(self, item_tree: ItemTree):
         """
@@ -21,13 +21,14 @@ from skytemple.core.logger import async_handle_exeception
 from skytemple_files.common.i18n_util import _
 import asyncio
 from typing import Optional
-from collections.abc import Coroutine
+from collections.abc import Coroutine, Hashable
 from enum import Enum, auto
 
 import gbulb
 from gi.repository import GLib, Gio
 
 from skytemple.core.async_tasks.now import Now
+from skytemple.core.async_tasks.pool import TaskPriority, ThreadPoolRunner
 from skytemple_files.common.task_runner import AsyncTaskRunner
 
 
@@ -42,6 +43,9 @@ class AsyncEventLoopType(Enum):
 class AsyncTaskRunnerType(Enum):
     # Run asynchronous tasks in a separate thread.
     THREAD_BASED = auto()
+    # Like THREAD_BASED, but loading tasks (see AsyncTaskDelegator.run_load) run on a pool of
+    # worker threads, by priority.
+    THREAD_POOL = auto()
     # Starts a new asyncio event loop to run the coroutine in immediately.
     EVENT_LOOP_BLOCKING = auto()
     # Waits for GLib idle, then starts a new asyncio event loop to run the coroutine in immediately.
@@ -57,6 +61,12 @@ class AsyncConfiguration(Enum):
         AsyncEventLoopType.GLIB_ONLY,
         AsyncTaskRunnerType.THREAD_BASED,
     )
+    THREAD_POOL = (
+        "thread_pool",
+        _("Thread pool"),
+        AsyncEventLoopType.GLIB_ONLY,
+        AsyncTaskRunnerType.THREAD_POOL,
+    )
     BLOCKING = (
         "blocking",
         _("Synchronous"),
@@ -142,6 +152,7 @@ class AsyncTaskDelegator:
             # TODO: Currently always required for Debugger compatibility
             #  (since that ALWAYS uses this async implementation)
             AsyncTaskRunner.end()
+            ThreadPoolRunner.end()
             sys.exit(exit_code)
 
     @classmethod
@@ -151,7 +162,10 @@ class AsyncTaskDelegator:
         If the task is marked as not threadsafe (=it is expected to run on the calling thread) the task
         may be run immediately instead of the configured async strategy.
         """
-        if cls.config_type().async_task_runner_type == AsyncTaskRunnerType.THREAD_BASED:
+        if cls.config_type().async_task_runner_type in (
+            AsyncTaskRunnerType.THREAD_BASED,
+            AsyncTaskRunnerType.THREAD_POOL,
+        ):
             if not threadsafe:
                 Now.instance().run_task(coro)
             else:
@@ -174,6 +188,30 @@ class AsyncTaskDelegator:
         else:
             raise RuntimeError("Invalid async configuration")
 
+    @classmethod
+    def run_load(
+        cls,
+        coro: Coroutine,
+        priority: TaskPriority = TaskPriority.DEFAULT,
+        key: Optional[Hashable] = None,
+    ):
+        """
+        Runs a CPU-bound loading task (eg. rendering a sprite), that can run in parallel to other loading tasks.
+        With AsyncTaskRunnerType.THREAD_POOL these run on a pool of worker threads, tasks with a higher priority
+        first. Otherwise this is the same as run_task and priority and key are ignored.
+        The key can be used to raise the priority of the task later, using raise_priority.
+        """
+        if cls.config_type().async_task_runner_type == AsyncTaskRunnerType.THREAD_POOL:
+            ThreadPoolRunner.instance().run_task(coro, priority, key)
+        else:
+            cls.run_task(coro)
+
+    @classmethod
+    def raise_priority(cls, key: Hashable, priority: TaskPriority):
+        """Raises the priority of a loading task started with run_load, if it is still queued."""
+        if cls.config_type().async_task_runner_type == AsyncTaskRunnerType.THREAD_POOL:
+            ThreadPoolRunner.instance().raise_priority(key, priority)
+
     @classmethod
     async def buffer(cls):
         """Pauses and continues running other tasks for a while, if other tasks are still pending.
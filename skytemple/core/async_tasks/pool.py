@@ -0,0 +1,163 @@
+#  Copyright 2020-2024 Capypara and the SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import threading
+from collections.abc import Coroutine, Hashable
+from enum import IntEnum
+from typing import Any, Optional
+
+from skytemple.core.async_tasks import AsyncTaskRunnerProtocol
+
+logger = logging.getLogger(__name__)
+
+
+class TaskPriority(IntEnum):
+    """Priorities of loading tasks. Tasks with lower values run first."""
+
+    # Something the user currently sees is waiting for it.
+    VISIBLE = 0
+    DEFAULT = 1
+    # Not shown right now, eg. off-screen or only used for measuring.
+    BACKGROUND = 2
+
+
+class ThreadPoolRunner(AsyncTaskRunnerProtocol):
+    """
+    Runs tasks on a pool of worker threads, each with its own event loop, by priority.
+    Tasks with the same priority run in the order they were submitted.
+
+    Tasks can be given a key. The priority of a queued task can be raised using the key
+    (eg. if something that was loaded in the background scrolls into view).
+    """
+
+    _instance: Optional["ThreadPoolRunner"] = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls) -> "ThreadPoolRunner":
+        with cls._instance_lock:
+            if cls._instance is None:
+                from skytemple.core.settings import SkyTempleSettingsStore
+
+                cls._instance = ThreadPoolRunner(
+                    SkyTempleSettingsStore().get_async_pool_workers()
+                )
+            return cls._instance
+
+    @classmethod
+    def end(cls):
+        with cls._instance_lock:
+            if cls._instance is not None:
+                cls._instance.stop()
+                cls._instance = None
+
+    def __init__(self, workers: int = 0):
+        """If workers is 0, one worker is started for each CPU core."""
+        if workers < 1:
+            workers = os.cpu_count() or 1
+        self._cond = threading.Condition()
+        # Entries: [priority, sequence number, coroutine or None if superseded, key]
+        self._queue: list[list[Any]] = []
+        self._by_key: dict[Hashable, list[Any]] = {}
+        self._counter = itertools.count()
+        self._stopped = False
+        self._threads = [
+            threading.Thread(
+                target=self._work, name=f"ThreadPoolRunner-{i}", daemon=True
+            )
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def run_task(
+        self,
+        coro: Coroutine,
+        priority: TaskPriority = TaskPriority.DEFAULT,
+        key: Optional[Hashable] = None,
+    ):
+        """Queues an asynchronous task."""
+        with self._cond:
+            entry: list[Any] = [priority, next(self._counter), coro, key]
+            if key is not None:
+                self._by_key[key] = entry
+            heapq.heappush(self._queue, entry)
+            self._cond.notify()
+
+    def raise_priority(self, key: Hashable, priority: TaskPriority):
+        """Raises the priority of the queued task with the given key. Does nothing if it already runs."""
+        with self._cond:
+            entry = self._by_key.get(key)
+            if entry is None or entry[0] <= priority:
+                return
+            # The old entry stays in the heap, but is skipped.
+            new_entry: list[Any] = [priority, entry[1], entry[2], key]
+            entry[2] = None
+            self._by_key[key] = new_entry
+            heapq.heappush(self._queue, new_entry)
+
+    def queued(self) -> int:
+        """Number of tasks waiting for a worker."""
+        with self._cond:
+            return sum(1 for entry in self._queue if entry[2] is not None)
+
+    def stop(self):
+        """Stops the workers after their current task. Queued tasks are dropped."""
+        with self._cond:
+            self._stopped = True
+            for entry in self._queue:
+                if entry[2] is not None:
+                    entry[2].close()
+            self._queue.clear()
+            self._by_key.clear()
+            self._cond.notify_all()
+
+    def _work(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            while True:
+                coro = self._take()
+                if coro is None:
+                    return
+                try:
+                    loop.run_until_complete(coro)
+                except BaseException as ex:
+                    logger.error(
+                        "Uncaught ThreadPoolRunner task exception.", exc_info=ex
+                    )
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+    def _take(self) -> Optional[Coroutine]:
+        with self._cond:
+            while True:
+                if self._stopped:
+                    return None
+                while len(self._queue) > 0:
+                    entry = heapq.heappop(self._queue)
+                    coro, key = entry[2], entry[3]
+                    if coro is not None:
+                        if key is not None and self._by_key.get(key) is entry:
+                            del self._by_key[key]
+                        return coro
+                self._cond.wait()
@@ -21,6 +21,7 @@ from typing import TYPE_CHECKING, Any, cast
 from collections.abc import Iterable
 
 from gi.repository import Gtk
+from skytemple_files.common.i18n_util import _
 
 if TYPE_CHECKING:
     from skytemple.core.abstract_module import AbstractModule
@@ -33,6 +34,107 @@ class RecursionType(Enum):
     DOWN = auto()
 
 
+class SearchMode(Enum):
+    CONTAINS = auto()
+    PREFIX = auto()
+    FUZZY = auto()
+
+
+class ItemTreeSearchIndex:
+    """
+    Lowercase names of all rows of the item tree and their hierarchy, so that the tree can be
+    searched without walking the Gtk.TreeStore. Maintained by ItemTree and ItemTreeEntryRef.
+    Rows are identified by the node of their (persistent) tree iters.
+    """
+
+    def __init__(self):
+        self._names: dict[int, str] = {}
+        self._iters: dict[int, Gtk.TreeIter] = {}
+        self._parents: dict[int, int | None] = {}
+        self._children: dict[int, list[int]] = {}
+
+    @staticmethod
+    def key(treeiter: Gtk.TreeIter) -> int:
+        return treeiter.user_data
+
+    def __len__(self):
+        return len(self._names)
+
+    def add(self, treeiter: Gtk.TreeIter, parent: Gtk.TreeIter | None, name: str):
+        key = self.key(treeiter)
+        parent_key = self.key(parent) if parent is not None else None
+        self._names[key] = name.lower()
+        self._iters[key] = treeiter
+        self._parents[key] = parent_key
+        self._children[key] = []
+        if parent_key is not None and parent_key in self._children:
+            self._children[parent_key].append(key)
+
+    def rename(self, treeiter: Gtk.TreeIter, name: str):
+        key = self.key(treeiter)
+        if key in self._names:
+            self._names[key] = name.lower()
+
+    def remove(self, treeiter: Gtk.TreeIter):
+        """Removes the row and all rows below it."""
+        key = self.key(treeiter)
+        parent_key = self._parents.get(key)
+        if parent_key is not None and parent_key in self._children:
+            self._children[parent_key].remove(key)
+        self._remove_subtree(key)
+
+    def clear(self):
+        self._names.clear()
+        self._iters.clear()
+        self._parents.clear()
+        self._children.clear()
+
+    def iters(self) -> dict[int, Gtk.TreeIter]:
+        """All indexed rows by key."""
+        return self._iters
+
+    def search(
+        self, query: str, mode: SearchMode = SearchMode.CONTAINS
+    ) -> tuple[list[Gtk.TreeIter], set[int]]:
+        """
+        Returns the rows matching the query and the keys of all rows that should be visible when filtering
+        the tree by it: The matches, their ancestors and their descendants.
+        """
+        query = query.lower()
+        matches = [
+            key for key, name in self._names.items() if self._matches(name, query, mode)
+        ]
+        visible: set[int] = set()
+        for key in matches:
+            parent_key: int | None = key
+            while parent_key is not None and parent_key not in visible:
+                visible.add(parent_key)
+                parent_key = self._parents.get(parent_key)
+            stack = list(self._children.get(key, []))
+            while stack:
+                child = stack.pop()
+                if child not in visible:
+                    visible.add(child)
+                    stack.extend(self._children.get(child, []))
+        return [self._iters[key] for key in matches], visible
+
+    @staticmethod
+    def _matches(name: str, query: str, mode: SearchMode) -> bool:
+        if mode == SearchMode.PREFIX:
+            return name.startswith(query) or f" {query}" in name
+        if mode == SearchMode.FUZZY:
+            chars = iter(name)
+            return all(c in chars for c in query)
+        return query in name
+
+    def _remove_subtree(self, key: int):
+        for child in self._children.pop(key, []):
+            self._remove_subtree(child)
+        self._names.pop(key, None)
+        self._iters.pop(key, None)
+        self._parents.pop(key, None)
+
+
 class ItemTreeEntryRef:
     """
     A reference to an entry in the SkyTemple item tree.
@@ -40,12 +142,19 @@ class ItemTreeEntryRef:
 
     _tree: Gtk.TreeStore
     _self: Gtk.TreeIter
+    _index: ItemTreeSearchIndex | None
 
     # DO NOT construct these yourself in module code.
-    def __init__(self, tree: Gtk.TreeStore, node: Gtk.TreeIter):
+    def __init__(
+        self,
+        tree: Gtk.TreeStore,
+        node: Gtk.TreeIter,
+        index: ItemTreeSearchIndex | None = None,
+    ):
         """Create a reference. This must not be used from modules."""
         self._tree = tree
         self._self = node
+        self._index = index
 
     def entry(self) -> ItemTreeEntry:
         row = self._tree[self._self]
@@ -60,12 +169,16 @@ class ItemTreeEntryRef:
         row[3] = new_entry_data.view_class
         row[4] = new_entry_data.item_data
         _recursive_generate_item_store_row_label(row)
+        if self._index is not None:
+            self._index.rename(self._self, new_entry_data.name)
 
     def delete_all_children(self):
         """Delete all child nodes. Warning: This invalidates any `ItemTreeEntryRef` pointing to old children."""
         child = self._tree.iter_children(self._self)
         while child is not None:
             nxt = self._tree.iter_next(child)
+            if self._index is not None:
+                self._index.remove(child)
             self._tree.remove(child)
             child = nxt
 
@@ -73,7 +186,7 @@ class ItemTreeEntryRef:
         children = []
         titer = self._tree.iter_children(self._self)
         while titer is not None:
-            children.append(ItemTreeEntryRef(self._tree, titer))
+            children.append(ItemTreeEntryRef(self._tree, titer, self._index))
             titer = self._tree.iter_next(titer)
         return children
 
@@ -148,6 +261,15 @@ class ItemTreeEntry:
         return self._modified
 
 
+class _LazyModulePlaceholder:
+    """Item data of the placeholder node of a module, that is not loaded yet."""
+
+    __slots__ = ["module_name"]
+
+    def __init__(self, module_name: str):
+        self.module_name = module_name
+
+
 # noinspection PyProtectedMember
 class ItemTree:
     """
@@ -157,6 +279,10 @@ class ItemTree:
     _tree: Gtk.TreeStore
     _root_node: Gtk.TreeIter | None
     _finalized: bool
+    _lazy_placeholders: dict[str, Gtk.TreeIter]
+    _insert_before: Gtk.TreeIter | None
+    _first_inserted: Gtk.TreeIter | None
+    _search_index: ItemTreeSearchIndex
 
     # DO NOT construct these yourself in module code.
     def __init__(self, tree: Gtk.TreeStore):
@@ -164,6 +290,15 @@ class ItemTree:
         self._tree = tree
         self._root_node = None
         self._finalized = False
+        self._lazy_placeholders = {}
+        self._insert_before = None
+        self._first_inserted = None
+        self._search_index = ItemTreeSearchIndex()
+
+    @property
+    def search_index(self) -> ItemTreeSearchIndex:
+        """Index for searching the tree. Do not use this from modules!"""
+        return self._search_index
 
     def set_root(self, root: ItemTreeEntry) -> ItemTreeEntryRef:
         """This must only be called from the ROM module."""
@@ -181,7 +316,10 @@ class ItemTree:
             ],
         )
         self._root_node = new_iter
-        return ItemTreeEntryRef(self._tree, new_iter)
+        self._lazy_placeholders = {}
+        self._search_index.clear()
+        self._search_index.add(new_iter, None, root.name)
+        return ItemTreeEntryRef(self._tree, new_iter, self._search_index)
 
     def add_entry(
         self, root: ItemTreeEntryRef | None, entry: ItemTreeEntry
@@ -191,25 +329,30 @@ class ItemTree:
         if root is not None:
             root_iter = root._self
         assert root_iter is not None
-        new_iter = self._tree.append(
-            root_iter,
-            [
-                entry.icon,
-                entry.name,
-                entry.module,
-                entry.view_class,
-                entry.item_data,
-                False,
-                "",
-                True,
-            ],
-        )
+        row = [
+            entry.icon,
+            entry.name,
+            entry.module,
+            entry.view_class,
+            entry.item_data,
+            False,
+            "",
+            True,
+        ]
+        if root is None and self._insert_before is not None:
+            # A lazily loaded module is replacing its placeholder.
+            new_iter = self._tree.insert_before(root_iter, self._insert_before, row)
+            if self._first_inserted is None:
+                self._first_inserted = new_iter
+        else:
+            new_iter = self._tree.append(root_iter, row)
+        self._search_index.add(new_iter, root_iter, entry.name)
 
         if self._finalized:
             # If we already finalized we need to generate the label now.
             _recursive_generate_item_store_row_label(self._tree[new_iter])
 
-        return ItemTreeEntryRef(self._tree, new_iter)
+        return ItemTreeEntryRef(self._tree, new_iter, self._search_index)
 
     def mark_as_modified(
         self,
@@ -230,6 +373,79 @@ class ItemTree:
         if first_iter:
             _recursive_down_item_store_mark_as_modified(self._tree[first_iter], False)
 
+    def add_lazy_placeholder(
+        self, module_name: str, icon: str, label: str
+    ) -> ItemTreeEntryRef:
+        """
+        Add a placeholder node for a module that is not loaded yet. Do not call this from modules!
+        The placeholder has a dummy child, so that it can be expanded.
+        """
+        assert self._root_node is not None
+        new_iter = self._tree.append(
+            self._root_node,
+            [
+                icon,
+                label,
+                None,
+                None,
+                _LazyModulePlaceholder(module_name),
+                False,
+                "",
+                True,
+            ],
+        )
+        self._tree.append(
+            new_iter, ["", _("Loading..."), None, None, None, False, "", True]
+        )
+        self._search_index.add(new_iter, self._root_node, label)
+        self._lazy_placeholders[module_name] = new_iter
+        if self._finalized:
+            _recursive_generate_item_store_row_label(self._tree[new_iter])
+        return ItemTreeEntryRef(self._tree, new_iter, self._search_index)
+
+    def get_lazy_placeholder_module(self, treeiter: Gtk.TreeIter) -> str | None:
+        """
+        If the node is (or is the dummy child of) the placeholder of a module that is not loaded yet,
+        return the name of that module. Do not call this from modules!
+        """
+        item_data = self._tree[treeiter][4]
+        if item_data is None and self._tree[treeiter][2] is None:
+            parent = self._tree.iter_parent(treeiter)
+            if parent is not None:
+                item_data = self._tree[parent][4]
+        if isinstance(item_data, _LazyModulePlaceholder):
+            return item_data.module_name
+        return None
+
+    def lazy_placeholder_modules(self) -> list[str]:
+        """Names of all modules that still have placeholders. Do not call this from modules!"""
+        return list(self._lazy_placeholders.keys())
+
+    def replace_lazy_placeholder(
+        self, module_name: str, module: AbstractModule
+    ) -> ItemTreeEntryRef | None:
+        """
+        Replace the placeholder of a module with the module's real nodes, by letting the module
+        load its tree items at the position of the placeholder. Do not call this from modules!
+        Returns the first node the module added, if any.
+        """
+        placeholder = self._lazy_placeholders.pop(module_name, None)
+        if placeholder is None:
+            return None
+        self._insert_before = placeholder
+        self._first_inserted = None
+        try:
+            module.load_tree_items(self)
+        finally:
+            self._insert_before = None
+            self._search_index.remove(placeholder)
+            self._tree.remove(placeholder)
+        first_inserted = self._first_inserted
+        self._first_inserted = None
+        if first_inserted is None:
+            return None
+        return ItemTreeEntryRef(self._tree, first_inserted, self._search_index)
+
     def finalize(self):
         """Finalize the tree. Do not call this from modules!"""
         first_iter = self._tree.get_iter_first()
@@ -16,16 +16,26 @@
 #  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
 import typing
 from functools import partial
-from itertools import zip_longest
 from typing import Any
 
 import cairo
 from gi.repository import GdkPixbuf, GLib
+from PIL import Image
 
+from skytemple.core.lru_cache import SizeBoundedLruCache
 from skytemple.core.ui_utils import get_list_store_iter_by_idx
 
 ORANGE = "orange"
 ORANGE_RGB = (1, 0.65, 0)
+# Memory budget for the pixbufs shared between all list icon renderers.
+PIXBUF_CACHE_SIZE = 16 * 1024 * 1024
+
+# Converted pixbufs, shared between all list views. Keyed by the identity of the sprite surface
+# (and whether it was rendered as a placeholder), the surface is stored alongside the pixbuf,
+# so the identity stays valid for as long as the entry exists.
+_pixbuf_cache: SizeBoundedLruCache[
+    tuple[int, bool], tuple[cairo.ImageSurface, GdkPixbuf.Pixbuf]
+] = SizeBoundedLruCache(PIXBUF_CACHE_SIZE, lambda entry: entry[1].get_byte_length())
 
 
 class ListIconRenderer:
@@ -82,27 +92,8 @@ class ListIconRenderer:
             ),
         )
 
-        if is_placeholder:
-            ctx = cairo.Context(sprite)
-            ctx.set_source_rgb(*ORANGE_RGB)
-            ctx.rectangle(0, 0, w, h)
-            ctx.set_operator(cairo.OPERATOR_IN)
-            ctx.fill()
-
-        data = bytes(sprite.get_data())
-        # this is painful.
-        new_data = bytearray()
-        for b, g, r, a in grouper(data, 4):
-            new_data += bytes([r, g, b, a])
-        self._icon_pixbufs[target_name] = GdkPixbuf.Pixbuf.new_from_data(
-            new_data,  # type: ignore
-            GdkPixbuf.Colorspace.RGB,
-            True,
-            8,
-            w,
-            h,
-            sprite.get_stride(),
-            destroy_fn=None,  # todo: memory leak? Probably not?
+        self._icon_pixbufs[target_name] = get_sprite_pixbuf(
+            sprite, w, h, is_placeholder
         )
         return self._icon_pixbufs[target_name]
 
@@ -110,7 +101,10 @@ class ListIconRenderer:
         if store is None:
             return
         if not self._loading and not was_loading:
-            row = store[get_list_store_iter_by_idx(store, idx)]
+            treeiter = get_list_store_iter_by_idx(store, idx)
+            if treeiter is None:
+                return
+            row = store[treeiter]
             row[self.column_id] = self._get_icon(
                 store,
                 load_fn,
@@ -127,15 +121,50 @@ class ListIconRenderer:
     def _reload_icons_in_tree(self):
         try:
             for model, idx, params in self._registered_for_reload:
-                model[get_list_store_iter_by_idx(model, idx)][self.column_id] = (
-                    self._get_icon(*params)
-                )
+                treeiter = get_list_store_iter_by_idx(model, idx)
+                if treeiter is not None:
+                    model[treeiter][self.column_id] = self._get_icon(*params)
             self._loading = False
             self._refresh_timer = None
         except (AttributeError, TypeError):
             pass  # This happens when the view was unloaded in the meantime.
 
 
-def grouper(iterable, n, fillvalue=None):
-    args = [iter(iterable)] * n
-    return ((bytes(bytearray(x))) for x in zip_longest(fillvalue=fillvalue, *args))
+def get_sprite_pixbuf(
+    sprite: cairo.ImageSurface, w: int, h: int, is_placeholder=False
+) -> GdkPixbuf.Pixbuf:
+    """
+    Returns a pixbuf for the sprite surface, tinted orange if it is a placeholder.
+    Pixbufs are cached for as long as the same surface is used.
+    """
+    cache_key = (id(sprite), bool(is_placeholder))
+    cached = _pixbuf_cache.get(cache_key)
+    if cached is not None and cached[0] is sprite:
+        return cached[1]
+
+    if is_placeholder:
+        ctx = cairo.Context(sprite)
+        ctx.set_source_rgb(*ORANGE_RGB)
+        ctx.rectangle(0, 0, w, h)
+        ctx.set_operator(cairo.OPERATOR_IN)
+        ctx.fill()
+
+    pixbuf = surface_to_pixbuf(sprite)
+    _pixbuf_cache.put(cache_key, (sprite, pixbuf))
+    return pixbuf
+
+
+def surface_to_pixbuf(surface: cairo.ImageSurface) -> GdkPixbuf.Pixbuf:
+    """
+    Converts an ARGB32 cairo surface into a RGBA pixbuf. The channels are swapped
+    by Pillow in one pass instead of pixel by pixel.
+    """
+    surface.flush()
+    w = surface.get_width()
+    h = surface.get_height()
+    rgba = Image.frombuffer(
+        "RGBA", (w, h), surface.get_data(), "raw", "BGRA", surface.get_stride(), 1
+    ).tobytes()
+    return GdkPixbuf.Pixbuf.new_from_bytes(
+        GLib.Bytes.new(rgba), GdkPixbuf.Colorspace.RGB, True, 8, w, h, w * 4
+    )
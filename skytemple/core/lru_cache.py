@@ -0,0 +1,145 @@
+#  Copyright 2020-2024 Capypara and the SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Generic, TypeVar, Optional
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class SizeBoundedLruCache(Generic[K, V]):
+    """
+    A thread-safe least-recently-used cache, that is bounded by the total size of its values
+    (as reported by the `sizeof` function, usually in bytes).
+    If the cache grows over its budget, the least recently used entries are evicted.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        sizeof: Callable[[V], int],
+        on_evict: Optional[Callable[[K, V], None]] = None,
+    ):
+        """
+        :param on_evict: Optional callback that is called for every entry removed because the
+                         cache went over budget. It is not called for discarded or cleared entries.
+        """
+        self._max_size = max_size
+        self._sizeof = sizeof
+        self._on_evict = on_evict
+        self._entries: OrderedDict[K, tuple[V, int]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    @max_size.setter
+    def max_size(self, value: int):
+        with self._lock:
+            self._max_size = value
+            self._evict()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: K) -> Optional[V]:
+        """Returns the value for the key (marking it as recently used) or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: K, value: V):
+        with self._lock:
+            self._discard(key)
+            size = self._sizeof(value)
+            self._entries[key] = (value, size)
+            self._size += size
+            self._evict()
+
+    def discard(self, key: K):
+        with self._lock:
+            self._discard(key)
+
+    def pop(self, key: K) -> Optional[V]:
+        """Removes the entry for the key and returns its value, or None if there is none."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._discard(key)
+            return entry[0]
+
+    def items(self) -> list[tuple[K, V]]:
+        """Returns all entries, from least to most recently used."""
+        with self._lock:
+            return [(k, v) for k, (v, _) in self._entries.items()]
+
+    def discard_where(self, predicate: Callable[[K], bool]):
+        """Removes all entries whose keys match the predicate."""
+        with self._lock:
+            for key in [k for k in self._entries.keys() if predicate(k)]:
+                self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> dict[str, int]:
+        """Returns the counters and current size of the cache."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "size": self._size,
+                "max_size": self._max_size,
+            }
+
+    def _discard(self, key: K):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry[1]
+
+    def _evict(self):
+        # Always keep the most recently added entry, even if it alone exceeds the budget.
+        while self._size > self._max_size and len(self._entries) > 1:
+            key, (value, size) = self._entries.popitem(last=False)
+            self._size -= size
+            self.evictions += 1
+            if self._on_evict is not None:
+                self._on_evict(key, value)
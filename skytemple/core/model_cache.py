@@ -0,0 +1,170 @@
+#  Copyright 2020-2024 Capypara and the SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+"""Persistent on-disk cache of deserialized ROM file models."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import threading
+from typing import Any, Optional
+
+from skytemple.core.profiling import record_span
+
+logger = logging.getLogger(__name__)
+MODEL_CACHE_DIR = "model_cache"
+CACHE_FILE_EXT = ".pickle"
+# Bump this, if the format of cache entries changes.
+CACHE_FORMAT_VERSION = 1
+
+
+class ModelCache:
+    """
+    Caches deserialized models on disk, keyed by the file handler, its keyword arguments
+    and a hash of the raw bytes the model was deserialized from.
+    If the bytes in the ROM change, the key changes, so stale entries are never returned, and
+    one cache can be used for all ROMs. Entries are unpickled, so the directory must only be
+    writable by the user (it is in the user's configuration directory).
+    The cache is bounded by size. If it grows too big, the least recently used entries are evicted.
+    """
+
+    def __init__(self, directory: str, max_size: int, version_tag: str = ""):
+        self.directory = directory
+        self.max_size = max_size
+        self.version_tag = version_tag
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # file name -> size. Loaded from the directory on first use.
+        self._entries: Optional[dict[str, int]] = None
+        # Handlers whose models could not be pickled.
+        self._unpicklable: set[str] = set()
+
+    def make_key(self, handler: type, kwargs_token: str, data: bytes) -> Optional[str]:
+        """Returns the key for a model, or None if models of this handler can not be cached."""
+        handler_name = f"{handler.__module__}.{handler.__qualname__}"
+        if handler_name in self._unpicklable:
+            return None
+        h = hashlib.sha256()
+        h.update(
+            f"{CACHE_FORMAT_VERSION}|{self.version_tag}|{handler_name}|{kwargs_token}|".encode()
+        )
+        h.update(data)
+        return h.hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Returns the cached model for the key or None."""
+        path = self._path(key)
+        with record_span("model-cache", "get") as span:
+            try:
+                with open(path, "rb") as f:
+                    model = pickle.load(f)
+            except FileNotFoundError:
+                self.misses += 1
+                span.set_tag("hit", False)
+                return None
+            except Exception as ex:
+                logger.warning(
+                    f"Invalid model cache entry {key}, removing.", exc_info=ex
+                )
+                self._remove(key + CACHE_FILE_EXT)
+                self.misses += 1
+                span.set_tag("hit", False)
+                return None
+            self.hits += 1
+            span.set_tag("hit", True)
+        try:
+            # Mark as recently used.
+            os.utime(path)
+        except OSError:
+            pass
+        return model
+
+    def put(self, key: str, handler: type, model: Any):
+        """Stores the model. This must be done before the model is modified."""
+        with record_span("model-cache", "put"):
+            try:
+                data = pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception as ex:
+                handler_name = f"{handler.__module__}.{handler.__qualname__}"
+                logger.debug(f"Models of {handler_name} can not be cached: {ex}")
+                self._unpicklable.add(handler_name)
+                return
+            if len(data) > self.max_size:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, self._path(key))
+            except OSError as ex:
+                logger.warning("Failed writing model cache entry.", exc_info=ex)
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                return
+            with self._lock:
+                entries = self._load_entries()
+                entries[key + CACHE_FILE_EXT] = len(data)
+                self._evict(entries)
+
+    def clear(self):
+        """Removes all entries."""
+        with self._lock:
+            for name in list(self._load_entries().keys()):
+                self._remove(name)
+
+    def _evict(self, entries: dict[str, int]):
+        total = sum(entries.values())
+        if total <= self.max_size:
+            return
+
+        def last_used(name: str) -> float:
+            try:
+                return os.path.getmtime(os.path.join(self.directory, name))
+            except OSError:
+                return 0
+
+        for name in sorted(entries.keys(), key=last_used):
+            if total <= self.max_size:
+                break
+            total -= entries[name]
+            self._remove(name)
+            logger.debug(f"Evicted model cache entry {name}.")
+
+    def _remove(self, name: str):
+        if self._entries is not None and name in self._entries:
+            del self._entries[name]
+        try:
+            os.unlink(os.path.join(self.directory, name))
+        except OSError:
+            pass
+
+    def _load_entries(self) -> dict[str, int]:
+        if self._entries is None:
+            self._entries = {}
+            if os.path.exists(self.directory):
+                for entry in os.scandir(self.directory):
+                    if entry.is_file() and entry.name.endswith(CACHE_FILE_EXT):
+                        self._entries[entry.name] = entry.stat().st_size
+        return self._entries
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + CACHE_FILE_EXT)
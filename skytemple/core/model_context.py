@@ -15,25 +15,162 @@
 #  You should have received a copy of the GNU General Public License
 #  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
 import threading
-from contextlib import AbstractContextManager
-from typing import TypeVar, Generic
+import time
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, contextmanager
+from typing import Generic, Optional, TypeVar, Union
 
 T = TypeVar("T")
 
 
+class ReadWriteLock:
+    """
+    A lock that can be held by any number of readers or by a single writer.
+
+    Writers are preferred: While a writer is waiting, no new readers are let in, unless they already hold the
+    lock. Both read and write access are reentrant and the writer can also acquire read access.
+    Read access can not be upgraded to write access, trying to do so raises a RuntimeError.
+
+    The lock is owned by the thread acquiring it (like an RLock), so all code running on that thread,
+    including other asyncio tasks of an event loop running on it, counts as owner.
+
+    Contention metrics are collected and returned by `stats`.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        # Thread ident -> number of read acquisitions
+        self._readers: dict[int, int] = {}
+        self._writer: Optional[int] = None
+        self._writer_count = 0
+        self._writers_waiting = 0
+        self._read_acquisitions = 0
+        self._write_acquisitions = 0
+        self._contended = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+
+    def acquire_read(self):
+        self._acquire(False)
+
+    def acquire_write(self):
+        self._acquire(True)
+
+    def release_read(self):
+        owner = threading.get_ident()
+        with self._cond:
+            if owner not in self._readers:
+                raise RuntimeError("Read lock released, but it is not held.")
+            self._readers[owner] -= 1
+            if self._readers[owner] == 0:
+                del self._readers[owner]
+                self._cond.notify_all()
+
+    def release_write(self):
+        with self._cond:
+            if threading.get_ident() != self._writer:
+                raise RuntimeError("Write lock released, but it is not held.")
+            self._writer_count -= 1
+            if self._writer_count == 0:
+                self._writer = None
+                self._cond.notify_all()
+
+    def stats(self) -> dict[str, Union[int, float]]:
+        """Returns the number of acquisitions, how many of them had to wait and how long they waited."""
+        with self._cond:
+            return {
+                "read_acquisitions": self._read_acquisitions,
+                "write_acquisitions": self._write_acquisitions,
+                "contended": self._contended,
+                "wait_time_total_ms": self._wait_time_total * 1000,
+                "wait_time_max_ms": self._wait_time_max * 1000,
+            }
+
+    def _acquire(self, write: bool):
+        owner = threading.get_ident()
+        with self._cond:
+            if self._try_acquire(write, owner):
+                self._record(write, None)
+                return
+            start = time.perf_counter()
+            if write:
+                self._writers_waiting += 1
+            try:
+                while not self._try_acquire(write, owner):
+                    self._cond.wait()
+            finally:
+                if write:
+                    self._writers_waiting -= 1
+                    # Readers may have been waiting for us.
+                    self._cond.notify_all()
+            self._record(write, time.perf_counter() - start)
+
+    def _try_acquire(self, write: bool, owner: int) -> bool:
+        if write:
+            if self._writer == owner:
+                self._writer_count += 1
+                return True
+            if owner in self._readers:
+                raise RuntimeError("Read access can not be upgraded to write access.")
+            if self._writer is None and len(self._readers) == 0:
+                self._writer = owner
+                self._writer_count = 1
+                return True
+            return False
+        if self._writer == owner or owner in self._readers:
+            self._readers[owner] = self._readers.get(owner, 0) + 1
+            return True
+        if self._writer is None and self._writers_waiting == 0:
+            self._readers[owner] = 1
+            return True
+        return False
+
+    def _record(self, write: bool, wait_time: Optional[float]):
+        if write:
+            self._write_acquisitions += 1
+        else:
+            self._read_acquisitions += 1
+        if wait_time is not None:
+            self._contended += 1
+            self._wait_time_total += wait_time
+            self._wait_time_max = max(self._wait_time_max, wait_time)
+
+
 class ModelContext(Generic[T], AbstractContextManager):
     """
     ContextManager that wraps a model for thread-safe data access.
     References to the model are invalid outside of the context provided.
+
+    `with ctx as model` gives exclusive access, for changing the model. Code that only reads the model
+    should use `with ctx.read() as model` instead, which can be held by multiple threads at once.
     """
 
     def __init__(self, model: T):
         self._model = model
-        self._lock = threading.RLock()
+        self._lock = ReadWriteLock()
 
     def __enter__(self) -> T:
-        self._lock.acquire()
+        self._lock.acquire_write()
         return self._model
 
     def __exit__(self, exc_type, value, traceback):
-        self._lock.release()
+        self._lock.release_write()
+
+    @contextmanager
+    def read(self) -> Iterator[T]:
+        """Shared access to the model. It must not be changed."""
+        self._lock.acquire_read()
+        try:
+            yield self._model
+        finally:
+            self._lock.release_read()
+
+    @contextmanager
+    def write(self) -> Iterator[T]:
+        """Exclusive access to the model. Same as using the context itself."""
+        with self as model:
+            yield model
+
+    def stats(self) -> dict[str, Union[int, float]]:
+        """Contention metrics of the lock guarding the model."""
+        return self._lock.stats()
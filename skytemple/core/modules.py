@@ -21,7 +21,7 @@ from __future__ import annotations
 import os
 import sys
 import logging
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Callable, Optional
 from collections.abc import Sequence
 
 
@@ -49,7 +49,19 @@ class Modules:
     _modules: dict = {}
 
     @classmethod
-    def load(cls, settings: SkyTempleSettingsStore):
+    def load(
+        cls,
+        settings: SkyTempleSettingsStore,
+        confirm_plugin_load: Optional[
+            Callable[[Sequence[str], SkyTempleSettingsStore, str], bool]
+        ] = None,
+    ):
+        """
+        Loads the plugins and all modules. `confirm_plugin_load` is asked before plugins are loaded,
+        by default the user is asked with a dialog (see `Modules.confirm_plugin_load`).
+        """
+        if confirm_plugin_load is None:
+            confirm_plugin_load = cls.confirm_plugin_load
         with record_span("sys", "mod-load"):
             with record_span("sys", "mod-load/load-plugins"):
                 # Load plugins
@@ -57,7 +69,7 @@ class Modules:
                     ProjectFileManager.shared_config_dir(), "plugins"
                 )
                 os.makedirs(plugin_dir, exist_ok=True)
-                load_plugins(cls.confirm_plugin_load, settings, plugin_dir)
+                load_plugins(confirm_plugin_load, settings, plugin_dir)
 
             with record_span("sys", "mod-load/construct-modules"):
                 # Look up package entrypoints for modules
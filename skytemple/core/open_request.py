@@ -38,6 +38,9 @@ REQUEST_TYPE_DUNGEON_FIXED_FLOOR_ENTITY = (
     "dungeon_fixed_floor_entity"  # identifier is the entity id to highlight
 )
 REQUEST_TYPE_DUNGEON_MUSIC = "dungeon_music"  # no identifier
+REQUEST_TYPE_STRING = (
+    "string"  # identifier is (language file name, string index) to highlight
+)
 
 
 class OpenRequest:
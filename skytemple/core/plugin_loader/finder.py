@@ -14,17 +14,20 @@
 #
 #  You should have received a copy of the GNU General Public License
 #  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
-import atexit
-import contextlib
+import hashlib
+import logging
 import os
+import shutil
 import sys
+import threading
+import time
 from importlib.machinery import ModuleSpec
 from importlib.util import spec_from_loader
 from pathlib import Path
-from tempfile import TemporaryDirectory
 from types import ModuleType
 from typing import Optional, Union
 from collections.abc import Sequence, Iterable
+from skytemple_files.common.project_file_manager import ProjectFileManager
 from wheel.wheelfile import WheelFile
 
 from skytemple.core.plugin_loader.loader import SkyTemplePluginLoader
@@ -35,6 +38,17 @@ if sys.version_info >= (3, 10):
 else:
     import importlib_metadata
 
+logger = logging.getLogger(__name__)
+HASH_CHUNK_SIZE = 1024 * 1024
+# Extracted wheels that were not used for this long are removed. Other running SkyTemple instances may
+# still import from extractions that this instance does not use, so they are not removed right away.
+CACHE_MAX_AGE_S = 30 * 24 * 60 * 60
+
+
+def default_cache_dir() -> str:
+    """The directory the plugin wheels are extracted to, in the shared configuration directory."""
+    return os.path.join(ProjectFileManager.shared_config_dir(), "plugin_cache")
+
 
 class SkyTemplePluginFinder(importlib_metadata.DistributionFinder):
     settings: SkyTempleSettingsStore
@@ -42,10 +56,19 @@ class SkyTemplePluginFinder(importlib_metadata.DistributionFinder):
     plugin_names: list[str]
     packages: dict[str, str]
 
-    def __init__(self, settings: SkyTempleSettingsStore, plugin_dir: str):
+    def __init__(
+        self,
+        settings: SkyTempleSettingsStore,
+        plugin_dir: str,
+        cache_dir: Optional[str] = None,
+    ):
         self.settings = settings
         self.plugin_dir = plugin_dir
+        self.cache_dir = cache_dir if cache_dir is not None else default_cache_dir()
         self.packages = {}
+        # The wheels are extracted on the first call to find_distributions, the result is reused after that.
+        self._dists: Optional[list[importlib_metadata.Distribution]] = None
+        self._dists_lock = threading.Lock()
 
         # We cache the plugin list, so nobody can inject plugins after they are confirmed.
         self.plugin_names = []
@@ -89,16 +112,21 @@ class SkyTemplePluginFinder(importlib_metadata.DistributionFinder):
         Return an iterable of all Distribution instances capable of
         loading the metadata for packages for the indicated `context`.
         """
-        dists = []
+        with self._dists_lock:
+            if self._dists is None:
+                self._dists = self._load_distributions()
+            return self._dists
+
+    def _load_distributions(self) -> list[importlib_metadata.Distribution]:
+        dists: list[importlib_metadata.Distribution] = []
+        used_entries = set()
         for p_name in self.plugin_names:
             p_path = os.path.join(self.plugin_dir, p_name)
             whl = WheelFile(p_path)
-            whl_ctx = contextlib.ExitStack()
-            atexit.register(whl_ctx.close)
-            temp_dir = whl_ctx.enter_context(TemporaryDirectory())
-            whl.extractall(temp_dir)
+            extract_dir = self._extract_cached(whl, p_path)
+            used_entries.add(os.path.basename(extract_dir))
             dist = importlib_metadata.PathDistribution(
-                Path(temp_dir).joinpath(whl.dist_info_path)
+                Path(extract_dir).joinpath(whl.dist_info_path)
             )
             dists.append(dist)
             # TODO: Is this OK to do like this?
@@ -109,6 +137,59 @@ class SkyTemplePluginFinder(importlib_metadata.DistributionFinder):
                     if not x.parts[0].endswith(".dist-info")
                 }
                 for package in packages_in_dist:
-                    self.packages[package] = os.path.join(temp_dir, package)
+                    self.packages[package] = os.path.join(extract_dir, package)
 
+        self._prune_cache(used_entries)
         return dists
+
+    def _extract_cached(self, whl: WheelFile, path: str) -> str:
+        """
+        Returns the directory the wheel is extracted to. The directory is named after the hash of
+        the wheel's content, so a changed wheel is extracted again.
+        """
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            while chunk := f.read(HASH_CHUNK_SIZE):
+                digest.update(chunk)
+        extract_dir = os.path.join(self.cache_dir, digest.hexdigest()[:32])
+        if os.path.isdir(os.path.join(extract_dir, whl.dist_info_path)):
+            try:
+                # Mark as recently used, see _prune_cache.
+                os.utime(extract_dir)
+            except OSError:
+                pass
+            return extract_dir
+
+        logger.debug(f"Extracting plugin {path} to {extract_dir}.")
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Extracted next to the target first, so an interrupted extraction is never used.
+        # Another SkyTemple instance may do the same at the same time, in which case its result is used.
+        tmp_dir = f"{extract_dir}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            whl.extractall(tmp_dir)
+            os.rename(tmp_dir, extract_dir)
+        except OSError:
+            if not os.path.isdir(os.path.join(extract_dir, whl.dist_info_path)):
+                raise
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        return extract_dir
+
+    def _prune_cache(self, used_entries: set[str]):
+        """
+        Removes the extracted versions of wheels that were removed or changed and were not used
+        for CACHE_MAX_AGE_S (by this or any other instance), as well as leftovers of interrupted
+        extractions of that age.
+        """
+        max_mtime = time.time() - CACHE_MAX_AGE_S
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if (
+                        entry.name not in used_entries
+                        and entry.is_dir()
+                        and entry.stat().st_mtime < max_mtime
+                    ):
+                        shutil.rmtree(entry.path, ignore_errors=True)
+        except OSError as ex:
+            logger.warning("Failed cleaning up the plugin cache.", exc_info=ex)
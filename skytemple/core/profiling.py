@@ -1,5 +1,7 @@
 """
 Module that contains profiling contexts. They are based on Sentry's transactions and spans.
+They can also be recorded locally (see local_profiling_enabled) and exported with export_chrome_trace
+and export_speedscope.
 """
 
 #  Copyright 2020-2024 Capypara and the SkyTemple Contributors
@@ -20,14 +22,23 @@ Module that contains profiling contexts. They are based on Sentry's transactions
 #  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
 from __future__ import annotations
 
+import json
 import logging
+import os
+import threading
+import time
 from abc import ABC, abstractmethod
+from collections import deque
 from contextlib import AbstractContextManager
 from types import TracebackType
-from typing import Protocol, ClassVar, TYPE_CHECKING, Any
+from typing import Protocol, ClassVar, TYPE_CHECKING, Any, NamedTuple
 from collections.abc import Iterable
 
 logger = logging.getLogger(__name__)
+# If set to 1, transactions and spans are recorded locally, regardless of the setting.
+ENV_SKYTEMPLE_PROFILE = "SKYTEMPLE_PROFILE"
+# Maximum number of locally recorded transactions and spans. The oldest are dropped.
+TRACE_BUFFER_SIZE = 100_000
 
 
 class TaggableContext(AbstractContextManager, Protocol):
@@ -50,6 +61,127 @@ def reset_impls_cache():
     _Ctx.impls = None
 
 
+class TraceEvent(NamedTuple):
+    """A locally recorded transaction or span. Timestamps are from time.perf_counter_ns."""
+
+    name: str
+    op: str | None
+    start_ns: int
+    end_ns: int
+    thread_id: int
+    thread_name: str
+    tags: dict[str, str]
+
+
+_trace_buffer: deque[TraceEvent] = deque(maxlen=TRACE_BUFFER_SIZE)
+
+
+def local_profiling_enabled() -> bool:
+    """Whether transactions and spans are recorded locally (by environment variable or setting)."""
+    if os.environ.get(ENV_SKYTEMPLE_PROFILE, "0") not in ("", "0"):
+        return True
+    from skytemple.core.settings import SkyTempleSettingsStore
+
+    return SkyTempleSettingsStore().get_local_profiling_enabled()
+
+
+def get_trace_events() -> list[TraceEvent]:
+    """Returns the locally recorded transactions and spans, oldest first."""
+    return list(_trace_buffer)
+
+
+def clear_trace():
+    _trace_buffer.clear()
+
+
+def export_chrome_trace(path: str):
+    """
+    Writes the locally recorded transactions and spans in the Chrome trace event format,
+    which can be opened with chrome://tracing or https://ui.perfetto.dev.
+    """
+    events = get_trace_events()
+    pid = os.getpid()
+    trace_events: list[dict[str, Any]] = [
+        {
+            "name": "thread_name",
+            "ph": "M",
+            "pid": pid,
+            "tid": tid,
+            "args": {"name": thread_name},
+        }
+        for tid, thread_name in {e.thread_id: e.thread_name for e in events}.items()
+    ]
+    for e in events:
+        trace_events.append(
+            {
+                "name": e.name,
+                "cat": e.op if e.op is not None else "transaction",
+                "ph": "X",
+                "ts": e.start_ns / 1000,
+                "dur": (e.end_ns - e.start_ns) / 1000,
+                "pid": pid,
+                "tid": e.thread_id,
+                "args": e.tags,
+            }
+        )
+    with open(path, "w") as f:
+        json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, f)
+
+
+def export_speedscope(path: str):
+    """
+    Writes the locally recorded transactions and spans as a speedscope file (https://www.speedscope.app),
+    with one profile per thread.
+    """
+    frames: list[dict[str, str]] = []
+    frame_ids: dict[str, int] = {}
+    by_thread: dict[int, list[TraceEvent]] = {}
+    for e in get_trace_events():
+        by_thread.setdefault(e.thread_id, []).append(e)
+    profiles = []
+    for thread_events in by_thread.values():
+        thread_events.sort(key=lambda e: (e.start_ns, -e.end_ns))
+        out: list[dict[str, Any]] = []
+        # Open events as (frame, end). Events must be nested in speedscope, events that end after
+        # the event they started in (eg. in coroutines) are cut off.
+        stack: list[tuple[int, int]] = []
+        for e in thread_events:
+            while len(stack) > 0 and stack[-1][1] <= e.start_ns:
+                frame, end = stack.pop()
+                out.append({"type": "C", "frame": frame, "at": end / 1000})
+            name = e.name if e.op is None else f"{e.op}: {e.name}"
+            if name not in frame_ids:
+                frame_ids[name] = len(frames)
+                frames.append({"name": name})
+            end = e.end_ns if len(stack) == 0 else min(e.end_ns, stack[-1][1])
+            out.append({"type": "O", "frame": frame_ids[name], "at": e.start_ns / 1000})
+            stack.append((frame_ids[name], end))
+        while len(stack) > 0:
+            frame, end = stack.pop()
+            out.append({"type": "C", "frame": frame, "at": end / 1000})
+        profiles.append(
+            {
+                "type": "evented",
+                "name": thread_events[0].thread_name,
+                "unit": "microseconds",
+                "startValue": thread_events[0].start_ns / 1000,
+                "endValue": max(e.end_ns for e in thread_events) / 1000,
+                "events": out,
+            }
+        )
+    with open(path, "w") as f:
+        json.dump(
+            {
+                "$schema": "https://www.speedscope.app/file-format-schema.json",
+                "name": "SkyTemple",
+                "exporter": "SkyTemple",
+                "shared": {"frames": frames},
+                "profiles": profiles,
+            },
+            f,
+        )
+
+
 class _ProfilingImplementation(ABC):
     @classmethod
     @abstractmethod
@@ -108,6 +240,60 @@ class _LogImpl(_ProfilingImplementation):
         return x
 
 
+class _LocalImpl(_ProfilingImplementation):
+    class LocalCtx(TaggableContext):
+        def __init__(self, name: str, op: str | None, tags: dict[str, Any] | None):
+            self.name = name
+            self.op = op
+            self.tags: dict[str, str] = {}
+            if tags is not None:
+                for k, v in tags.items():
+                    self.set_tag(k, v)
+            self.start_ns = 0
+
+        def set_tag(self, key: str, value: Any):
+            try:
+                self.tags[key] = str(value)
+            except Exception:
+                self.tags[key] = "<failed __str__>"
+
+        def __enter__(self):
+            self.start_ns = time.perf_counter_ns()
+
+        def __exit__(self, __exc_type, __exc_value, __traceback):
+            end_ns = time.perf_counter_ns()
+            if __exc_type is not None:
+                self.set_tag("error", __exc_type.__name__)
+            thread = threading.current_thread()
+            _trace_buffer.append(
+                TraceEvent(
+                    self.name,
+                    self.op,
+                    self.start_ns,
+                    end_ns,
+                    thread.ident or 0,
+                    thread.name,
+                    self.tags,
+                )
+            )
+
+    @classmethod
+    def new(cls) -> _LocalImpl | None:
+        if local_profiling_enabled():
+            return cls()
+        return None
+
+    def make_transaction(
+        self, name: str, tags: dict[str, Any] | None
+    ) -> TaggableContext | None:
+        return self.__class__.LocalCtx(name, None, tags)
+
+    def make_span(
+        self, op: str, description: str, tags: dict[str, Any] | None
+    ) -> TaggableContext | None:
+        return self.__class__.LocalCtx(description, op, tags)
+
+
 class _SentryImpl(_ProfilingImplementation):
     import sentry_sdk
     from skytemple.core import sentry as skytemple_sentry
@@ -204,4 +390,4 @@ def notnone(x):
 
 def make_impls():
     # return [_LogImpl(), _SentryImpl()]
-    return [_SentryImpl()]
+    return [_SentryImpl(), _LocalImpl.new()]
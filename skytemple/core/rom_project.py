@@ -16,11 +16,16 @@
 #
 #  You should have received a copy of the GNU General Public License
 #  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+import asyncio
+import hashlib
 import logging
 import os
 import shutil
 import struct
 import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum, auto
 from typing import (
     Union,
@@ -30,9 +35,11 @@ from typing import (
     Any,
     overload,
     Literal,
+    TypeVar,
 )
 from collections.abc import Iterator
 from datetime import datetime
+from importlib.metadata import version
 
 from gi.repository import GLib, Gtk
 from ndspy.rom import NintendoDSRom
@@ -49,6 +56,7 @@ from skytemple.core.abstract_module import AbstractModule
 from skytemple.core.modules import Modules
 from skytemple.core.open_request import OpenRequest
 from skytemple.core.model_context import ModelContext
+from skytemple.core.model_cache import ModelCache, MODEL_CACHE_DIR
 from skytemple.core.sprite_provider import SpriteProvider
 from skytemple.core.string_provider import StringProvider, StringType
 from skytemple_files.common.project_file_manager import ProjectFileManager
@@ -56,6 +64,8 @@ from skytemple.core.async_tasks.delegator import AsyncTaskDelegator
 from skytemple_files.common.types.data_handler import DataHandler, T
 from skytemple_files.common.types.file_types import FileType
 from skytemple_files.common.i18n_util import _
+from skytemple_files.common.impl_cfg import get_implementation_type
+from skytemple_files.common.ppmdu_config.data import Pmd2Data
 from skytemple_files.common.util import (
     get_files_from_rom_with_extension,
     get_rom_folder,
@@ -82,6 +92,8 @@ if TYPE_CHECKING:
 
 from contextlib import nullcontext, AbstractContextManager
 
+M = TypeVar("M", bound=AbstractModule)
+
 
 class BinaryName(Enum):
     """This enum maps to binary names of SymbolsProtocol."""
@@ -138,7 +150,16 @@ class RomProject:
     @classmethod
     async def _open_impl(cls, filename, main_controller: "MainController"):
         with record_transaction("__open-rom") as transaction:
-            cls._current = RomProject(filename, main_controller.load_view_main_list)
+            cls._current = RomProject(
+                filename,
+                main_controller.load_view_main_list,
+                lazy_modules=main_controller.settings.get_lazy_module_loading(),
+                model_cache_size=(
+                    main_controller.settings.get_model_cache_size()
+                    if main_controller.settings.get_model_cache_enabled()
+                    else 0
+                ),
+            )
             try:
                 await cls._current.load(transaction)
                 if main_controller:
@@ -193,11 +214,23 @@ class RomProject:
         else:
             os.unlink(backup_fn)
 
-    def __init__(self, filename: str, cb_open_view: Callable[[ItemTreeEntryRef], None]):
+    def __init__(
+        self,
+        filename: str,
+        cb_open_view: Callable[[ItemTreeEntryRef], None],
+        lazy_modules: bool = False,
+        model_cache_size: int = 0,
+    ):
         self.filename = filename
         self._rom: Optional[NintendoDSRom] = None
         self._rom_module: Optional["RomModule"] = None
         self._loaded_modules: dict[str, AbstractModule] = {}
+        # Modules that support lazy loading and were not loaded yet, if lazy loading is enabled.
+        self._lazy_modules_enabled = lazy_modules
+        self._lazy_modules: dict[str, type[AbstractModule]] = {}
+        self._lazy_modules_lock = threading.RLock()
+        self._cb_module_loaded: Optional[Callable[[str, AbstractModule], None]] = None
+        self._cb_modified: Optional[Callable[[Optional[str]], None]] = None
         self._sprite_renderer: Optional[SpriteProvider] = None
         self._string_provider: Optional[StringProvider] = None
         # Dict of filenames -> models
@@ -211,15 +244,32 @@ class RomProject:
         self._file_handler_kwargs: dict[str, dict[str, Any]] = {}
         # List of modified filenames
         self._modified_files: list[str] = []
+        # Sets the names of all requested files are added to, see record_file_access.
+        self._file_access_recorders: tuple[set[str], ...] = ()
+        self._file_access_recorders_lock = threading.Lock()
+        # Module -> names of the files it requested while it was loaded.
+        self._module_files: dict[AbstractModule, set[str]] = {}
         self._forced_modified = False
         # Callback for opening views using iterators from the main view list.
         self._cb_open_view: Callable[[ItemTreeEntryRef], None] = cb_open_view
         self._project_fm = ProjectFileManager(filename)
+        # Persistent cache of deserialized models, if enabled (size > 0).
+        # It is stored per user and not in the project directory: The entries are unpickled, so they
+        # must not come from a project directory someone else shared.
+        self._model_cache: Optional[ModelCache] = None
+        if model_cache_size > 0:
+            self._model_cache = ModelCache(
+                os.path.join(ProjectFileManager.shared_config_dir(), MODEL_CACHE_DIR),
+                model_cache_size,
+                f"{version('skytemple-files')}|{get_implementation_type().name}",
+            )
 
         self._icon_banner: Optional[IconBanner] = None
 
         # Lazy
         self._patcher: Optional[Patcher] = None
+        # See _get_static_data_fingerprint.
+        self._static_data_fingerprint: Optional[str] = None
 
     async def load(self, transaction: Optional[TaggableContext] = None):
         """Load the ROM into memory and initialize all modules"""
@@ -240,22 +290,33 @@ class RomProject:
                     )
             await AsyncTaskDelegator.buffer()
             self._loaded_modules = {}
+            self._static_data_fingerprint = None
 
             with record_span("rom", "load-static-data"):
-                self._rom_module = Modules.get_rom_module()(self)
+                self._rom_module = self._init_module(Modules.get_rom_module())
                 self._rom_module.load_rom_data()
                 if transaction is not None:
                     transaction.set_tag(
                         "rom-edition", self._rom_module.get_static_data().game_edition
                     )
             with record_span("sys", "init-modules"):
+                self._lazy_modules = {}
+                if self._lazy_modules_enabled:
+                    self._lazy_modules = {
+                        name: module
+                        for name, module in Modules.all().items()
+                        if name != "rom" and module.lazy_tree_root() is not None
+                    }
+                if transaction is not None:
+                    transaction.set_tag("lazy-modules", len(self._lazy_modules))
                 for name, module in Modules.all().items():
-                    logger.debug(f"Loading module {name} for ROM...")
-                    if name == "rom":
+                    if name == "rom" or name in self._lazy_modules:
                         continue
-                    else:
+                    # Might have already been loaded on demand by another module.
+                    if name not in self._loaded_modules:
+                        logger.debug(f"Loading module {name} for ROM...")
                         with record_span("init-module", module.__name__):
-                            self._loaded_modules[name] = module(self)
+                            self._loaded_modules[name] = self._init_module(module)
                     await AsyncTaskDelegator.buffer()
 
             with record_span("ui", "load-sprite-provider"):
@@ -274,7 +335,7 @@ class RomProject:
         return self._project_fm
 
     def get_modules(self, include_rom_module=True) -> Iterator[AbstractModule]:
-        """Iterate over loaded modules"""
+        """Iterate over loaded modules. Modules that are not loaded yet (see `get_lazy_modules`) are skipped."""
         if include_rom_module:
             assert self._rom_module is not None
             return iter(list(self._loaded_modules.values()) + [self._rom_module])
@@ -353,8 +414,78 @@ class RomProject:
     def get_module(self, name: Literal["spritecollab"]) -> "SpritecollabModule": ...
 
     def get_module(self, name: str) -> AbstractModule:
+        if name in self._lazy_modules:
+            return self.load_lazy_module(name)
         return self._loaded_modules[name]
 
+    def get_lazy_modules(self) -> dict[str, type[AbstractModule]]:
+        """Returns all modules that support lazy loading and are not loaded yet."""
+        with self._lazy_modules_lock:
+            return dict(self._lazy_modules)
+
+    def set_module_loaded_callback(
+        self, cb: Optional[Callable[[str, AbstractModule], None]]
+    ):
+        """Sets a callback that is called whenever a module was loaded on demand."""
+        self._cb_module_loaded = cb
+
+    def set_modified_callback(self, cb: Optional[Callable[[Optional[str]], None]]):
+        """
+        Sets a callback that is called whenever a file or the ROM is marked as modified.
+        It gets the name of the modified file, or None if the ROM was modified in a way that may affect any file.
+        """
+        self._cb_modified = cb
+
+    def record_file_access(self, files: set[str]):
+        """
+        Adds the name of every file requested with open_file_in_rom, open_sir0_file_in_rom or open_sprconf
+        to the set (also if the file was already open), until stop_recording_file_access is called for it.
+        """
+        with self._file_access_recorders_lock:
+            self._file_access_recorders = self._file_access_recorders + (files,)
+
+    def stop_recording_file_access(self, files: set[str]):
+        with self._file_access_recorders_lock:
+            self._file_access_recorders = tuple(
+                r for r in self._file_access_recorders if r is not files
+            )
+
+    def get_module_files(self, module: AbstractModule) -> set[str]:
+        """Returns the names of the files the module requested while it was loaded."""
+        return self._module_files.get(module, set())
+
+    def _init_module(self, module: type[M]) -> M:
+        files: set[str] = set()
+        self.record_file_access(files)
+        try:
+            instance = module(self)
+        finally:
+            self.stop_recording_file_access(files)
+        self._module_files[instance] = files
+        return instance
+
+    def load_lazy_module(self, name: str) -> AbstractModule:
+        """
+        Loads a module that was not loaded yet, because lazy module loading is enabled.
+        Does nothing if the module is already loaded.
+        """
+        with self._lazy_modules_lock:
+            if name not in self._lazy_modules:
+                return self._loaded_modules[name]
+            module = self._lazy_modules[name]
+            for dependency in module.depends_on():
+                if dependency in self._lazy_modules:
+                    self.load_lazy_module(dependency)
+            logger.debug(f"Loading module {name} for ROM on demand...")
+            with record_transaction("__lazy-load-module", {"module": name}):
+                with record_span("init-module", module.__name__):
+                    instance = self._init_module(module)
+            self._loaded_modules[name] = instance
+            del self._lazy_modules[name]
+        if self._cb_module_loaded is not None:
+            self._cb_module_loaded(name, instance)
+        return instance
+
     def get_icon_banner(self) -> IconBanner:
         assert self._icon_banner
         return self._icon_banner
@@ -417,8 +548,11 @@ class RomProject:
             with record_span("open-rom-file", file_handler_class.__name__):
                 assert self._rom is not None
                 bin = self._rom.getFileByName(file_path_in_rom)
-                self._opened_files[file_path_in_rom] = file_handler_class.deserialize(
-                    bin, **kwargs
+                self._opened_files[file_path_in_rom] = self._deserialize_cached(
+                    file_handler_class,
+                    bin,
+                    kwargs,
+                    lambda: file_handler_class.deserialize(bin, **kwargs),
                 )
                 self._file_handlers[file_path_in_rom] = file_handler_class
                 self._file_handler_kwargs[file_path_in_rom] = kwargs
@@ -444,14 +578,85 @@ class RomProject:
             with record_span("open-sir0-rom-file", sir0_serializable_type.__name__):
                 assert self._rom is not None
                 bin = self._rom.getFileByName(file_path_in_rom)
-                sir0 = FileType.SIR0.deserialize(bin)
-                self._opened_files[file_path_in_rom] = FileType.SIR0.unwrap_obj(
-                    sir0, sir0_serializable_type
+                self._opened_files[file_path_in_rom] = self._deserialize_cached(
+                    sir0_serializable_type,
+                    bin,
+                    {},
+                    lambda: FileType.SIR0.unwrap_obj(
+                        FileType.SIR0.deserialize(bin), sir0_serializable_type
+                    ),
                 )
                 self._file_handlers[file_path_in_rom] = FileType.SIR0
                 self._file_handler_kwargs[file_path_in_rom] = {}
         return self._open_common(file_path_in_rom, threadsafe)
 
+    def _deserialize_cached(
+        self,
+        handler: type,
+        data: bytes,
+        kwargs: dict[str, Any],
+        deserialize: Callable[[], Any],
+    ) -> Any:
+        """
+        Deserializes a model using the given function, unless an unchanged copy of the model
+        is in the persistent model cache.
+        """
+        if self._model_cache is None:
+            return deserialize()
+        kwargs_token = self._model_cache_kwargs_token(kwargs)
+        key = (
+            self._model_cache.make_key(handler, kwargs_token, data)
+            if kwargs_token is not None
+            else None
+        )
+        if key is None:
+            return deserialize()
+        model = self._model_cache.get(key)
+        if model is None:
+            model = deserialize()
+            self._model_cache.put(key, handler, model)
+        return model
+
+    def _model_cache_kwargs_token(self, kwargs: dict[str, Any]) -> Optional[str]:
+        """
+        Returns a string representation of the handler keyword arguments for the model cache key
+        or None, if the arguments can not be represented and the model should not be cached.
+        """
+        parts = []
+        for name, value in sorted(kwargs.items()):
+            if value is None or isinstance(value, (bool, int, float, str, bytes)):
+                parts.append(f"{name}={value!r}")
+            elif isinstance(value, Pmd2Data):
+                parts.append(f"{name}=<static:{self._get_static_data_fingerprint()}>")
+            else:
+                return None
+        return ",".join(parts)
+
+    def _get_static_data_fingerprint(self) -> str:
+        """
+        A hash of everything the static data of the ROM depends on: The game edition and the
+        ARM9 binary and overlays (which patches modify). It is computed once and reset when the
+        binaries may have changed (see force_mark_as_modified) and when the ROM is saved.
+        """
+        assert self._rom is not None
+        if self._static_data_fingerprint is None:
+            h = hashlib.sha256()
+            h.update(self.get_rom_module().get_static_data().game_edition.encode())
+            h.update(self._rom.arm9)
+            h.update(self._rom.arm9OverlayTable)
+            for (file_id,) in struct.iter_unpack("<24xI4x", self._rom.arm9OverlayTable):
+                h.update(self._rom.files[file_id])
+            self._static_data_fingerprint = h.hexdigest()
+        return self._static_data_fingerprint
+
+    def get_model_cache(self) -> Optional[ModelCache]:
+        """Returns the persistent model cache, if it is enabled."""
+        return self._model_cache
+
+    def get_model_context_stats(self) -> dict[str, dict[str, Union[int, float]]]:
+        """Returns the lock contention metrics of all files opened thread-safe."""
+        return {path: ctx.stats() for path, ctx in self._opened_files_contexts.items()}
+
     def open_sprconf(self, threadsafe=False):
         """Opens the MONSTER/sprconf.json if it exists, if not it creates it first."""
         if SPRCONF_FILENAME not in self._opened_files:
@@ -462,6 +667,8 @@ class RomProject:
         return self._open_common(SPRCONF_FILENAME, threadsafe)
 
     def _open_common(self, file_path_in_rom: str, threadsafe):
+        for recorder in self._file_access_recorders:
+            recorder.add(file_path_in_rom)
         if threadsafe:
             if file_path_in_rom in self._files_unsafe:
                 raise ValueError(
@@ -485,17 +692,22 @@ class RomProject:
         """Mark a file as modified, either by filename or model. TODO: Input checking"""
         if isinstance(file, str):
             assert file in self._opened_files
-            if file not in self._modified_files:
-                self._modified_files.append(file)
+            filename = file
         else:
             filename = list(self._opened_files.keys())[
                 list(self._opened_files.values()).index(file)
             ]
-            if filename not in self._modified_files:
-                self._modified_files.append(filename)
+        if filename not in self._modified_files:
+            self._modified_files.append(filename)
+        if self._cb_modified is not None:
+            self._cb_modified(filename)
 
     def force_mark_as_modified(self):
         self._forced_modified = True
+        # Called after patches were applied or binaries were modified.
+        self._static_data_fingerprint = None
+        if self._cb_modified is not None:
+            self._cb_modified(None)
 
     def has_modifications(self):
         return len(self._modified_files) > 0 or self._forced_modified
@@ -531,18 +743,21 @@ class RomProject:
         create_file_in_rom(self._rom, filename, data)
         self.force_mark_as_modified()
 
+    def save_blocking(self):
+        """
+        Save the rom on the calling thread. Errors are raised.
+        For use without the UI, eg. by the batch mode.
+        """
+        with record_transaction("__save-rom") as transaction:
+            self._write_modified_files(transaction)
+            logger.debug(f"Saving ROM to {self.filename}")
+            with record_span("rom", "save"):
+                self.save_as_is()
+
     async def _save_impl(self, main_controller: Optional["MainController"]):
-        with record_transaction("__save-rom"):
+        with record_transaction("__save-rom") as transaction:
             try:
-                with record_span("rom", "serialize-open"):
-                    for name in self._modified_files:
-                        self.prepare_save_model(name)
-                        await AsyncTaskDelegator.buffer()
-                self._modified_files = []
-                with record_span("rom", "save-banner"):
-                    if self._icon_banner:
-                        self._icon_banner.save_to_rom()
-                    self._forced_modified = False
+                await self._write_modified_files_async(transaction)
                 logger.debug(f"Saving ROM to {self.filename}")
                 await AsyncTaskDelegator.buffer()
                 with record_span("rom", "save"):
@@ -563,12 +778,74 @@ class RomProject:
                         ).on_file_saved_error(exc_info, err)
                     )
 
-    def prepare_save_model(self, name, assert_that=None):
+    def _write_modified_files(self, transaction: TaggableContext):
+        """Writes all modified models and the icon banner to the ROM object in memory."""
+        with record_span("rom", "serialize-open"):
+            serialized = self._serialize_models(self._modified_files)
+        self._modified_files = []
+        self._write_serialized_files(transaction, serialized)
+
+    async def _write_modified_files_async(self, transaction: TaggableContext):
         """
-        Write the binary model for this type to the ROM object in memory.
-        If assert_that is given, it is asserted, that the model matches the one on record.
+        Same as _write_modified_files, but the event loop keeps running while the models are serialized.
+        Files that are marked as modified in the meantime stay marked as modified.
         """
-        assert self._rom is not None
+        names = self._modified_files
+        self._modified_files = []
+        try:
+            with record_span("rom", "serialize-open"):
+                serialized = await self._serialize_models_async(names)
+        except BaseException:
+            self._modified_files = names + [
+                name for name in self._modified_files if name not in names
+            ]
+            raise
+        self._write_serialized_files(transaction, serialized)
+
+    def _write_serialized_files(
+        self, transaction: TaggableContext, serialized: list[tuple[str, bytes]]
+    ):
+        with record_span("rom", "write-changed-files") as span:
+            changed = 0
+            for name, binary_data in serialized:
+                if self._set_file_if_changed(name, binary_data):
+                    changed += 1
+            span.set_tag("changed", changed)
+            transaction.set_tag("modified-files", len(serialized))
+            transaction.set_tag("changed-files", changed)
+        with record_span("rom", "save-banner"):
+            if self._icon_banner:
+                self._icon_banner.save_to_rom()
+            self._forced_modified = False
+
+    def _serialize_models(self, names: list[str]) -> list[tuple[str, bytes]]:
+        """
+        Serializes the models of all given files. Models are independent of each other,
+        so if there is more than one, they are serialized on a worker pool.
+        """
+        if len(names) < 2:
+            return [(name, self._serialize_model(name)) for name in names]
+        with ThreadPoolExecutor(thread_name_prefix="skytemple-save") as pool:
+            return list(zip(names, pool.map(self._serialize_model, names)))
+
+    async def _serialize_models_async(
+        self, names: list[str]
+    ) -> list[tuple[str, bytes]]:
+        """
+        Same as _serialize_models, but all models are serialized on the worker pool and awaited, instead of
+        blocking the thread. With the async configurations that run the event loop on the UI thread, the UI
+        keeps updating while saving.
+        """
+        if len(names) < 1:
+            return []
+        with ThreadPoolExecutor(thread_name_prefix="skytemple-save") as pool:
+            futures = [
+                asyncio.wrap_future(pool.submit(self._serialize_model, name))
+                for name in names
+            ]
+            return list(zip(names, await asyncio.gather(*futures)))
+
+    def _serialize_model(self, name: str, assert_that=None) -> bytes:
         context: AbstractContextManager = (
             self._opened_files_contexts[name]
             if name in self._opened_files_contexts
@@ -587,24 +864,50 @@ class RomProject:
                     assert (
                         assert_that is model
                     ), "The model that is being saved must match!"
-                binary_data = handler.serialize(
-                    model, **self._file_handler_kwargs[name]
-                )
-                self._rom.setFileByName(name, binary_data)
+                return handler.serialize(model, **self._file_handler_kwargs[name])
+
+    def _set_file_if_changed(self, name: str, binary_data: bytes) -> bool:
+        """Writes the file to the ROM object in memory, unless its content is unchanged."""
+        assert self._rom is not None
+        if self._rom.getFileByName(name) == binary_data:
+            logger.debug(f"> {name} is unchanged, skipping.")
+            return False
+        self._rom.setFileByName(name, binary_data)
+        return True
+
+    def prepare_save_model(self, name, assert_that=None):
+        """
+        Write the binary model for this type to the ROM object in memory.
+        If assert_that is given, it is asserted, that the model matches the one on record.
+        """
+        assert self._rom is not None
+        self._set_file_if_changed(name, self._serialize_model(name, assert_that))
 
     def save_as_is(self):
-        """Simply save the current ROM to disk."""
+        """
+        Simply save the current ROM to disk.
+        The ROM is written to a temporary file next to the target first, which then atomically
+        replaces the ROM file, so an interrupted save never leaves a corrupted ROM behind.
+        """
         assert self._rom is not None
-        # First copy current ROM to a temp file.
-        backup_fn = os.path.join(self.get_project_file_manager().dir(), BACKUP_NAME)
-        # When doing "Save As..." the file may not exist yet.
-        if os.path.exists(self.filename):
-            shutil.copyfile(self.filename, backup_fn)
-        # Now save
-        self._rom.saveToFile(self.filename, updateDeviceCapacity=True)
-        # Delete the backup
-        if os.path.exists(backup_fn):
-            os.unlink(backup_fn)
+        self._static_data_fingerprint = None
+        with record_span("rom", "build-rom"):
+            data = self._rom.save(updateDeviceCapacity=True)
+        with record_span("rom", "write-rom"):
+            rom_dir = os.path.dirname(os.path.abspath(self.filename))
+            fd, tmp_fn = tempfile.mkstemp(prefix=".~", suffix=".nds.tmp", dir=rom_dir)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                if os.path.exists(self.filename):
+                    shutil.copymode(self.filename, tmp_fn)
+                os.replace(tmp_fn, self.filename)
+            except BaseException:
+                if os.path.exists(tmp_fn):
+                    os.unlink(tmp_fn)
+                raise
 
     def get_files_with_ext(self, ext, folder_name: Optional[str] = None):
         assert self._rom is not None
@@ -656,11 +959,17 @@ class RomProject:
         Handle a request to open a resource in the editor. If the resource was not found, nothing happens,
         unless raise_exception is true, in which case a ValueError is raised.
         """
-        for module in self._loaded_modules.values():
+        for module in list(self._loaded_modules.values()):
             result = module.handle_request(request)
             if result is not None:
                 self._cb_open_view(result)
                 return
+        # Modules that are not loaded yet need to be loaded to find out if they can handle the request.
+        for name in self.get_lazy_modules().keys():
+            result = self.load_lazy_module(name).handle_request(request)
+            if result is not None:
+                self._cb_open_view(result)
+                return
         if raise_exception:
             raise ValueError("No handler for request.")
 
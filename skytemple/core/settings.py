@@ -44,10 +44,17 @@ KEY_GTK_THEME = "gtk_theme"
 KEY_LOCALE = "locale"
 KEY_USE_NATIVE_FILE_HANDLERS = "use_native_file_handlers"
 KEY_ASYNC_CONFIGURATION = "async_configuration"
+KEY_ASYNC_POOL_WORKERS = "async_pool_workers"
 KEY_ALLOW_SENTRY = "send_error_reports"
 KEY_SENTRY_USER_ID = "error_reports_user_id"
 KEY_ENABLE_CSD = "enable_csd"
 KEY_APPROVED_PLUGINS = "approved_plugins"
+KEY_LAZY_MODULE_LOADING = "lazy_module_loading"
+KEY_MODEL_CACHE_ENABLED = "model_cache_enabled"
+KEY_MODEL_CACHE_SIZE = "model_cache_size_mb"
+KEY_SPRITE_CACHE_SIZE = "sprite_cache_size_mb"
+KEY_VIEW_CACHE_SIZE = "view_cache_size"
+KEY_LOCAL_PROFILING = "local_profiling"
 
 KEY_WINDOW_SIZE_X = "width"
 KEY_WINDOW_SIZE_Y = "height"
@@ -56,6 +63,8 @@ KEY_WINDOW_POS_Y = "pos_y"
 KEY_WINDOW_IS_MAX = "is_max"
 
 KEY_INTEGRATION_DISCORD_DISCORD_ENABLED = "enabled"
+DEFAULT_MODEL_CACHE_SIZE_MB = 256
+DEFAULT_SPRITE_CACHE_SIZE_MB = 128
 logger = logging.getLogger(__name__)
 
 
@@ -276,6 +285,22 @@ class SkyTempleSettingsStore:
         self.loaded_config[SECT_GENERAL][KEY_ASYNC_CONFIGURATION] = value.value
         self._save()
 
+    def get_async_pool_workers(self) -> int:
+        """Number of worker threads of the thread pool async configuration. 0 means one per CPU core."""
+        if SECT_GENERAL in self.loaded_config:
+            if KEY_ASYNC_POOL_WORKERS in self.loaded_config[SECT_GENERAL]:
+                try:
+                    return int(self.loaded_config[SECT_GENERAL][KEY_ASYNC_POOL_WORKERS])
+                except Exception:
+                    pass
+        return 0
+
+    def set_async_pool_workers(self, value: int):
+        if SECT_GENERAL not in self.loaded_config:
+            self.loaded_config[SECT_GENERAL] = {}
+        self.loaded_config[SECT_GENERAL][KEY_ASYNC_POOL_WORKERS] = str(value)
+        self._save()
+
     def csd_enabled(self) -> bool:
         if SECT_GENERAL in self.loaded_config:
             if KEY_ENABLE_CSD in self.loaded_config[SECT_GENERAL]:
@@ -303,6 +328,110 @@ class SkyTempleSettingsStore:
         self.loaded_config[SECT_GENERAL][KEY_APPROVED_PLUGINS] = ",".join(plugin_names)
         self._save()
 
+    def get_lazy_module_loading(self) -> bool:
+        if SECT_GENERAL in self.loaded_config:
+            if KEY_LAZY_MODULE_LOADING in self.loaded_config[SECT_GENERAL]:
+                try:
+                    return bool(
+                        int(self.loaded_config[SECT_GENERAL][KEY_LAZY_MODULE_LOADING])
+                    )
+                except Exception:
+                    return False
+        return False  # default is disabled.
+
+    def set_lazy_module_loading(self, value: bool):
+        if SECT_GENERAL not in self.loaded_config:
+            self.loaded_config[SECT_GENERAL] = {}
+        self.loaded_config[SECT_GENERAL][KEY_LAZY_MODULE_LOADING] = (
+            "1" if value else "0"
+        )
+        self._save()
+
+    def get_model_cache_enabled(self) -> bool:
+        if SECT_GENERAL in self.loaded_config:
+            if KEY_MODEL_CACHE_ENABLED in self.loaded_config[SECT_GENERAL]:
+                try:
+                    return bool(
+                        int(self.loaded_config[SECT_GENERAL][KEY_MODEL_CACHE_ENABLED])
+                    )
+                except Exception:
+                    return False
+        return False  # default is disabled.
+
+    def set_model_cache_enabled(self, value: bool):
+        if SECT_GENERAL not in self.loaded_config:
+            self.loaded_config[SECT_GENERAL] = {}
+        self.loaded_config[SECT_GENERAL][KEY_MODEL_CACHE_ENABLED] = (
+            "1" if value else "0"
+        )
+        self._save()
+
+    def get_model_cache_size(self) -> int:
+        """Maximum size of the model cache in bytes."""
+        size_mb = DEFAULT_MODEL_CACHE_SIZE_MB
+        if SECT_GENERAL in self.loaded_config:
+            if KEY_MODEL_CACHE_SIZE in self.loaded_config[SECT_GENERAL]:
+                try:
+                    size_mb = int(
+                        self.loaded_config[SECT_GENERAL][KEY_MODEL_CACHE_SIZE]
+                    )
+                except Exception:
+                    pass
+        return size_mb * 1024 * 1024
+
+    def get_sprite_cache_size(self) -> int:
+        """Maximum memory used by loaded sprites in bytes."""
+        return self.get_sprite_cache_size_mb() * 1024 * 1024
+
+    def get_sprite_cache_size_mb(self) -> int:
+        if SECT_GENERAL in self.loaded_config:
+            if KEY_SPRITE_CACHE_SIZE in self.loaded_config[SECT_GENERAL]:
+                try:
+                    return int(self.loaded_config[SECT_GENERAL][KEY_SPRITE_CACHE_SIZE])
+                except Exception:
+                    pass
+        return DEFAULT_SPRITE_CACHE_SIZE_MB
+
+    def set_sprite_cache_size_mb(self, value: int):
+        if SECT_GENERAL not in self.loaded_config:
+            self.loaded_config[SECT_GENERAL] = {}
+        self.loaded_config[SECT_GENERAL][KEY_SPRITE_CACHE_SIZE] = str(value)
+        self._save()
+
+    def get_view_cache_size(self) -> int:
+        """Number of recently used editor views kept after switching away from them. 0 disables this."""
+        if SECT_GENERAL in self.loaded_config:
+            if KEY_VIEW_CACHE_SIZE in self.loaded_config[SECT_GENERAL]:
+                try:
+                    return int(self.loaded_config[SECT_GENERAL][KEY_VIEW_CACHE_SIZE])
+                except Exception:
+                    pass
+        return 0
+
+    def set_view_cache_size(self, value: int):
+        if SECT_GENERAL not in self.loaded_config:
+            self.loaded_config[SECT_GENERAL] = {}
+        self.loaded_config[SECT_GENERAL][KEY_VIEW_CACHE_SIZE] = str(value)
+        self._save()
+
+    def get_local_profiling_enabled(self) -> bool:
+        """Whether performance traces are recorded locally, so they can be exported."""
+        if SECT_GENERAL in self.loaded_config:
+            if KEY_LOCAL_PROFILING in self.loaded_config[SECT_GENERAL]:
+                try:
+                    return bool(
+                        int(self.loaded_config[SECT_GENERAL][KEY_LOCAL_PROFILING])
+                    )
+                except Exception:
+                    pass
+        return False
+
+    def set_local_profiling_enabled(self, value: bool):
+        if SECT_GENERAL not in self.loaded_config:
+            self.loaded_config[SECT_GENERAL] = {}
+        self.loaded_config[SECT_GENERAL][KEY_LOCAL_PROFILING] = "1" if value else "0"
+        self._save()
+
     def _save(self):
         with open_utf8(self.config_file, "w") as f:
             self.loaded_config.write(f)
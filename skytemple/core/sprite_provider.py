@@ -30,13 +30,15 @@ from skytemple_files.dungeon_data.mappa_bin.protocol import MappaTrapType
 from skytemple_files.graphics.img_itm.model import ImgItm
 from skytemple_files.graphics.img_trp.model import ImgTrp
 
-from PIL import Image, ImageFilter
+from PIL import Image, ImageChops, ImageFilter
 from gi.repository import Gdk, Gtk
 
 from skytemple.core.img_utils import pil_to_cairo_surface
+from skytemple.core.lru_cache import SizeBoundedLruCache
 from skytemple.core.model_context import ModelContext
 from skytemple.core.ui_utils import data_dir, assert_not_none
 from skytemple.core.async_tasks.delegator import AsyncTaskDelegator
+from skytemple.core.async_tasks.pool import TaskPriority
 from skytemple_files.common.types.file_types import FileType
 from skytemple_files.common.util import MONSTER_MD, MONSTER_BIN, open_utf8, DUNGEON_BIN
 from skytemple_files.container.bin_pack.model import BinPack
@@ -49,6 +51,8 @@ if TYPE_CHECKING:
 
 SpriteAndOffsetAndDims = tuple[cairo.ImageSurface, int, int, int, int]
 ActorSpriteKey = tuple[Union[str, int], int]
+# (kind of sprite, key), see SpriteProvider._cache.
+SpriteCacheKey = tuple[str, Union[ActorSpriteKey, str, int]]
 sprite_provider_lock = threading.RLock()
 logger = logging.getLogger(__name__)
 
@@ -150,6 +154,29 @@ TRAP_PALETTE_MAP = {
 TRP_FILENAME = "traps.trp.img"
 ITM_FILENAME = "items.itm.img"
 FILE_NAME_STANDIN_SPRITES = ".standin_sprites.json"
+KIND_MONSTER = "monster"
+KIND_MONSTER_OUTLINE = "monster_outline"
+KIND_ACTOR_PLACEHOLDER = "actor_placeholder"
+KIND_OBJECT = "object"
+KIND_TRAP = "trap"
+KIND_ITEM = "item"
+# Number of decoded monster WAN files to keep around (all directions, outlines and
+# placeholders of a monster are rendered from the same decoded WAN).
+DECODED_WAN_CACHE_ENTRIES = 64
+# Lookup tables for Image.point, used to build masks without iterating over pixels in Python.
+_LUT_ABOVE_200 = [255 if v > 200 else 0 for v in range(256)]
+_LUT_BELOW_200 = [255 if v < 200 else 0 for v in range(256)]
+_LUT_ITEM_ALPHA = [0 if v % 16 == 0 else 255 for v in range(256)]
+
+
+def _make_red_transparent(img: Image.Image):
+    """Replaces all red pixels of the RGBA image with transparent white, in place."""
+    r, g, b, _a = img.split()
+    red_mask = ImageChops.multiply(
+        ImageChops.multiply(r.point(_LUT_ABOVE_200), g.point(_LUT_BELOW_200)),
+        b.point(_LUT_BELOW_200),
+    )
+    img.paste((255, 255, 255, 0), (0, 0, img.width, img.height), red_mask)
 
 
 class SpriteProvider:
@@ -163,16 +190,20 @@ class SpriteProvider:
         self._loader_surface_dims: Optional[tuple[int, int]] = None
         self._loader_surface: Optional[cairo.ImageSurface] = None
 
-        self._loaded__monsters: dict[ActorSpriteKey, SpriteAndOffsetAndDims] = {}
-        self._loaded__monsters_outlines: dict[
-            ActorSpriteKey, SpriteAndOffsetAndDims
-        ] = {}
-        self._loaded__actor_placeholders: dict[
-            ActorSpriteKey, SpriteAndOffsetAndDims
-        ] = {}
-        self._loaded__objects: dict[str, SpriteAndOffsetAndDims] = {}
-        self._loaded__traps: dict[int, SpriteAndOffsetAndDims] = {}
-        self._loaded__items: dict[int, SpriteAndOffsetAndDims] = {}
+        self._error_surface: Optional[cairo.ImageSurface] = None
+
+        # All loaded sprites. Bounded by the surface memory used, evicted sprites are
+        # loaded again when they are requested next time.
+        self._cache: SizeBoundedLruCache[SpriteCacheKey, SpriteAndOffsetAndDims] = (
+            SizeBoundedLruCache(self._get_cache_budget(), self._sizeof_sprite)
+        )
+        # Decoded monster.bin sprites by sprite index. Concurrent requests for a sprite that is
+        # currently being decoded wait for that decode instead of decoding it again.
+        self._decoded_wans: SizeBoundedLruCache[int, Wan] = SizeBoundedLruCache(
+            DECODED_WAN_CACHE_ENTRIES, lambda _: 1
+        )
+        self._decoding_wans: dict[int, threading.Event] = {}
+        self._decoding_wans_lock = threading.Lock()
 
         self._requests__monsters: list[ActorSpriteKey] = []
         self._requests__monsters_outlines: list[ActorSpriteKey] = []
@@ -190,6 +221,7 @@ class SpriteProvider:
         self._dungeon_bin: Optional[ModelContext[DungeonBinPack]] = None
 
         self._stripes = Image.open(os.path.join(data_dir(), "stripes.png"))
+        self._stripes_tiled: Image.Image = self._stripes
         self._loaded_standins: Optional[dict[int, int]] = None
 
         # init_loader MUST be called next!
@@ -233,11 +265,8 @@ class SpriteProvider:
 
     def reset(self):
         with sprite_provider_lock:
-            self._loaded__monsters = {}
-            self._loaded__actor_placeholders = {}
-            self._loaded__objects = {}
-            self._loaded__traps = {}
-            self._loaded__items = {}
+            self._cache.clear()
+            self._decoded_wans.clear()
 
             self._requests__monsters = []
             self._requests__actor_placeholders = []
@@ -246,67 +275,107 @@ class SpriteProvider:
             self._requests__items = []
 
     def get_actor_placeholder(
-        self, actor_id, direction_id: int, after_load_cb=lambda: None
+        self,
+        actor_id,
+        direction_id: int,
+        after_load_cb=lambda: None,
+        priority: TaskPriority = TaskPriority.VISIBLE,
     ) -> SpriteAndOffsetAndDims:
         """
         Returns a placeholder sprite for the actor with the given index (in the actor table).
         As long as the sprite is being loaded, the loader sprite is returned instead.
         """
         with sprite_provider_lock:
-            if (actor_id, direction_id) in self._loaded__actor_placeholders:
-                return self._loaded__actor_placeholders[(actor_id, direction_id)]
+            loaded = self._cache.get((KIND_ACTOR_PLACEHOLDER, (actor_id, direction_id)))
+            if loaded is not None:
+                return loaded
             if (actor_id, direction_id) not in self._requests__actor_placeholders:
                 self._requests__actor_placeholders.append((actor_id, direction_id))
-                self._load_actor_placeholder(actor_id, direction_id, after_load_cb)
+                self._load_actor_placeholder(
+                    actor_id, direction_id, after_load_cb, priority
+                )
+            else:
+                AsyncTaskDelegator.raise_priority(
+                    (KIND_ACTOR_PLACEHOLDER, (actor_id, direction_id)), priority
+                )
         return self.get_loader()
 
     def get_monster(
-        self, md_index, direction_id: int, after_load_cb=lambda: None
+        self,
+        md_index,
+        direction_id: int,
+        after_load_cb=lambda: None,
+        priority: TaskPriority = TaskPriority.VISIBLE,
     ) -> SpriteAndOffsetAndDims:
         """
         Returns the sprite using the index from the monster.md.
         As long as the sprite is being loaded, the loader sprite is returned instead.
         """
         with sprite_provider_lock:
-            if (md_index, direction_id) in self._loaded__monsters:
-                return self._loaded__monsters[(md_index, direction_id)]
+            loaded = self._cache.get((KIND_MONSTER, (md_index, direction_id)))
+            if loaded is not None:
+                return loaded
             if (md_index, direction_id) not in self._requests__monsters:
                 self._requests__monsters.append((md_index, direction_id))
-                self._load_monster(md_index, direction_id, after_load_cb)
+                self._load_monster(md_index, direction_id, after_load_cb, priority)
+            else:
+                AsyncTaskDelegator.raise_priority(
+                    (KIND_MONSTER, (md_index, direction_id)), priority
+                )
         return self.get_loader()
 
     def get_monster_outline(
-        self, md_index, direction_id: int, after_load_cb=lambda: None
+        self,
+        md_index,
+        direction_id: int,
+        after_load_cb=lambda: None,
+        priority: TaskPriority = TaskPriority.VISIBLE,
     ) -> SpriteAndOffsetAndDims:
         """
         Returns the outline of a sprite using the index from the monster.md.
         As long as the sprite is being loaded, the loader sprite is returned instead.
         """
         with sprite_provider_lock:
-            if (md_index, direction_id) in self._loaded__monsters_outlines:
-                return self._loaded__monsters_outlines[(md_index, direction_id)]
+            loaded = self._cache.get((KIND_MONSTER_OUTLINE, (md_index, direction_id)))
+            if loaded is not None:
+                return loaded
             if (md_index, direction_id) not in self._requests__monsters_outlines:
                 self._requests__monsters_outlines.append((md_index, direction_id))
-                self._load_monster_outline(md_index, direction_id, after_load_cb)
+                self._load_monster_outline(
+                    md_index, direction_id, after_load_cb, priority
+                )
+            else:
+                AsyncTaskDelegator.raise_priority(
+                    (KIND_MONSTER_OUTLINE, (md_index, direction_id)), priority
+                )
         return self.get_loader()
 
     def get_for_object(
-        self, name, after_load_cb=lambda: None
+        self,
+        name,
+        after_load_cb=lambda: None,
+        priority: TaskPriority = TaskPriority.VISIBLE,
     ) -> SpriteAndOffsetAndDims:
         """
         Returns a named object sprite file from the GROUND directory.
         As long as the sprite is being loaded, the loader sprite is returned instead.
         """
         with sprite_provider_lock:
-            if name in self._loaded__objects:
-                return self._loaded__objects[name]
+            loaded = self._cache.get((KIND_OBJECT, name))
+            if loaded is not None:
+                return loaded
             if name not in self._requests__objects:
                 self._requests__objects.append(name)
-                self._load_object(name, after_load_cb)
+                self._load_object(name, after_load_cb, priority)
+            else:
+                AsyncTaskDelegator.raise_priority((KIND_OBJECT, name), priority)
         return self.get_loader()
 
     def get_for_trap(
-        self, trp: Union[MappaTrapType, int], after_load_cb=lambda: None
+        self,
+        trp: Union[MappaTrapType, int],
+        after_load_cb=lambda: None,
+        priority: TaskPriority = TaskPriority.VISIBLE,
     ) -> SpriteAndOffsetAndDims:
         """
         Returns a trap sprite.
@@ -318,15 +387,21 @@ class SpriteProvider:
             trpv = trp
         self._load_dungeon_bin()
         with sprite_provider_lock:
-            if trpv in self._loaded__traps:
-                return self._loaded__traps[trpv]
+            loaded = self._cache.get((KIND_TRAP, trpv))
+            if loaded is not None:
+                return loaded
             if trpv not in self._requests__traps:
                 self._requests__traps.append(trpv)
-                self._load_trap(trpv, after_load_cb)
+                self._load_trap(trpv, after_load_cb, priority)
+            else:
+                AsyncTaskDelegator.raise_priority((KIND_TRAP, trpv), priority)
         return self.get_loader()
 
     def get_for_item(
-        self, itm: ItemPEntryProtocol, after_load_cb=lambda: None
+        self,
+        itm: ItemPEntryProtocol,
+        after_load_cb=lambda: None,
+        priority: TaskPriority = TaskPriority.VISIBLE,
     ) -> SpriteAndOffsetAndDims:
         """
         Returns a item sprite based on the sprite ID.
@@ -334,16 +409,23 @@ class SpriteProvider:
         """
         self._load_dungeon_bin()
         with sprite_provider_lock:
-            if itm.item_id in self._loaded__items:
-                return self._loaded__items[itm.item_id]
+            loaded = self._cache.get((KIND_ITEM, itm.item_id))
+            if loaded is not None:
+                return loaded
             if itm.item_id not in self._requests__items:
                 self._requests__items.append(itm.item_id)
-                self._load_item(itm, after_load_cb)
+                self._load_item(itm, after_load_cb, priority)
+            else:
+                AsyncTaskDelegator.raise_priority((KIND_ITEM, itm.item_id), priority)
         return self.get_loader()
 
-    def _load_actor_placeholder(self, actor_id, direction_id: int, after_load_cb):
-        AsyncTaskDelegator.run_task(
-            self._load_actor_placeholder__impl(actor_id, direction_id, after_load_cb)
+    def _load_actor_placeholder(
+        self, actor_id, direction_id: int, after_load_cb, priority: TaskPriority
+    ):
+        AsyncTaskDelegator.run_load(
+            self._load_actor_placeholder__impl(actor_id, direction_id, after_load_cb),
+            priority,
+            (KIND_ACTOR_PLACEHOLDER, (actor_id, direction_id)),
         )
 
     async def _load_actor_placeholder__impl(
@@ -363,10 +445,7 @@ class SpriteProvider:
             im_outline = sprite_img.filter(ImageFilter.FIND_EDGES)
             alpha_outline = im_outline.getchannel("A")
 
-            out_sprite = Image.new("RGBA", im_outline.size)
-            for i in range(0, out_sprite.width, self._stripes.width):
-                for j in range(0, out_sprite.height, self._stripes.height):
-                    out_sprite.paste(self._stripes, (i, j))
+            out_sprite = self._get_stripes(im_outline.width, im_outline.height)
 
             im_outline = Image.new("RGBA", im_outline.size, color="white")
             out_sprite.paste(
@@ -374,15 +453,7 @@ class SpriteProvider:
             )
 
             out_sprite.putalpha(alpha_sprite)
-            # Make red transparent
-            data = out_sprite.getdata()
-            new_data = []
-            for item in data:
-                if item[0] > 200 and item[1] < 200 and item[2] < 200:
-                    new_data.append((255, 255, 255, 0))
-                else:
-                    new_data.append(item)
-            out_sprite.putdata(new_data)  # type: ignore
+            _make_red_transparent(out_sprite)
 
             # /
 
@@ -391,16 +462,33 @@ class SpriteProvider:
         except BaseException:
             loaded = self.get_error()
         with sprite_provider_lock:
-            self._loaded__actor_placeholders[(actor_id, direction_id)] = loaded
+            self._cache.put((KIND_ACTOR_PLACEHOLDER, (actor_id, direction_id)), loaded)
             try:
                 self._requests__actor_placeholders.remove((actor_id, direction_id))
             except ValueError:
                 pass
         after_load_cb()
 
-    def _load_monster(self, md_index, direction_id: int, after_load_cb):
-        AsyncTaskDelegator.run_task(
-            self._load_monster__impl(md_index, direction_id, after_load_cb)
+    def _get_stripes(self, width: int, height: int) -> Image.Image:
+        """Returns a new RGBA image of the given size, filled with the placeholder stripes."""
+        tiled = self._stripes_tiled
+        if tiled.width < width or tiled.height < height:
+            tiled = Image.new(
+                "RGBA", (max(width, tiled.width), max(height, tiled.height))
+            )
+            for i in range(0, tiled.width, self._stripes.width):
+                for j in range(0, tiled.height, self._stripes.height):
+                    tiled.paste(self._stripes, (i, j))
+            self._stripes_tiled = tiled
+        return tiled.crop((0, 0, width, height))
+
+    def _load_monster(
+        self, md_index, direction_id: int, after_load_cb, priority: TaskPriority
+    ):
+        AsyncTaskDelegator.run_load(
+            self._load_monster__impl(md_index, direction_id, after_load_cb),
+            priority,
+            (KIND_MONSTER, (md_index, direction_id)),
         )
 
     async def _load_monster__impl(self, md_index, direction_id: int, after_load_cb):
@@ -413,16 +501,20 @@ class SpriteProvider:
         except BaseException:
             loaded = self.get_error()
         with sprite_provider_lock:
-            self._loaded__monsters[(md_index, direction_id)] = loaded
+            self._cache.put((KIND_MONSTER, (md_index, direction_id)), loaded)
             try:
                 self._requests__monsters.remove((md_index, direction_id))
             except ValueError:
                 pass
         after_load_cb()
 
-    def _load_monster_outline(self, md_index, direction_id: int, after_load_cb):
-        AsyncTaskDelegator.run_task(
-            self._load_monster_outline__impl(md_index, direction_id, after_load_cb)
+    def _load_monster_outline(
+        self, md_index, direction_id: int, after_load_cb, priority: TaskPriority
+    ):
+        AsyncTaskDelegator.run_load(
+            self._load_monster_outline__impl(md_index, direction_id, after_load_cb),
+            priority,
+            (KIND_MONSTER_OUTLINE, (md_index, direction_id)),
         )
 
     async def _load_monster_outline__impl(
@@ -447,7 +539,7 @@ class SpriteProvider:
         except BaseException:
             loaded = self.get_error()
         with sprite_provider_lock:
-            self._loaded__monsters_outlines[(md_index, direction_id)] = loaded
+            self._cache.put((KIND_MONSTER_OUTLINE, (md_index, direction_id)), loaded)
             try:
                 self._requests__monsters_outlines.remove((md_index, direction_id))
             except ValueError:
@@ -458,18 +550,17 @@ class SpriteProvider:
         self, md_index, direction_id: int
     ) -> tuple[Image.Image, int, int, int, int]:
         try:
-            with self._monster_md as monster_md:
+            with self._monster_md.read() as monster_md:
                 actor_sprite_id = monster_md[md_index].sprite_index
             if actor_sprite_id < 0:
                 raise ValueError("Invalid Sprite index")
-            with self._monster_bin as monster_bin:
-                sprite = self._load_sprite_from_bin_pack(monster_bin, actor_sprite_id)
+            sprite = self._get_decoded_monster_wan(actor_sprite_id)
 
-                ani_group = sprite.anim_groups[0]
-                frame_id = direction_id - 1 if direction_id > 0 else 0
-                mfg_id = ani_group[frame_id].frames[0].frame_id
+            ani_group = sprite.anim_groups[0]
+            frame_id = direction_id - 1 if direction_id > 0 else 0
+            mfg_id = ani_group[frame_id].frames[0].frame_id
 
-                sprite_img, (cx, cy) = sprite.render_frame(sprite.frames[mfg_id])
+            sprite_img, (cx, cy) = sprite.render_frame(sprite.frames[mfg_id])
             return sprite_img, cx, cy, sprite_img.width, sprite_img.height
         except BaseException as e:
             # Error :(
@@ -478,8 +569,42 @@ class SpriteProvider:
             )
             raise RuntimeError(f"Error loading monster sprite for {md_index}") from e
 
-    def _load_object(self, name, after_load_cb):
-        AsyncTaskDelegator.run_task(self._load_object__impl(name, after_load_cb))
+    def _get_decoded_monster_wan(self, sprite_index: int) -> Wan:
+        """
+        Returns the decoded WAN for the sprite index of monster.bin. Each sprite is only decoded
+        once while it is cached. If another thread is already decoding it, this waits for the result.
+        """
+        while True:
+            with self._decoding_wans_lock:
+                sprite = self._decoded_wans.get(sprite_index)
+                if sprite is not None:
+                    return sprite
+                in_flight = self._decoding_wans.get(sprite_index)
+                if in_flight is None:
+                    self._decoding_wans[sprite_index] = threading.Event()
+            if in_flight is None:
+                break
+            # Wait for the other decode. If it failed, the next loop iteration tries again.
+            in_flight.wait()
+        try:
+            with self._monster_bin.read() as monster_bin:
+                raw = monster_bin[sprite_index]
+            # Decompressing and decoding doesn't need monster.bin anymore.
+            sprite = FileType.WAN.deserialize(
+                FileType.COMMON_AT.deserialize(raw).decompress()
+            )
+            self._decoded_wans.put(sprite_index, sprite)
+            return sprite
+        finally:
+            with self._decoding_wans_lock:
+                self._decoding_wans.pop(sprite_index).set()
+
+    def _load_object(self, name, after_load_cb, priority: TaskPriority):
+        AsyncTaskDelegator.run_load(
+            self._load_object__impl(name, after_load_cb),
+            priority,
+            (KIND_OBJECT, name),
+        )
 
     async def _load_object__impl(self, name, after_load_cb):
         try:
@@ -491,19 +616,16 @@ class SpriteProvider:
                 sprite_img, (cx, cy) = sprite.render_frame(sprite.frames[mfg_id])
             surf = pil_to_cairo_surface(sprite_img)
             with sprite_provider_lock:
-                self._loaded__objects[name] = (
-                    surf,
-                    cx,
-                    cy,
-                    sprite_img.width,
-                    sprite_img.height,
+                self._cache.put(
+                    (KIND_OBJECT, name),
+                    (surf, cx, cy, sprite_img.width, sprite_img.height),
                 )
 
         except BaseException as e:
             # Error :(
             logger.warning(f"Error loading an object sprite for {name}.", exc_info=e)
             with sprite_provider_lock:
-                self._loaded__objects[name] = self.get_error()
+                self._cache.put((KIND_OBJECT, name), self.get_error())
         with sprite_provider_lock:
             try:
                 self._requests__objects.remove(name)
@@ -511,25 +633,29 @@ class SpriteProvider:
                 pass
         after_load_cb()
 
-    def _load_trap(self, trp: int, after_load_cb):
-        AsyncTaskDelegator.run_task(self._load_trap__impl(trp, after_load_cb))
+    def _load_trap(self, trp: int, after_load_cb, priority: TaskPriority):
+        AsyncTaskDelegator.run_load(
+            self._load_trap__impl(trp, after_load_cb),
+            priority,
+            (KIND_TRAP, trp),
+        )
 
     async def _load_trap__impl(self, trp: int, after_load_cb):
         try:
             assert self._dungeon_bin is not None
-            with self._dungeon_bin as dungeon_bin:
+            with self._dungeon_bin.read() as dungeon_bin:
                 traps: ImgTrp = dungeon_bin.get(TRP_FILENAME)
             surf = pil_to_cairo_surface(
                 traps.to_pil(trp, TRAP_PALETTE_MAP[trp]).convert("RGBA")
             )
             with sprite_provider_lock:
-                self._loaded__traps[trp] = surf, 0, 0, 24, 24
+                self._cache.put((KIND_TRAP, trp), (surf, 0, 0, 24, 24))
 
         except BaseException as e:
             # Error :(
             logger.warning(f"Error loading an trap sprite for {trp}.", exc_info=e)
             with sprite_provider_lock:
-                self._loaded__traps[trp] = self.get_error()
+                self._cache.put((KIND_TRAP, trp), self.get_error())
         with sprite_provider_lock:
             try:
                 self._requests__traps.remove(trp)
@@ -537,28 +663,32 @@ class SpriteProvider:
                 pass
         after_load_cb()
 
-    def _load_item(self, itm: ItemPEntryProtocol, after_load_cb):
-        AsyncTaskDelegator.run_task(self._load_item__impl(itm, after_load_cb))
+    def _load_item(
+        self, itm: ItemPEntryProtocol, after_load_cb, priority: TaskPriority
+    ):
+        AsyncTaskDelegator.run_load(
+            self._load_item__impl(itm, after_load_cb),
+            priority,
+            (KIND_ITEM, itm.item_id),
+        )
 
     async def _load_item__impl(self, item: ItemPEntryProtocol, after_load_cb):
         try:
             assert self._dungeon_bin is not None
-            with self._dungeon_bin as dungeon_bin:
+            with self._dungeon_bin.read() as dungeon_bin:
                 items: ImgItm = dungeon_bin.get(ITM_FILENAME)
             img = items.to_pil(item.sprite, item.palette)
-            alpha = [px % 16 != 0 for px in img.getdata()]
+            alphaimg = img.point(_LUT_ITEM_ALPHA, "L")
             img = img.convert("RGBA")
-            alphaimg = Image.new("1", (img.width, img.height))
-            alphaimg.putdata(alpha)
             img.putalpha(alphaimg)
             surf = pil_to_cairo_surface(img)
             with sprite_provider_lock:
-                self._loaded__items[item.item_id] = surf, 0, 0, 16, 16
+                self._cache.put((KIND_ITEM, item.item_id), (surf, 0, 0, 16, 16))
         except BaseException as e:
             # Error :(
             logger.warning(f"Error loading an item sprite for {item}.", exc_info=e)
             with sprite_provider_lock:
-                self._loaded__items[item.item_id] = self.get_error()
+                self._cache.put((KIND_ITEM, item.item_id), self.get_error())
         with sprite_provider_lock:
             try:
                 self._requests__items.remove(item.item_id)
@@ -566,15 +696,25 @@ class SpriteProvider:
                 pass
         after_load_cb()
 
-    def _load_sprite_from_bin_pack(self, bin_pack: BinPack, file_id) -> Wan:
-        # TODO: Support of bin_pack item management via the RomProject instead?
-        return FileType.WAN.deserialize(
-            FileType.COMMON_AT.deserialize(bin_pack[file_id]).decompress()
-        )
-
     def _load_sprite_from_rom(self, path: str) -> ModelContext[Wan]:
         return self._project.open_file_in_rom(path, FileType.WAN, threadsafe=True)
 
+    def get_cache_stats(self) -> dict[str, int]:
+        """Returns hit, miss and eviction counters and the memory usage of the sprite cache."""
+        return self._cache.stats()
+
+    def _get_cache_budget(self) -> int:
+        from skytemple.core.settings import SkyTempleSettingsStore
+
+        return SkyTempleSettingsStore().get_sprite_cache_size()
+
+    def _sizeof_sprite(self, sprite: SpriteAndOffsetAndDims) -> int:
+        surface = sprite[0]
+        if surface is self._error_surface or surface is self._loader_surface:
+            # Shared, not owned by the cache.
+            return 0
+        return surface.get_stride() * surface.get_height()
+
     def get_loader(self) -> SpriteAndOffsetAndDims:
         """
         Returns the loader sprite. A "loading" icon with the size ~24x24px.
@@ -588,6 +728,7 @@ class SpriteProvider:
         """
         Returns the error sprite. An "error" icon with the size ~24x24px.
         """
+        assert self._error_surface
         w, h = self._error_surface_dims
         return self._error_surface, int(w / 2), h, w, h
 
@@ -609,7 +750,7 @@ class SpriteProvider:
 
     def set_standin_entities(self, mappings):
         with sprite_provider_lock:
-            self._loaded__actor_placeholders = {}
+            self._cache.discard_where(lambda k: k[0] == KIND_ACTOR_PLACEHOLDER)
         p = self._standin_entities_filepath()
         with open_utf8(p, "w") as f:
             json.dump(mappings, f)
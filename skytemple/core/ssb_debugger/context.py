@@ -14,11 +14,13 @@
 #
 #  You should have received a copy of the GNU General Public License
 #  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+import logging
+import sys
 from threading import Lock
 from typing import TYPE_CHECKING, Optional
 from collections.abc import Iterable
 
-from gi.repository import Gtk
+from gi.repository import Gtk, GLib
 
 from explorerscript.source_map import SourceMapPositionMark
 from skytemple.core.error_handler import display_error, capture_error
@@ -54,7 +56,7 @@ from skytemple_ssb_debugger.context.abstract import (
     AbstractDebuggerControlContext,
     EXPS_KEYWORDS,
 )
-from skytemple_files.common.i18n_util import _
+from skytemple_files.common.i18n_util import _, f
 
 from skytemple.module.script.widget.pos_mark_editor import StPosMarkEditorDialog
 
@@ -62,14 +64,21 @@ if TYPE_CHECKING:
     from skytemple_ssb_debugger.model.ssb_files.file_manager import SsbFileManager
     from skytemple.core.ssb_debugger.manager import DebuggerManager
     from skytemple_ssb_debugger.model.ssb_files.file import SsbLoadedFile
+logger = logging.getLogger(__name__)
 file_load_lock = Lock()
 save_lock = Lock()
+# Scripts saved within this time of each other are written to the ROM file at once.
+SSB_SAVE_DEBOUNCE_MS = 500
 
 
 class SkyTempleMainDebuggerControlContext(AbstractDebuggerControlContext):
     def __init__(self, manager: "DebuggerManager"):
         self._manager = manager
         self._special_words_cache: Optional[set[str]] = None
+        # Project with scripts that were saved to the ROM in memory but not yet to the ROM file.
+        self._unwritten_project: Optional[RomProject] = None
+        self._unwritten_ssbs: set[str] = set()
+        self._write_timeout_id: Optional[int] = None
 
     def allows_interactive_file_management(self) -> bool:
         return False
@@ -78,6 +87,7 @@ class SkyTempleMainDebuggerControlContext(AbstractDebuggerControlContext):
         return True
 
     def on_quit(self):
+        self.flush_ssb_saves()
         self._manager.on_close()
 
     def on_focus(self):
@@ -115,9 +125,15 @@ class SkyTempleMainDebuggerControlContext(AbstractDebuggerControlContext):
 
     def save_rom(self):
         # We only save the current ROM contents!
-        current = RomProject.get_current()
-        if current:
-            current.save_as_is()
+        with save_lock:
+            self._cancel_scheduled_write()
+            current = RomProject.get_current()
+            if self._unwritten_project is not current:
+                self._write_unwritten_ssbs()
+            self._unwritten_project = None
+            self._unwritten_ssbs.clear()
+            if current:
+                current.save_as_is()
 
     def get_static_data(self) -> Pmd2Data:
         current_project = RomProject.get_current()
@@ -153,7 +169,51 @@ class SkyTempleMainDebuggerControlContext(AbstractDebuggerControlContext):
             ssb_loaded_file = self.get_ssb(filename, ssb_file_manager)
             ssb_loaded_file.ssb_model = ssb_model
             project.prepare_save_model(filename, assert_that=ssb_loaded_file)
-            project.save_as_is()
+            # Writing the ROM file is expensive, scripts saved in quick succession are written at once.
+            if self._unwritten_project is not project:
+                self._write_unwritten_ssbs()
+                self._unwritten_project = project
+            self._unwritten_ssbs.add(filename)
+            self._cancel_scheduled_write()
+            self._write_timeout_id = GLib.timeout_add(
+                SSB_SAVE_DEBOUNCE_MS, self._on_write_timeout
+            )
+
+    def flush_ssb_saves(self):
+        """
+        Writes the ROM file, if scripts were saved since it was last written.
+        After this returns, all scripts saved with save_ssb are stored on disk.
+        """
+        with save_lock:
+            self._cancel_scheduled_write()
+            self._write_unwritten_ssbs()
+
+    def _on_write_timeout(self):
+        self._write_timeout_id = None
+        try:
+            self.flush_ssb_saves()
+        except Exception as ex:
+            self.display_error(
+                sys.exc_info(),
+                f(_("Failed to write the saved scripts to the ROM:\n{ex}")),
+                _("Error saving the ROM"),
+            )
+        return False
+
+    def _cancel_scheduled_write(self):
+        if self._write_timeout_id is not None:
+            GLib.source_remove(self._write_timeout_id)
+            self._write_timeout_id = None
+
+    def _write_unwritten_ssbs(self):
+        # Must be called with the save lock held.
+        if self._unwritten_project is not None and len(self._unwritten_ssbs) > 0:
+            logger.debug(
+                f"Writing ROM for {len(self._unwritten_ssbs)} saved script(s)."
+            )
+            self._unwritten_project.save_as_is()
+        self._unwritten_project = None
+        self._unwritten_ssbs.clear()
 
     def open_scene_editor(self, type_of_scene, path):
         try:
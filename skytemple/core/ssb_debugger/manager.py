@@ -81,7 +81,9 @@ class DebuggerManager:
 
     def destroy(self):
         """Free resources."""
-        # TODO: Do we need to do something anymore?
+        if self._context is not None:
+            # Make sure scripts saved in the debugger right before closing end up on disk.
+            self._context.flush_ssb_saves()
 
     def is_opened(self):
         """Returns whether or not the debugger is opened."""
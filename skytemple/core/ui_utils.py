@@ -246,14 +246,17 @@ def catch_overflow(typ_or_range_start, range_end=None):
     return catch_overflow_decorator
 
 
-def get_list_store_iter_by_idx(store: Gtk.ListStore, idx, get_iter=False):
-    liter = store.get_iter_first()
-    for i in range(0, idx):
-        assert liter is not None
-        liter = store.iter_next(liter)
-    if get_iter:
-        return liter
-    return liter
+def get_list_store_iter_by_idx(store: Gtk.ListStore, idx) -> Gtk.TreeIter | None:
+    """
+    Returns the iter of the row at position idx, or None if the store has no such row.
+    The row is looked up by its path, which doesn't require walking the store from the first row.
+    """
+    if idx < 0:
+        return None
+    try:
+        return store.get_iter(Gtk.TreePath.new_from_indices([idx]))
+    except ValueError:
+        return None
 
 
 def create_tree_view_column(
@@ -0,0 +1,141 @@
+"""Cache of recently used, detached editor views."""
+
+#  Copyright 2020-2024 Capypara and the SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+
+import logging
+from typing import Any, Optional, Union
+
+from gi.repository import Gtk
+
+from skytemple.core.abstract_module import AbstractModule
+from skytemple.core.lru_cache import SizeBoundedLruCache
+from skytemple.core.module_controller import AbstractController
+
+logger = logging.getLogger(__name__)
+ViewCacheKey = tuple[AbstractModule, type, Any]
+# The view as loaded (a widget or a legacy controller), the widget that was shown for it and the
+# names of the ROM files that were requested while it was loaded and shown (see RomProject.record_file_access).
+CachedView = tuple[Union[AbstractController, Gtk.Widget], Gtk.Widget, set[str]]
+
+
+class ViewCache:
+    """
+    Keeps the most recently used views around after switching away from them, so that switching back
+    to them doesn't need to construct them again. Views are identified by module, view class and item data.
+
+    The budget is a number of views, not an amount of memory: The memory held by a widget tree (and the
+    surfaces and models it references) can't be measured, so a memory budget could only be enforced
+    based on a guess. A view count is predictable for users and cheap to enforce.
+
+    When a file is modified only the views that depend on it are invalidated. A view depends on the files
+    it requested and on the files any view of its module or the module itself requested, since modules
+    often keep models they opened earlier.
+    Views that are evicted or invalidated are destroyed (and legacy controllers unloaded).
+    """
+
+    def __init__(self, max_views: int):
+        self._cache: SizeBoundedLruCache[ViewCacheKey, CachedView] = (
+            SizeBoundedLruCache(max_views, lambda _: 1, self._on_evict)
+        )
+        # Module -> names of all files requested by its cached views.
+        self._module_files: dict[AbstractModule, set[str]] = {}
+        self.builds = 0
+        self.build_time_total = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self._cache.max_size > 0
+
+    def set_max_views(self, max_views: int):
+        if max_views < 1:
+            self.invalidate()
+        self._cache.max_size = max_views
+
+    @staticmethod
+    def make_key(
+        module: AbstractModule, view_class: type, item_data: Any
+    ) -> Optional[ViewCacheKey]:
+        """Returns the key for the view, or None if the view can not be cached (unhashable item data)."""
+        try:
+            hash(item_data)
+        except TypeError:
+            return None
+        return module, view_class, item_data
+
+    def take(self, key: ViewCacheKey) -> Optional[CachedView]:
+        """Removes the view from the cache and returns it, if it is cached."""
+        if not self.enabled:
+            return None
+        return self._cache.pop(key)
+
+    def put(self, key: ViewCacheKey, view: CachedView):
+        """Adds a view, that must have been removed from its parent, to the cache."""
+        if not self.enabled:
+            self._dispose(view)
+            return
+        replaced = self._cache.pop(key)
+        if replaced is not None:
+            self._dispose(replaced)
+        self._module_files.setdefault(key[0], set()).update(view[2])
+        self._cache.put(key, view)
+
+    def invalidate(self, file: Optional[str] = None):
+        """
+        Destroys the cached views that depend on the file (by its name in the ROM), or all cached views
+        if no file is given. Must be called if models views may display are changed.
+        """
+        if file is None:
+            for _, view in self._cache.items():
+                self._dispose(view)
+            self._cache.clear()
+            self._module_files.clear()
+            return
+        for key, view in self._cache.items():
+            if file in view[2] or file in self._module_files.get(key[0], ()):
+                logger.debug(f"Invalidating cached view {key[1].__name__}.")
+                self._cache.discard(key)
+                self._dispose(view)
+
+    def record_build(self, seconds: float):
+        """Records how long it took to build a view that was not cached."""
+        self.builds += 1
+        self.build_time_total += seconds
+        logger.debug(f"View built in {seconds * 1000:.1f}ms.")
+
+    def stats(self) -> dict[str, Union[int, float]]:
+        """Returns hit and miss counters and build time metrics of the cache."""
+        stats: dict[str, Union[int, float]] = dict(self._cache.stats())
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups > 0 else 0.0
+        stats["builds"] = self.builds
+        stats["avg_build_time_ms"] = (
+            self.build_time_total / self.builds * 1000 if self.builds > 0 else 0.0
+        )
+        return stats
+
+    def _on_evict(self, key: ViewCacheKey, view: CachedView):
+        logger.debug(f"Evicting cached view {key[1].__name__}.")
+        self._dispose(view)
+
+    @staticmethod
+    def _dispose(view: CachedView):
+        in_view, widget, _ = view
+        widget.destroy()
+        if isinstance(in_view, AbstractController):
+            in_view.unload()
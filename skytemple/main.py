@@ -15,6 +15,7 @@
 #  You should have received a copy of the GNU General Public License
 #  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
 import logging
+import multiprocessing
 import os
 import sys
 import locale
@@ -170,38 +171,49 @@ from skytemple_files.common.i18n_util import _
 
 gi.require_version("Gtk", "3.0")
 
-# SKYTEMPLE_LOGLEVEL re-export kept for compatibility until 2.x
-from skytemple.core.logger import setup_logging
 
-setup_logging()
+def setup_ui():
+    """Sets up logging and checks that PyGObject can be used, before the application is imported."""
+    # SKYTEMPLE_LOGLEVEL re-export kept for compatibility until 2.x
+    from skytemple.core.logger import setup_logging
 
-from skytemple.core.message_dialog import SkyTempleMessageDialog
+    setup_logging()
 
-# Re-exports kept for compatibility until 2.x
+    from skytemple.core.message_dialog import SkyTempleMessageDialog
 
-try:
-    gi.require_foreign("cairo")
-except ImportError:
-    from gi.repository import Gtk
-
-    md = SkyTempleMessageDialog(
-        None,
-        Gtk.DialogFlags.DESTROY_WITH_PARENT,
-        Gtk.MessageType.ERROR,
-        Gtk.ButtonsType.OK,
-        _("PyGObject compiled without Cairo support. Can't start!"),
-        title=_("SkyTemple - Error!"),
-    )
-    md.set_position(Gtk.WindowPosition.CENTER)
-    md.run()
-    md.destroy()
-    exit(1)
-
-from skytemple.app import SkyTempleApplication
+    try:
+        gi.require_foreign("cairo")
+    except ImportError:
+        from gi.repository import Gtk
+
+        md = SkyTempleMessageDialog(
+            None,
+            Gtk.DialogFlags.DESTROY_WITH_PARENT,
+            Gtk.MessageType.ERROR,
+            Gtk.ButtonsType.OK,
+            _("PyGObject compiled without Cairo support. Can't start!"),
+            title=_("SkyTemple - Error!"),
+        )
+        md.set_position(Gtk.WindowPosition.CENTER)
+        md.run()
+        md.destroy()
+        exit(1)
 
 
 def main():
-    # TODO: At the moment doesn't support any cli arguments.
+    # Needed for worker processes (e.g. the dungeon floor statistics) in frozen builds.
+    multiprocessing.freeze_support()
+    # `skytemple batch ...` runs without the UI, see skytemple.cli. Other arguments are not supported yet.
+    # This is checked before anything from Gtk or the application is imported; worker processes
+    # import this module again.
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        from skytemple.core.logger import setup_logging
+        from skytemple.cli import main as batch_main
+
+        setup_logging()
+        sys.exit(batch_main(sys.argv[2:]))
+    setup_ui()
+    from skytemple.app import SkyTempleApplication
     from skytemple.core.async_tasks.delegator import AsyncTaskDelegator
 
     path = os.path.abspath(os.path.dirname(__file__))
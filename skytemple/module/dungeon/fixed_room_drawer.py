@@ -119,6 +119,12 @@ class FixedRoomDrawer:
 
         self.drawing_is_active = False
 
+        # The DMA rules of the room, updated in place when tiles change.
+        self._rules: Optional[list[list[int]]] = None
+        # The actions the rules were calculated from and the (width, height, outside tile, padding).
+        self._rules_actions: list[FixedFloorActionRule] = []
+        self._rules_key: Optional[tuple[int, int, int, bool]] = None
+
     def start(self):
         """Start drawing on the DrawingArea"""
         self.drawing_is_active = True
@@ -152,57 +158,7 @@ class FixedRoomDrawer:
         ctx.rectangle(0, 0, size_w, size_h)
         ctx.fill()
 
-        # Iterate over floor and render it
-        rules = []
-        if self.add_fixed_room_padding:
-            draw_outside_as_second_terrain = any(
-                action.tr_type == TileRuleType.SECONDARY_HALLWAY_VOID_ALL
-                for action in self.fixed_floor.actions
-                if isinstance(action, TileRule)
-            )
-            outside = DmaType.WATER if draw_outside_as_second_terrain else DmaType.WALL
-            rules.append([outside] * (self.fixed_floor.width + 10))
-            rules.append([outside] * (self.fixed_floor.width + 10))
-            rules.append([outside] * (self.fixed_floor.width + 10))
-            rules.append([outside] * (self.fixed_floor.width + 10))
-            rules.append([outside] * (self.fixed_floor.width + 10))
-        ridx = 0
-        for y in range(0, self.fixed_floor.height):
-            if self.add_fixed_room_padding:
-                row = [outside, outside, outside, outside, outside]
-            rules.append(row)
-            for x in range(0, self.fixed_floor.width):
-                action = self.fixed_floor.actions[ridx]
-                if isinstance(action, TileRule):
-                    if action.tr_type.floor_type == FloorType.FLOOR:
-                        row.append(DmaType.FLOOR)
-                    elif action.tr_type.floor_type == FloorType.WALL:
-                        row.append(DmaType.WALL)
-                    elif action.tr_type.floor_type == FloorType.SECONDARY:
-                        row.append(DmaType.WATER)
-                    elif action.tr_type.floor_type == FloorType.FLOOR_OR_WALL:
-                        row.append(DmaType.WALL)
-                elif isinstance(action, EntityRule):
-                    item, monster, tile, stats = self.entity_rule_container.get(
-                        action.entity_rule_id
-                    )
-                    if tile.is_secondary_terrain():
-                        row.append(DmaType.WATER)
-                    else:
-                        row.append(DmaType.FLOOR)
-                elif isinstance(action, DirectRule):
-                    row.append(action.tile.terrain)
-                ridx += 1
-            if self.add_fixed_room_padding:
-                row += [outside, outside, outside, outside, outside]
-        if self.add_fixed_room_padding:
-            rules.append([outside] * (self.fixed_floor.width + 10))
-            rules.append([outside] * (self.fixed_floor.width + 10))
-            rules.append([outside] * (self.fixed_floor.width + 10))
-            rules.append([outside] * (self.fixed_floor.width + 10))
-            rules.append([outside] * (self.fixed_floor.width + 10))
-
-        dungeon = self.tileset_renderer.get_dungeon(rules)
+        dungeon = self.tileset_renderer.get_dungeon(self._get_rules())
         ctx.set_source_surface(dungeon, 0, 0)
         ctx.get_source().set_filter(cairo.Filter.NEAREST)
         ctx.paint()
@@ -400,6 +356,69 @@ class FixedRoomDrawer:
         """Start dragging. x/y is the offset on the entity, where the dragging was started."""
         self._selected__drag = (x, y)
 
+    def _get_rules(self) -> list[list[int]]:
+        """
+        Returns the DMA rules of the room (with padding, if enabled). The rules are cached, only the
+        cells of actions that changed since the last call are calculated again.
+        """
+        assert self.fixed_floor is not None
+        width = self.fixed_floor.width
+        height = self.fixed_floor.height
+        actions = self.fixed_floor.actions
+        outside = DmaType.WALL
+        if self.add_fixed_room_padding:
+            draw_outside_as_second_terrain = any(
+                action.tr_type == TileRuleType.SECONDARY_HALLWAY_VOID_ALL
+                for action in actions
+                if isinstance(action, TileRule)
+            )
+            outside = DmaType.WATER if draw_outside_as_second_terrain else DmaType.WALL
+        pad = OFFSET_BASE if self.add_fixed_room_padding else 0
+        key = (width, height, outside, self.add_fixed_room_padding)
+
+        if (
+            self._rules is None
+            or key != self._rules_key
+            or len(actions) != len(self._rules_actions)
+        ):
+            rules = [[outside] * (width + 2 * pad) for _ in range(height + 2 * pad)]
+            for ridx, action in enumerate(actions):
+                rules[ridx // width + pad][ridx % width + pad] = self._get_rule(action)
+            self._rules = rules
+            self._rules_actions = list(actions)
+            self._rules_key = key
+            return rules
+
+        rules = self._rules
+        cached_actions = self._rules_actions
+        for ridx, action in enumerate(actions):
+            # Entity rules are always checked, since the entity they refer to may have been edited.
+            if action is not cached_actions[ridx] or isinstance(action, EntityRule):
+                rules[ridx // width + pad][ridx % width + pad] = self._get_rule(action)
+                cached_actions[ridx] = action
+        return rules
+
+    def _get_rule(self, action: FixedFloorActionRule) -> int:
+        if isinstance(action, TileRule):
+            if action.tr_type.floor_type == FloorType.FLOOR:
+                return DmaType.FLOOR
+            elif action.tr_type.floor_type == FloorType.SECONDARY:
+                return DmaType.WATER
+            # WALL and FLOOR_OR_WALL
+            return DmaType.WALL
+        elif isinstance(action, EntityRule):
+            assert self.entity_rule_container is not None
+            item, monster, tile, stats = self.entity_rule_container.get(
+                action.entity_rule_id
+            )
+            if tile.is_secondary_terrain():
+                return DmaType.WATER
+            else:
+                return DmaType.FLOOR
+        elif isinstance(action, DirectRule):
+            return action.tile.terrain
+        raise ValueError(f"Unknown fixed floor action: {action}")
+
     def get_cursor_is_in_bounds(self, w, h, real_offset=False):
         return self.get_pos_is_in_bounds(self.mouse_x, self.mouse_y, w, h, real_offset)
 
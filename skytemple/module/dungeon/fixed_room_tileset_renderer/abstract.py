@@ -15,10 +15,11 @@
 #  You should have received a copy of the GNU General Public License
 #  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Callable, Optional
 
 import cairo
 
+from skytemple_files.graphics.dma.dma_drawer import DmaDrawer
 from skytemple_files.graphics.dpc import DPC_TILING_DIM
 from skytemple_files.graphics.dpci import DPCI_TILE_DIM
 
@@ -38,3 +39,78 @@ class AbstractTilesetRenderer(ABC):
 
     def chunk_dim(self):
         return DPC_TILING_DIM * DPCI_TILE_DIM
+
+    @staticmethod
+    def dirty_cells(
+        old: Optional[list[list[int]]], new: list[list[int]]
+    ) -> Optional[set[tuple[int, int]]]:
+        """
+        Returns the (x, y) cells that need to be rendered again after the rules changed from old to new:
+        Every changed cell and its 3x3 neighborhood, since a cell's tile depends on its neighbors.
+        Returns None if everything needs to be rendered again (no old rules or the size changed).
+        """
+        if old is None or len(old) != len(new) or len(old[0]) != len(new[0]):
+            return None
+        height = len(new)
+        width = len(new[0])
+        dirty = set()
+        for y, (old_row, new_row) in enumerate(zip(old, new)):
+            if old_row == new_row:
+                continue
+            for x, (old_cell, new_cell) in enumerate(zip(old_row, new_row)):
+                if old_cell != new_cell:
+                    for ny in range(max(y - 1, 0), min(y + 2, height)):
+                        for nx in range(max(x - 1, 0), min(x + 2, width)):
+                            dirty.add((nx, ny))
+        return dirty
+
+    @staticmethod
+    def update_mappings(
+        dma_drawer: DmaDrawer,
+        rules: list[list[int]],
+        mappings: list[list[int]],
+        dirty: set[tuple[int, int]],
+    ) -> list[tuple[int, int, int]]:
+        """
+        Updates the DPC mappings of the dirty cells in place. Only the area around the dirty cells
+        is passed to the DmaDrawer. Returns (x, y, chunk index) for the cells whose mapping changed.
+        """
+        if len(dirty) == 0:
+            return []
+        # One cell more on each side, so every dirty cell has all its neighbors.
+        x0 = max(min(x for x, _ in dirty) - 1, 0)
+        x1 = min(max(x for x, _ in dirty) + 1, len(rules[0]) - 1)
+        y0 = max(min(y for _, y in dirty) - 1, 0)
+        y1 = min(max(y for _, y in dirty) + 1, len(rules) - 1)
+        area = [row[x0 : x1 + 1] for row in rules[y0 : y1 + 1]]
+        area_mappings = dma_drawer.get_mappings_for_rules(
+            area, treat_outside_as_wall=True, variation_index=0
+        )
+        changed = []
+        for x, y in dirty:
+            chunk = area_mappings[y - y0][x - x0]
+            if mappings[y][x] != chunk:
+                mappings[y][x] = chunk
+                changed.append((x, y, chunk))
+        return changed
+
+    def paint_chunks(
+        self,
+        surface: cairo.ImageSurface,
+        changed: list[tuple[int, int, int]],
+        get_chunk: Callable[[int], cairo.Surface],
+    ):
+        """Paints the chunks (x, y, chunk index) over the cells of the surface."""
+        ctx = cairo.Context(surface)
+        ctx.set_operator(cairo.Operator.SOURCE)
+        dim = self.chunk_dim()
+        for x, y, chunk in changed:
+            ctx.set_source_surface(get_chunk(chunk), x * dim, y * dim)
+            ctx.rectangle(x * dim, y * dim, dim, dim)
+            ctx.fill()
+        surface.flush()
+
+    @staticmethod
+    def copy_rules(rules: list[list[int]]) -> list[list[int]]:
+        # The drawer updates its rules in place, so the renderers need their own copy to compare against.
+        return [list(row) for row in rules]
@@ -51,8 +51,10 @@ class FixedFloorDrawerBackground(AbstractTilesetRenderer):
         self.chunks = chunks
         self.dma_drawer = DmaDrawer(self.dma)
         self._cached_bg: Optional[cairo.ImageSurface] = None
-        self._cached_rules: list[list[int]] = []
+        self._cached_rules: Optional[list[list[int]]] = None
+        self._cached_mappings: list[list[int]] = []
         self._cached_dungeon_surface: Optional[cairo.ImageSurface] = None
+        self._chunk_surfaces: dict[int, cairo.ImageSurface] = {}
         self.single_tiles = {
             DmaType.FLOOR: self._single_tile(DmaType.FLOOR),
             DmaType.WALL: self._single_tile(DmaType.WALL),
@@ -69,15 +71,24 @@ class FixedFloorDrawerBackground(AbstractTilesetRenderer):
         return self._cached_bg
 
     def get_dungeon(self, rules: list[list[int]]) -> cairo.Surface:
-        # TODO: If rules change only update the parts that need to be updated
         if rules != self._cached_rules:
-            mappings = self.dma_drawer.get_mappings_for_rules(
-                rules, treat_outside_as_wall=True, variation_index=0
-            )
-            self._cached_dungeon_surface = pil_to_cairo_surface(
-                self._draw_dungeon(mappings)
-            )
-            self._cached_rules = rules
+            dirty = self.dirty_cells(self._cached_rules, rules)
+            if dirty is None or self._cached_dungeon_surface is None:
+                self._cached_mappings = self.dma_drawer.get_mappings_for_rules(
+                    rules, treat_outside_as_wall=True, variation_index=0
+                )
+                self._cached_dungeon_surface = pil_to_cairo_surface(
+                    self._draw_dungeon(self._cached_mappings)
+                )
+            else:
+                # Only the neighborhood of the changed tiles is rendered again.
+                changed = self.update_mappings(
+                    self.dma_drawer, rules, self._cached_mappings, dirty
+                )
+                self.paint_chunks(
+                    self._cached_dungeon_surface, changed, self._chunk_surface
+                )
+            self._cached_rules = self.copy_rules(rules)
         assert self._cached_dungeon_surface is not None
         return self._cached_dungeon_surface
 
@@ -94,6 +105,19 @@ class FixedFloorDrawerBackground(AbstractTilesetRenderer):
             self.chunks.crop((cx, cy, cx + chunk_dim, cy + chunk_dim))
         )
 
+    def _chunk_surface(self, chunk_index: int) -> cairo.ImageSurface:
+        if chunk_index not in self._chunk_surfaces:
+            chunk_dim = DPC_TILING_DIM * DPCI_TILE_DIM
+            chunk_width = int(self.chunks.width / chunk_dim)
+            cy = int(chunk_index / chunk_width) * chunk_dim
+            cx = chunk_index % chunk_width * chunk_dim
+            self._chunk_surfaces[chunk_index] = pil_to_cairo_surface(
+                self.chunks.crop((cx, cy, cx + chunk_dim, cy + chunk_dim)).convert(
+                    "RGBA"
+                )
+            )
+        return self._chunk_surfaces[chunk_index]
+
     def _draw_dungeon(self, mappings: list[list[int]]) -> Image.Image:
         chunk_dim = DPCI_TILE_DIM * DPC_TILING_DIM
         chunk_width = int(self.chunks.width / chunk_dim)
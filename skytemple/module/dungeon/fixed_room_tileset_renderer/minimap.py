@@ -26,6 +26,8 @@ from skytemple.module.dungeon.fixed_room_tileset_renderer.abstract import (
 from skytemple.module.dungeon.minimap_provider import MinimapProvider, ZMAPPAT_DIM
 from skytemple_files.graphics.dma.protocol import DmaType
 
+BACKGROUND_COLOR = (0, 0, 231, 255)
+
 
 class FixedFloorDrawerMinimap(AbstractTilesetRenderer):
     def __init__(self, minimap_provider: MinimapProvider):
@@ -38,49 +40,68 @@ class FixedFloorDrawerMinimap(AbstractTilesetRenderer):
 
     def get_dungeon(self, rules: list[list[int]]) -> cairo.Surface:
         if rules != self._cached_rules:
-            surf = pil_to_cairo_surface(
-                Image.new(
-                    "RGBA",
-                    size=(len(rules[0] * ZMAPPAT_DIM), len(rules * ZMAPPAT_DIM)),
-                    color=(0, 0, 231, 255),
+            dirty = self.dirty_cells(self._cached_rules, rules)
+            if dirty is None or self._cached_dungeon_surface is None:
+                surf = pil_to_cairo_surface(
+                    Image.new(
+                        "RGBA",
+                        size=(len(rules[0] * ZMAPPAT_DIM), len(rules * ZMAPPAT_DIM)),
+                        color=BACKGROUND_COLOR,
+                    )
                 )
-            )
-            ctx = cairo.Context(surf)
-            for y, row in enumerate(rules):
-                for x, cell in enumerate(row):
-                    if cell == DmaType.WALL:
-                        continue
-                    self.paint(
-                        ctx,
-                        self.get_single_tile(cell),
-                        x * ZMAPPAT_DIM,
-                        y * ZMAPPAT_DIM,
+                ctx = cairo.Context(surf)
+                for y, row in enumerate(rules):
+                    for x in range(len(row)):
+                        self._paint_cell(ctx, rules, x, y)
+                self._cached_dungeon_surface = surf
+            else:
+                # Only the neighborhood of the changed tiles is rendered again.
+                ctx = cairo.Context(self._cached_dungeon_surface)
+                r, g, b, a = BACKGROUND_COLOR
+                for x, y in dirty:
+                    ctx.set_operator(cairo.Operator.SOURCE)
+                    ctx.set_source_rgba(r / 255, g / 255, b / 255, a / 255)
+                    ctx.rectangle(
+                        x * ZMAPPAT_DIM, y * ZMAPPAT_DIM, ZMAPPAT_DIM, ZMAPPAT_DIM
                     )
-                    if cell == DmaType.WATER:
-                        self.paint(
-                            ctx,
-                            self.minimap_provider.get_secondary_tile(),
-                            x * ZMAPPAT_DIM,
-                            y * ZMAPPAT_DIM,
-                        )
-                    else:
-                        w_below = self.w_below(rules, x, y)  # 0001
-                        w_right = self.w_right(rules, x, y)  # 0010
-                        w_above = self.w_above(rules, x, y)  # 0100
-                        w_left = self.w_left(rules, x, y)  # 1000
-                        idx = 16 + w_below + 2 * w_right + 4 * w_above + 8 * w_left
-                        self.paint(
-                            ctx,
-                            self.minimap_provider.get_minimap_tile(idx),
-                            x * ZMAPPAT_DIM,
-                            y * ZMAPPAT_DIM,
-                        )
-
-            self._cached_dungeon_surface = surf
-            self._cached_rules = rules
+                    ctx.fill()
+                    ctx.set_operator(cairo.Operator.OVER)
+                    self._paint_cell(ctx, rules, x, y)
+                self._cached_dungeon_surface.flush()
+            self._cached_rules = self.copy_rules(rules)
         assert self._cached_dungeon_surface is not None
         return self._cached_dungeon_surface
 
+    def _paint_cell(self, ctx: cairo.Context, rules: list[list[int]], x: int, y: int):
+        cell = rules[y][x]
+        if cell == DmaType.WALL:
+            return
+        self.paint(
+            ctx,
+            self.get_single_tile(cell),
+            x * ZMAPPAT_DIM,
+            y * ZMAPPAT_DIM,
+        )
+        if cell == DmaType.WATER:
+            self.paint(
+                ctx,
+                self.minimap_provider.get_secondary_tile(),
+                x * ZMAPPAT_DIM,
+                y * ZMAPPAT_DIM,
+            )
+        else:
+            w_below = self.w_below(rules, x, y)  # 0001
+            w_right = self.w_right(rules, x, y)  # 0010
+            w_above = self.w_above(rules, x, y)  # 0100
+            w_left = self.w_left(rules, x, y)  # 1000
+            idx = 16 + w_below + 2 * w_right + 4 * w_above + 8 * w_left
+            self.paint(
+                ctx,
+                self.minimap_provider.get_minimap_tile(idx),
+                x * ZMAPPAT_DIM,
+                y * ZMAPPAT_DIM,
+            )
+
     def get_single_tile(self, tile: int) -> cairo.Surface:
         if tile == DmaType.WALL:
             return self.minimap_provider.get_minimap_tile(31)
@@ -36,34 +36,45 @@ class FixedFloorDrawerTileset(AbstractTilesetRenderer):
         self, dma: DmaProtocol, dpci: DpciProtocol, dpc: DpcProtocol, dpl: DplProtocol
     ):
         self._cached_rules: Optional[list[list[int]]] = None
+        self._cached_mappings: list[list[int]] = []
         self._cached_dungeon_surface: Optional[cairo.ImageSurface] = None
+        self._chunk_surfaces: dict[int, cairo.ImageSurface] = {}
         self.dma = dma
         self.dpci = dpci
         self.dpc = dpc
         self.dpl = dpl
         self.dma_drawer = DmaDrawer(self.dma)
-        chunks = self.dpc.chunks_to_pil(self.dpci, self.dpl.palettes, 1)
+        self._chunks = self.dpc.chunks_to_pil(self.dpci, self.dpl.palettes, 1)
         self.single_tiles = {
-            DmaType.FLOOR: self._single_tile(chunks, DmaType.FLOOR),
-            DmaType.WALL: self._single_tile(chunks, DmaType.WALL),
-            DmaType.WATER: self._single_tile(chunks, DmaType.WATER),
+            DmaType.FLOOR: self._single_tile(self._chunks, DmaType.FLOOR),
+            DmaType.WALL: self._single_tile(self._chunks, DmaType.WALL),
+            DmaType.WATER: self._single_tile(self._chunks, DmaType.WATER),
         }
 
     def get_background(self) -> Optional[cairo.Surface]:
         return None
 
     def get_dungeon(self, rules: list[list[int]]) -> cairo.Surface:
-        # TODO: If rules change only update the parts that need to be updated
         if rules != self._cached_rules:
-            mappings = self.dma_drawer.get_mappings_for_rules(
-                rules, treat_outside_as_wall=True, variation_index=0
-            )
-            self._cached_dungeon_surface = pil_to_cairo_surface(
-                self.dma_drawer.draw(mappings, self.dpci, self.dpc, self.dpl, None)[
-                    0
-                ].convert("RGBA")
-            )
-            self._cached_rules = rules
+            dirty = self.dirty_cells(self._cached_rules, rules)
+            if dirty is None or self._cached_dungeon_surface is None:
+                self._cached_mappings = self.dma_drawer.get_mappings_for_rules(
+                    rules, treat_outside_as_wall=True, variation_index=0
+                )
+                self._cached_dungeon_surface = pil_to_cairo_surface(
+                    self.dma_drawer.draw(
+                        self._cached_mappings, self.dpci, self.dpc, self.dpl, None
+                    )[0].convert("RGBA")
+                )
+            else:
+                # Only the neighborhood of the changed tiles is rendered again.
+                changed = self.update_mappings(
+                    self.dma_drawer, rules, self._cached_mappings, dirty
+                )
+                self.paint_chunks(
+                    self._cached_dungeon_surface, changed, self._chunk_surface
+                )
+            self._cached_rules = self.copy_rules(rules)
         assert self._cached_dungeon_surface is not None
         return self._cached_dungeon_surface
 
@@ -71,10 +82,19 @@ class FixedFloorDrawerTileset(AbstractTilesetRenderer):
         return self.single_tiles[tile]
 
     def _single_tile(self, chunks, type):
-        index = self.dma.get(type, False)[0]
+        return self._single_tile_at(chunks, self.dma.get(type, False)[0])
+
+    def _single_tile_at(self, chunks, index: int):
         chunk_dim = DPC_TILING_DIM * DPCI_TILE_DIM
         return pil_to_cairo_surface(
             chunks.crop(
                 (0, index * chunk_dim, chunk_dim, index * chunk_dim + chunk_dim)
             ).convert("RGBA")
         )
+
+    def _chunk_surface(self, chunk_index: int) -> cairo.ImageSurface:
+        if chunk_index not in self._chunk_surfaces:
+            self._chunk_surfaces[chunk_index] = self._single_tile_at(
+                self._chunks, chunk_index
+            )
+        return self._chunk_surfaces[chunk_index]
@@ -0,0 +1,313 @@
+"""Generation of random dungeon floor previews outside of the GTK main thread."""
+
+#  Copyright 2020-2024 Capypara and the SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+
+import random
+import threading
+import typing
+from types import SimpleNamespace
+from typing import Any, Callable, NamedTuple, Optional, Union
+
+from gi.repository import GLib
+from skytemple_files.common.dungeon_floor_generator.generator import (
+    DungeonFloorGenerator,
+    RandomGenProperties,
+    RoomType,
+    Tile,
+    TileType,
+)
+from skytemple_files.common.ppmdu_config.dungeon_data import Pmd2DungeonItemCategory
+from skytemple_files.dungeon_data.mappa_bin.protocol import (
+    GUARANTEED,
+    POKE_ID,
+    MappaFloorLayoutProtocol,
+    MappaFloorProtocol,
+)
+
+from skytemple.core.lru_cache import SizeBoundedLruCache
+
+PREVIEW_CACHE_ENTRIES = 64
+KECLEON_MD_INDEX = [383, 983]
+# Item category of Poké (money)
+POKE_CATEGORY_ID = 6
+# Layout values the generator depends on, the seed and whether the UnusedDungeonChance patch is applied.
+PreviewKey = tuple[tuple[Any, ...], int, bool]
+# The generated floor (None if the generator gave up) and the state of the RNG after generating it.
+PreviewResult = tuple[Optional[list[Tile]], Any]
+
+# The floor generator keeps its state in class attributes, only one floor can be generated at a time.
+floor_generator_lock = threading.Lock()
+_preview_cache: SizeBoundedLruCache[PreviewKey, PreviewResult] = SizeBoundedLruCache(
+    PREVIEW_CACHE_ENTRIES, lambda _: 1
+)
+
+
+# The attributes of the floor layout (and its terrain settings) read by the floor generator.
+GENERATOR_LAYOUT_ATTRS = (
+    "structure",
+    "room_density",
+    "floor_connectivity",
+    "initial_enemy_density",
+    "kecleon_shop_chance",
+    "monster_house_chance",
+    "unused_chance",
+    "dead_ends",
+    "secondary_terrain",
+    "extra_hallway_density",
+    "item_density",
+    "buried_item_density",
+    "trap_density",
+    "water_density",
+)
+GENERATOR_TERRAIN_SETTINGS_ATTRS = (
+    "has_secondary_terrain",
+    "unk1",
+    "generate_imperfect_rooms",
+    "unk3",
+    "unk4",
+    "unk5",
+    "unk6",
+    "unk7",
+)
+
+
+def layout_values(layout: MappaFloorLayoutProtocol) -> tuple[Any, ...]:
+    """The values of the layout the floor generator depends on."""
+    return tuple(getattr(layout, a) for a in GENERATOR_LAYOUT_ATTRS) + tuple(
+        getattr(layout.terrain_settings, a) for a in GENERATOR_TERRAIN_SETTINGS_ATTRS
+    )
+
+
+def layout_from_values(values: tuple[Any, ...]) -> MappaFloorLayoutProtocol:
+    """
+    Builds a stand-in layout for the floor generator from the result of layout_values.
+    Only the attributes the generator reads are set.
+    """
+    n = len(GENERATOR_LAYOUT_ATTRS)
+    layout = SimpleNamespace(**dict(zip(GENERATOR_LAYOUT_ATTRS, values[:n])))
+    layout.terrain_settings = SimpleNamespace(
+        **dict(zip(GENERATOR_TERRAIN_SETTINGS_ATTRS, values[n:]))
+    )
+    return typing.cast(MappaFloorLayoutProtocol, layout)
+
+
+def preview_key(
+    layout: MappaFloorLayoutProtocol, seed: int, patch_applied: bool
+) -> PreviewKey:
+    return layout_values(layout), seed, patch_applied
+
+
+class SpawnTables(NamedTuple):
+    """The spawn lists of a floor, as needed to pick the entities of generated floors."""
+
+    # (md_index, main spawn weight, Monster House spawn weight)
+    monsters: tuple[tuple[int, int, int], ...]
+    floor_categories: dict[int, int]
+    floor_items: dict[int, int]
+    buried_categories: dict[int, int]
+    buried_items: dict[int, int]
+    traps: dict[int, int]
+    # Items (valid in mappa) of each item category
+    category_items: dict[int, frozenset[int]]
+
+    @classmethod
+    def from_floor(
+        cls,
+        floor: MappaFloorProtocol,
+        item_categories: dict[int, Pmd2DungeonItemCategory],
+    ) -> SpawnTables:
+        return cls(
+            tuple(
+                (m.md_index, m.main_spawn_weight, m.monster_house_spawn_weight)
+                for m in floor.monsters
+            ),
+            dict(floor.floor_items.categories),
+            dict(floor.floor_items.items),
+            dict(floor.buried_items.categories),
+            dict(floor.buried_items.items),
+            dict(floor.traps.weights),
+            {c: frozenset(cat.item_ids()) for c, cat in item_categories.items()},
+        )
+
+
+class SampledEntity(NamedTuple):
+    tile: Tile
+    # Entity, item or trap ID spawned on the tile, if any
+    idx: Optional[int]
+    # Item category of spawned items
+    category: Optional[int]
+    # Whether the spawn lists were invalid and a fallback entity was used
+    fallback: bool
+
+
+def sample_entities(
+    floor: list[Tile], rng: random.Random, tables: SpawnTables, player_idx: int
+) -> list[SampledEntity]:
+    """Picks the entities spawned on each tile of a generated floor, like the game would."""
+    entities = []
+    open_guaranteed_floor = {
+        x for x, y in tables.floor_items.items() if y == GUARANTEED
+    }
+    open_guaranteed_buried = {
+        x for x, y in tables.buried_items.items() if y == GUARANTEED
+    }
+    for x in floor:
+        idx: Optional[int] = None
+        category: Optional[int] = None
+        invalid = False
+        if x.typ == TileType.PLAYER_SPAWN:
+            idx = player_idx
+        if x.typ == TileType.ENEMY:
+            ridx = rng.randrange(0, 10000)
+            idx = KECLEON_MD_INDEX[0]  # fallback
+            invalid = True
+            for md_index, main_weight, mh_weight in tables.monsters:
+                spawn_weight = (
+                    mh_weight if x.room_type == RoomType.MONSTER_HOUSE else main_weight
+                )
+                if spawn_weight > ridx and spawn_weight != 0:
+                    idx = md_index
+                    invalid = False
+                    break
+        if x.typ == TileType.ITEM and len(open_guaranteed_floor) > 0:
+            idx = open_guaranteed_floor.pop()
+        if x.typ == TileType.BURIED_ITEM and len(open_guaranteed_buried) > 0:
+            idx = open_guaranteed_buried.pop()
+        if x.typ == TileType.ITEM or x.typ == TileType.BURIED_ITEM:
+            ridx_cat = rng.randrange(0, 10000)
+            ridx_itm = rng.randrange(0, 10000)
+            category = POKE_CATEGORY_ID  # fallback
+            idx = POKE_ID  # fallback
+            invalid_cat = True
+            invalid_itm = True
+            if x.typ == TileType.BURIED_ITEM:
+                categories, items = tables.buried_categories, tables.buried_items
+            else:
+                categories, items = tables.floor_categories, tables.floor_items
+            for c, prop in categories.items():
+                if prop > ridx_cat and prop != 0:
+                    category = c
+                    invalid_cat = False
+                    break
+            category_items = tables.category_items[category]
+            for itm, prop in items.items():
+                if (
+                    prop > ridx_itm
+                    and prop != GUARANTEED
+                    and (prop != 0)
+                    and (itm in category_items)
+                ):
+                    idx = itm
+                    invalid_itm = False
+                    break
+            invalid = invalid_cat or invalid_itm
+        if x.typ == TileType.TRAP:
+            ridx = rng.randrange(0, 10000)
+            idx = 0  # fallback
+            invalid = True
+            for trap, weight in tables.traps.items():
+                if weight > ridx and weight != 0:
+                    idx = trap
+                    invalid = False
+                    break
+        entities.append(SampledEntity(x, idx, category, invalid))
+    return entities
+
+
+def generate_floor(
+    layout: MappaFloorLayoutProtocol, seed: int, patch_applied: bool
+) -> PreviewResult:
+    """Generates a floor (blocking). Thread-safe."""
+    rng = random.Random(seed)
+    with floor_generator_lock:
+        floor = typing.cast(
+            Optional[list[Tile]],
+            DungeonFloorGenerator(
+                unknown_dungeon_chance_patch_applied=patch_applied,
+                gen_properties=RandomGenProperties.default(rng),
+            ).generate(layout, max_retries=3, flat=True),
+        )
+    return floor, rng.getstate()
+
+
+class FloorPreviewGenerator:
+    """
+    Generates floor previews in a worker thread. Only the most recent request is generated: Requests made
+    while a floor is generated replace each other, and results of outdated requests are dropped.
+    A generation that is already running can not be interrupted, since the generator has no way to do that.
+
+    The callback is called on the GTK main thread with either the result or the exception raised.
+    """
+
+    def __init__(self, callback: Callable[[Union[PreviewResult, Exception]], None]):
+        self._callback = callback
+        self._lock = threading.Lock()
+        self._pending: Optional[tuple[int, PreviewKey]] = None
+        self._running = False
+        self._token = 0
+        self._destroyed = False
+
+    def request(self, layout: MappaFloorLayoutProtocol, seed: int, patch_applied: bool):
+        """Requests a preview, superseding all previous requests."""
+        key = preview_key(layout, seed, patch_applied)
+        with self._lock:
+            self._token += 1
+            cached = _preview_cache.get(key)
+            if cached is not None:
+                self._pending = None
+                GLib.idle_add(self._deliver, self._token, cached)
+                return
+            # Only the key is passed on: The layout may be changed on the GTK thread while the floor is
+            # generated, the worker generates from a snapshot of it (see layout_from_values).
+            self._pending = (self._token, key)
+            if not self._running:
+                self._running = True
+                threading.Thread(target=self._run, daemon=True).start()
+
+    def cancel(self):
+        """Drops the pending request and the result of the running one."""
+        with self._lock:
+            self._token += 1
+            self._pending = None
+
+    def destroy(self):
+        self.cancel()
+        self._destroyed = True
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if self._pending is None:
+                    self._running = False
+                    return
+                token, key = self._pending
+                self._pending = None
+            result: Union[PreviewResult, Exception]
+            try:
+                values, seed, patch_applied = key
+                result = generate_floor(layout_from_values(values), seed, patch_applied)
+                _preview_cache.put(key, result)
+            except Exception as ex:
+                result = ex
+            GLib.idle_add(self._deliver, token, result)
+
+    def _deliver(self, token: int, result: Union[PreviewResult, Exception]):
+        if not self._destroyed and token == self._token:
+            self._callback(result)
+        return False
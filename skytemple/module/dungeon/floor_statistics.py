@@ -0,0 +1,223 @@
+"""Statistics over many randomly generated dungeon floors, computed in worker processes."""
+
+#  Copyright 2020-2024 Capypara and the SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+
+import copy
+import dataclasses
+import multiprocessing
+import os
+import random
+import threading
+import typing
+from collections import Counter
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+from gi.repository import GLib
+from skytemple_files.common.dungeon_floor_generator.generator import (
+    RoomType,
+    TileType,
+)
+from skytemple_files.dungeon_data.mappa_bin.protocol import MappaFloorLayoutProtocol
+
+from skytemple.module.dungeon.floor_preview import (
+    SpawnTables,
+    generate_floor,
+    layout_from_values,
+    layout_values,
+    sample_entities,
+)
+
+# Number of floors generated by a worker process before reporting back.
+BATCH_SIZE = 20
+NO_ROOM = 255
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+@dataclasses.dataclass
+class FloorStatistics:
+    floors: int = 0
+    # Floors the generator gave up on. The game generates a floor-wide Monster House instead.
+    failures: int = 0
+    rooms: int = 0
+    monster_house_floors: int = 0
+    kecleon_shop_floors: int = 0
+    monsters: Counter[int] = dataclasses.field(default_factory=Counter)
+    item_categories: Counter[int] = dataclasses.field(default_factory=Counter)
+    buried_item_categories: Counter[int] = dataclasses.field(default_factory=Counter)
+    traps: Counter[int] = dataclasses.field(default_factory=Counter)
+    monster_fallbacks: int = 0
+    item_fallbacks: int = 0
+    trap_fallbacks: int = 0
+
+    @property
+    def valid_floors(self) -> int:
+        return self.floors - self.failures
+
+    def merge(self, other: FloorStatistics):
+        for field in dataclasses.fields(self):
+            setattr(
+                self, field.name, getattr(self, field.name) + getattr(other, field.name)
+            )
+
+
+def simulate_floors(
+    values: tuple[Any, ...], patch_applied: bool, tables: SpawnTables, seeds: list[int]
+) -> FloorStatistics:
+    """Generates a floor for each seed and collects statistics about them. Run in worker processes."""
+    layout = layout_from_values(values)
+    stats = FloorStatistics()
+    for seed in seeds:
+        stats.floors += 1
+        floor, rng_state = generate_floor(layout, seed, patch_applied)
+        if floor is None:
+            stats.failures += 1
+            continue
+        rng = random.Random()
+        rng.setstate(rng_state)
+        rooms = set()
+        has_monster_house = False
+        has_kecleon_shop = False
+        for entity in sample_entities(floor, rng, tables, 0):
+            tile = entity.tile
+            if tile.room_index != NO_ROOM:
+                rooms.add(tile.room_index)
+            if tile.room_type == RoomType.MONSTER_HOUSE:
+                has_monster_house = True
+            elif tile.room_type == RoomType.KECLEON_SHOP:
+                has_kecleon_shop = True
+            if tile.typ == TileType.ENEMY:
+                stats.monsters[typing.cast(int, entity.idx)] += 1
+                stats.monster_fallbacks += entity.fallback
+            elif tile.typ == TileType.ITEM:
+                stats.item_categories[typing.cast(int, entity.category)] += 1
+                stats.item_fallbacks += entity.fallback
+            elif tile.typ == TileType.BURIED_ITEM:
+                stats.buried_item_categories[typing.cast(int, entity.category)] += 1
+                stats.item_fallbacks += entity.fallback
+            elif tile.typ == TileType.TRAP:
+                stats.traps[typing.cast(int, entity.idx)] += 1
+                stats.trap_fallbacks += entity.fallback
+        stats.rooms += len(rooms)
+        stats.monster_house_floors += has_monster_house
+        stats.kecleon_shop_floors += has_kecleon_shop
+    return stats
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    # The pool is kept around, starting the worker processes takes a while.
+    # "spawn" is used, since forking a process running GTK (and threads) is not safe.
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _discard_pool():
+    global _pool
+    with _pool_lock:
+        _pool = None
+
+
+class FloorStatisticsRunner:
+    """
+    Generates many floors on all CPU cores and collects statistics about them.
+    Partial results are passed to `on_progress(stats, done, total)` on the GTK main thread while the
+    floors are generated, and finally `on_finished(stats)` or `on_error(exception)` is called.
+    """
+
+    def __init__(
+        self,
+        on_progress: Callable[[FloorStatistics, int, int], None],
+        on_finished: Callable[[FloorStatistics], None],
+        on_error: Callable[[BaseException], None],
+    ):
+        self._on_progress = on_progress
+        self._on_finished = on_finished
+        self._on_error = on_error
+        self._token = 0
+        self._futures: list[Future] = []
+
+    def start(
+        self,
+        layout: MappaFloorLayoutProtocol,
+        tables: SpawnTables,
+        patch_applied: bool,
+        seed: int,
+        count: int,
+    ):
+        """Starts a new run, cancelling the current one."""
+        self.cancel()
+        rng = random.Random(seed)
+        seeds = [rng.randrange(1 << 32) for _ in range(count)]
+        values = layout_values(layout)
+        pool = _get_pool()
+        self._futures = [
+            pool.submit(
+                simulate_floors,
+                values,
+                patch_applied,
+                tables,
+                seeds[i : i + BATCH_SIZE],
+            )
+            for i in range(0, count, BATCH_SIZE)
+        ]
+        threading.Thread(
+            target=self._collect, args=(self._token, self._futures, count), daemon=True
+        ).start()
+
+    def cancel(self):
+        """Cancels the floors not generated yet. Results of the current run are no longer reported."""
+        self._token += 1
+        for future in self._futures:
+            future.cancel()
+        self._futures = []
+
+    def _collect(self, token: int, futures: list[Future], total: int):
+        stats = FloorStatistics()
+        try:
+            for future in as_completed(futures):
+                if token != self._token:
+                    return
+                stats.merge(future.result())
+                GLib.idle_add(
+                    self._deliver,
+                    token,
+                    self._on_progress,
+                    copy.deepcopy(stats),
+                    stats.floors,
+                    total,
+                )
+            GLib.idle_add(self._deliver, token, self._on_finished, stats)
+        except Exception as ex:
+            if isinstance(ex, BrokenProcessPool):
+                _discard_pool()
+            GLib.idle_add(self._deliver, token, self._on_error, ex)
+
+    def _deliver(self, token: int, cb: Callable, *args):
+        if token == self._token:
+            cb(*args)
+        return False
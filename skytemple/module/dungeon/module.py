@@ -165,6 +165,10 @@ class DungeonModule(AbstractModule):
     def sort_order(cls):
         return 210
 
+    @classmethod
+    def lazy_tree_root(cls):
+        return ICON_ROOT, DUNGEONS_NAME
+
     def __init__(self, rom_project: RomProject):
         self._errored: Union[Literal[False], tuple] = False
         try:
@@ -20,14 +20,14 @@ import logging
 import random
 import re
 import sys
+import time
 import traceback
 import typing
 from enum import Enum
 from functools import partial
-from itertools import zip_longest
 from typing import TYPE_CHECKING, cast
 from xml.etree import ElementTree
-from gi.repository import Gtk, GLib, GdkPixbuf
+from gi.repository import Gtk, GLib
 from range_typed_integers import (
     u8,
     u8_checked,
@@ -42,7 +42,7 @@ from skytemple_files.common.types.file_types import FileType
 from skytemple.controller.main import MainController
 from skytemple.core.canvas_scale import CanvasScale
 from skytemple.core.error_handler import display_error
-from skytemple.core.list_icon_renderer import ListIconRenderer
+from skytemple.core.list_icon_renderer import ListIconRenderer, get_sprite_pixbuf
 from skytemple.core.message_dialog import SkyTempleMessageDialog
 from skytemple.core.open_request import (
     OpenRequest,
@@ -61,6 +61,18 @@ from skytemple.core.ui_utils import (
 )
 from skytemple.module.dungeon import COUNT_VALID_TILESETS, TILESET_FIRST_BG
 from skytemple.module.dungeon.fixed_room_drawer import FixedRoomDrawer
+from skytemple.module.dungeon.floor_preview import (
+    KECLEON_MD_INDEX,
+    POKE_CATEGORY_ID,
+    FloorPreviewGenerator,
+    PreviewResult,
+    SpawnTables,
+    sample_entities,
+)
+from skytemple.module.dungeon.floor_statistics import (
+    FloorStatistics,
+    FloorStatisticsRunner,
+)
 from skytemple.module.dungeon.fixed_room_entity_renderer.full_map import (
     FullMapEntityRenderer,
 )
@@ -78,13 +90,10 @@ from skytemple.module.dungeon.fixed_room_tileset_renderer.tileset import (
 )
 from skytemple.module.dungeon.minimap_provider import MinimapProvider
 from skytemple_files.common.dungeon_floor_generator.generator import (
-    DungeonFloorGenerator,
     SIZE_X,
     SIZE_Y,
     Tile,
     TileType,
-    RandomGenProperties,
-    RoomType,
 )
 from skytemple_files.common.util import add_extension_if_missing
 from skytemple_files.common.xml_util import prettify
@@ -101,7 +110,6 @@ from skytemple_files.dungeon_data.mappa_bin.protocol import (
     Probability,
     GUARANTEED,
     MAX_ITEM_ID,
-    POKE_ID,
     DUMMY_MD_INDEX,
     MappaTrapType,
     MappaFloorProtocol,
@@ -118,7 +126,6 @@ if TYPE_CHECKING:
 
 COUNT_VALID_BGM = 118
 COUNT_VALID_FIXED_FLOORS = 256
-KECLEON_MD_INDEX = [383, 983]
 CB = "cb_"
 CB_TERRAIN_SETTINGS = "cb_terrain_settings__"
 ENTRY = "entry_"
@@ -126,11 +133,13 @@ ENTRY_TERRAIN_SETTINGS = "entry_terrain_settings__"
 SCALE = "scale_"
 PATTERN_MD_ENTRY = re.compile(".*\\(#(\\d+)\\).*")
 CSS_HEADER_COLOR = "dungeon_editor_column_header_invalid"
-POKE_CATEGORY_ID = 6
 LINKBOX_CATEGORY_ID = 10
 # This is the normal item ID of the link box
 # TODO: Have a way to configure this
 LINKBOX_ITEM_ID = 362
+# The loading indicator is only shown if generating a preview takes longer than this.
+PREVIEW_LOADING_DELAY_MS = 250
+PREVIEW_TIMEOUT_S = 5
 logger = logging.getLogger(__name__)
 
 
@@ -402,6 +411,14 @@ class StDungeonFloorPage(Gtk.Box):
     fixed_draw: Gtk.DrawingArea = cast(Gtk.DrawingArea, Gtk.Template.Child())
     preview_error: Gtk.Box = cast(Gtk.Box, Gtk.Template.Child())
     preview_error_infinite: Gtk.Box = cast(Gtk.Box, Gtk.Template.Child())
+    preview_loading: Gtk.Box = cast(Gtk.Box, Gtk.Template.Child())
+    preview_loading_label: Gtk.Label = cast(Gtk.Label, Gtk.Template.Child())
+    stats_floor_count: Gtk.SpinButton = cast(Gtk.SpinButton, Gtk.Template.Child())
+    btn_stats_run: Gtk.Button = cast(Gtk.Button, Gtk.Template.Child())
+    btn_stats_cancel: Gtk.Button = cast(Gtk.Button, Gtk.Template.Child())
+    btn_help_stats: Gtk.Button = cast(Gtk.Button, Gtk.Template.Child())
+    stats_progress: Gtk.ProgressBar = cast(Gtk.ProgressBar, Gtk.Template.Child())
+    stats_store: Gtk.ListStore = cast(Gtk.ListStore, Gtk.Template.Child())
     monster_spawns_tree: Gtk.TreeView = cast(Gtk.TreeView, Gtk.Template.Child())
     cr_monster_spawns_entity: Gtk.CellRendererText = cast(
         Gtk.CellRendererText, Gtk.Template.Child()
@@ -558,6 +575,12 @@ class StDungeonFloorPage(Gtk.Box):
         self._draw: Gtk.DrawingArea | None = None
         self.drawer: FixedRoomDrawer | None = None
         self._refresh_timer: int | None = None
+        self._preview_generator = FloorPreviewGenerator(self._on_floor_generated)
+        self._preview_timer: int | None = None
+        self._preview_started = 0.0
+        self._stats_runner = FloorStatisticsRunner(
+            self._on_stats_progress, self._on_stats_finished, self._on_stats_error
+        )
         self._loading = False
         self._string_provider = module.project.get_string_provider()
         self._sprite_provider = module.project.get_sprite_provider()
@@ -632,6 +655,11 @@ class StDungeonFloorPage(Gtk.Box):
 
     @Gtk.Template.Callback()
     def on_self_destroy(self, *args):
+        self._preview_generator.destroy()
+        self._stats_runner.cancel()
+        if self._preview_timer is not None:
+            GLib.source_remove(self._preview_timer)
+            self._preview_timer = None
         # Try to destroy all top-level widgets outside of the template to not leak memory.
         safe_destroy(self.dialog_category_add)
         safe_destroy(self.chance_label1)
@@ -1709,21 +1737,52 @@ class StDungeonFloorPage(Gtk.Box):
             self.drawer.set_draw_tile_grid(self.tool_scene_grid.get_active())
 
     def _generate_floor(self):
-        stack: Gtk.Stack = self.preview_stack
+        """Requests a new preview. The floor is generated in the background, see _on_floor_generated."""
+        self._preview_generator.request(
+            self.entry.layout,
+            self._get_seed(),
+            self.module.project.is_patch_applied("UnusedDungeonChance"),
+        )
+        self._preview_started = time.monotonic()
+        if self._preview_timer is None:
+            self._preview_timer = GLib.timeout_add(
+                PREVIEW_LOADING_DELAY_MS, self._on_preview_timer
+            )
+
+    def _get_seed(self) -> int:
         try:
-            try:
-                rng = random.Random(int(self.tool_entry_seed.get_text()))
-            except ValueError:
-                rng = random.Random(hash(self.tool_entry_seed.get_text()))
-            floor = typing.cast(
-                list[Tile],
-                DungeonFloorGenerator(
-                    unknown_dungeon_chance_patch_applied=self.module.project.is_patch_applied(
-                        "UnusedDungeonChance"
-                    ),
-                    gen_properties=RandomGenProperties.default(rng),
-                ).generate(self.entry.layout, max_retries=3, flat=True),
+            return int(self.tool_entry_seed.get_text())
+        except ValueError:
+            return hash(self.tool_entry_seed.get_text())
+
+    def _on_preview_timer(self):
+        """Shows the loading page while the generation of the preview takes a noticeable amount of time."""
+        if time.monotonic() - self._preview_started >= PREVIEW_TIMEOUT_S:
+            self.preview_loading_label.set_text(
+                _(
+                    "Generating the floor takes unusually long.\nThe current settings may not be able to generate valid floors."
+                )
             )
+        else:
+            self.preview_loading_label.set_text(_("Generating preview..."))
+        self.preview_stack.set_visible_child(self.preview_loading)
+        return True
+
+    def _on_floor_generated(self, result: PreviewResult | Exception):
+        if self._preview_timer is not None:
+            GLib.source_remove(self._preview_timer)
+            self._preview_timer = None
+        if isinstance(result, Exception):
+            self._show_preview_error(result)
+            return
+        floor, rng_state = result
+        rng = random.Random()
+        rng.setstate(rng_state)
+        self._show_generated_floor(floor, rng)
+
+    def _show_generated_floor(self, floor: list[Tile] | None, rng: random.Random):
+        stack: Gtk.Stack = self.preview_stack
+        try:
             if floor is None:
                 stack.set_visible_child(self.preview_error_infinite)
                 return
@@ -1736,90 +1795,32 @@ class StDungeonFloorPage(Gtk.Box):
             )
             actions: list[FixedFloorActionRule] = []
             warnings = set()
-            open_guaranteed_floor = {
-                x for x, y in self.entry.floor_items.items.items() if y == GUARANTEED
-            }
-            open_guaranteed_buried = {
-                x for x, y in self.entry.buried_items.items.items() if y == GUARANTEED
-            }
-            for x in floor:
-                idx = None
-                if x.typ == TileType.PLAYER_SPAWN:
-                    idx = self._sprite_provider.get_standin_entities()[0]
-                if x.typ == TileType.ENEMY:
-                    ridx = rng.randrange(0, 10000)
-                    last = u16(KECLEON_MD_INDEX[0])  # fallback
-                    invalid = True
-                    for m in self.entry.monsters:
-                        spawn_weight = (
-                            m.monster_house_spawn_weight
-                            if x.room_type == RoomType.MONSTER_HOUSE
-                            else m.main_spawn_weight
-                        )
-                        if spawn_weight > ridx and spawn_weight != 0:
-                            last = m.md_index
-                            invalid = False
-                            break
-                    if invalid:
+            for entity in sample_entities(
+                floor,
+                rng,
+                SpawnTables.from_floor(self.entry, item_cats),
+                self._sprite_provider.get_standin_entities()[0],
+            ):
+                if entity.fallback:
+                    if entity.tile.typ == TileType.ENEMY:
                         warnings.add(
                             _(
                                 "Warning: Some Pokémon spawns may be invalid. Kecleons will been spawned instead."
                             )
                         )
-                    idx = last
-                if x.typ == TileType.ITEM and len(open_guaranteed_floor) > 0:
-                    idx = open_guaranteed_floor.pop()
-                if x.typ == TileType.BURIED_ITEM and len(open_guaranteed_buried) > 0:
-                    idx = open_guaranteed_buried.pop()
-                if x.typ == TileType.ITEM or x.typ == TileType.BURIED_ITEM:
-                    ridx_cat = rng.randrange(0, 10000)
-                    ridx_itm = rng.randrange(0, 10000)
-                    last_cat = POKE_CATEGORY_ID  # fallback
-                    last_item = POKE_ID  # fallback
-                    invalid_cat = True
-                    invalid_itm = True
-                    item_list = self.entry.floor_items
-                    if x.typ == TileType.BURIED_ITEM:
-                        item_list = self.entry.buried_items
-                    for c, prop in item_list.categories.items():
-                        if prop > ridx_cat and prop != 0:
-                            last_cat = c
-                            invalid_cat = False
-                            break
-                    for itm, prop in item_list.items.items():
-                        if (
-                            prop > ridx_itm
-                            and prop != GUARANTEED
-                            and (prop != 0)
-                            and (itm in item_cats[last_cat].item_ids())
-                        ):
-                            last_item = itm
-                            invalid_itm = False
-                            break
-                    if invalid_cat or invalid_itm:
+                    elif entity.tile.typ == TileType.TRAP:
                         warnings.add(
                             _(
-                                "Warning: Some Item spawns may be invalid. Poké will been spawned instead."
+                                "Warning: Some traps spawns may be invalid. Unused traps will been spawned instead."
                             )
                         )
-                    idx = last_item
-                if x.typ == TileType.TRAP:
-                    ridx = rng.randrange(0, 10000)
-                    last = u16(0)  # fallback
-                    invalid = True
-                    for trap, weight in self.entry.traps.weights.items():
-                        if weight > ridx and weight != 0:
-                            last = trap
-                            invalid = False
-                            break
-                    if invalid:
+                    else:
                         warnings.add(
                             _(
-                                "Warning: Some traps spawns may be invalid. Unused traps will been spawned instead."
+                                "Warning: Some Item spawns may be invalid. Poké will been spawned instead."
                             )
                         )
-                    idx = last
-                actions.append(DirectRule(x, idx))
+                actions.append(DirectRule(entity.tile, entity.idx))
             if self.drawer is not None:
                 self.drawer.fixed_floor = FixedFloor.new(
                     u16(SIZE_Y), u16(SIZE_X), actions
@@ -1837,14 +1838,15 @@ class StDungeonFloorPage(Gtk.Box):
                 self.tool_label_info.set_text("\n".join(warnings))
             self._update_scales()
         except Exception as ex:
-            logger.error("Preview loading error", exc_info=ex)
-            tb: Gtk.TextBuffer = self.preview_error_buffer
-            tb.set_text(
-                "".join(
-                    traceback.format_exception(type(ex), value=ex, tb=ex.__traceback__)
-                )
-            )
-            stack.set_visible_child(self.preview_error)
+            self._show_preview_error(ex)
+
+    def _show_preview_error(self, ex: Exception):
+        logger.error("Preview loading error", exc_info=ex)
+        tb: Gtk.TextBuffer = self.preview_error_buffer
+        tb.set_text(
+            "".join(traceback.format_exception(type(ex), value=ex, tb=ex.__traceback__))
+        )
+        self.preview_stack.set_visible_child(self.preview_error)
 
     def _init_tileset(self):
         assert self.drawer is not None
@@ -1898,6 +1900,123 @@ class StDungeonFloorPage(Gtk.Box):
             )
         )
 
+    @Gtk.Template.Callback()
+    def on_btn_stats_run_clicked(self, *args):
+        item_cats = (
+            self.module.project.get_rom_module()
+            .get_static_data()
+            .dungeon_data.item_categories
+        )
+        self.stats_store.clear()
+        self.stats_progress.set_fraction(0)
+        self.stats_progress.set_text(_("Starting..."))
+        self.btn_stats_run.set_sensitive(False)
+        self.btn_stats_cancel.set_sensitive(True)
+        self._stats_runner.start(
+            self.entry.layout,
+            SpawnTables.from_floor(self.entry, item_cats),
+            self.module.project.is_patch_applied("UnusedDungeonChance"),
+            self._get_seed(),
+            self.stats_floor_count.get_value_as_int(),
+        )
+
+    @Gtk.Template.Callback()
+    def on_btn_stats_cancel_clicked(self, *args):
+        self._stats_runner.cancel()
+        self.stats_progress.set_text(_("Cancelled"))
+        self._stats_done()
+
+    @Gtk.Template.Callback()
+    def on_btn_help_stats_clicked(self, *args):
+        self._help(
+            _(
+                "Generates the floor with the current settings many times, using all CPU cores, and shows statistics about the generated floors. The seeds are derived from the seed of the layout preview.\n"
+                "Averages are per floor that could be generated. Floors the generator failed to generate are replaced with a floor-wide Monster House by the game.\n"
+                "Fallback spawns are spawned if the spawn lists don't pick any entry, like the preview they might not be 100% accurate."
+            )
+        )
+
+    def _on_stats_progress(self, stats: FloorStatistics, done: int, total: int):
+        self.stats_progress.set_fraction(done / total)
+        self.stats_progress.set_text(f"{done}/{total}")
+        self._show_stats(stats)
+
+    def _on_stats_finished(self, stats: FloorStatistics):
+        self._show_stats(stats)
+        self._stats_done()
+
+    def _on_stats_error(self, ex: BaseException):
+        self._stats_done()
+        display_error(
+            (type(ex), ex, ex.__traceback__),
+            _("Generating the floor statistics failed."),
+        )
+
+    def _stats_done(self):
+        self.btn_stats_run.set_sensitive(True)
+        self.btn_stats_cancel.set_sensitive(False)
+
+    def _show_stats(self, stats: FloorStatistics):
+        item_cats = (
+            self.module.project.get_rom_module()
+            .get_static_data()
+            .dungeon_data.item_categories
+        )
+        valid = stats.valid_floors
+
+        def per_floor(n: int) -> str:
+            return f"{n / valid:.2f}" if valid > 0 else "-"
+
+        def percent(n: int, of: int) -> str:
+            return f"{n / of * 100:.1f}%" if of > 0 else "-"
+
+        monsters = sum(stats.monsters.values())
+        items = sum(stats.item_categories.values())
+        buried = sum(stats.buried_item_categories.values())
+        traps = sum(stats.traps.values())
+        rows = [
+            (_("Floors generated"), str(stats.floors)),
+            (_("Failed generations"), percent(stats.failures, stats.floors)),
+            (_("Rooms per floor"), per_floor(stats.rooms)),
+            (
+                _("Floors with Monster House"),
+                percent(stats.monster_house_floors, valid),
+            ),
+            (_("Floors with Kecleon Shop"), percent(stats.kecleon_shop_floors, valid)),
+            (_("Pokémon per floor"), per_floor(monsters)),
+            (_("Kecleon fallback spawns"), percent(stats.monster_fallbacks, monsters)),
+            (_("Items per floor"), per_floor(items)),
+            (_("Buried items per floor"), per_floor(buried)),
+            (_("Poké fallback spawns"), percent(stats.item_fallbacks, items + buried)),
+            (_("Traps per floor"), per_floor(traps)),
+            (_("Trap fallback spawns"), percent(stats.trap_fallbacks, traps)),
+        ]
+        for md_index, n in stats.monsters.most_common():
+            name = self._ent_names.get(md_index, f"#{md_index:03}")
+            rows.append((f(_("Pokémon: {name}")), percent(n, monsters)))
+        for category, n in stats.item_categories.most_common():
+            name = (
+                item_cats[category].name_localized
+                if category in item_cats
+                else str(category)
+            )
+            rows.append((f(_("Items: {name}")), percent(n, items)))
+        for category, n in stats.buried_item_categories.most_common():
+            name = (
+                item_cats[category].name_localized
+                if category in item_cats
+                else str(category)
+            )
+            rows.append((f(_("Buried items: {name}")), percent(n, buried)))
+        for trap_id, n in stats.traps.most_common():
+            name = self._string_provider.get_value(
+                StringType.TRAP_NAMES, MappaTrapType(trap_id).value
+            )
+            rows.append((f(_("Traps: {name}")), percent(n, traps)))
+        self.stats_store.clear()
+        for row in rows:
+            self.stats_store.append(row)
+
     # </editor-fold>
 
     @Gtk.Template.Callback()
@@ -2515,22 +2634,7 @@ class StDungeonFloorPage(Gtk.Box):
             0,
             lambda: GLib.idle_add(partial(self._reload_icon, entid, idx, was_loading)),
         )
-        data = bytes(sprite.get_data())
-        # this is painful.
-        new_data = bytearray()
-        for b, g, r, a in grouper(data, 4):
-            new_data += bytes([r, g, b, a])
-        # todo: memory leak?
-        return GdkPixbuf.Pixbuf.new_from_data(
-            new_data,  # type: ignore
-            GdkPixbuf.Colorspace.RGB,
-            True,
-            8,
-            w,
-            h,
-            sprite.get_stride(),
-            destroy_fn=None,
-        )
+        return get_sprite_pixbuf(sprite, w, h)
 
     def _reload_icon(self, entid, idx, was_loading):
         try:
@@ -2884,8 +2988,3 @@ class StDungeonFloorPage(Gtk.Box):
         if LINKBOX_ITEM_ID in item_ids:
             return LINKBOX_ITEM_ID
         return item_ids[0]
-
-
-def grouper(iterable, n, fillvalue=None):
-    args = [iter(iterable)] * n
-    return (bytes(bytearray(x)) for x in zip_longest(*args, fillvalue=fillvalue))
@@ -17,7 +17,7 @@
 #  You should have received a copy of the GNU General Public License
 #  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
 
-from typing import Union
+from typing import Optional, Union
 from collections.abc import Iterable
 
 from gi.repository import GLib, Gtk
@@ -53,6 +53,8 @@ class Drawer:
         :param chunks_surfaces: Bg controller format chunk surfaces
         """
         self.draw_area = draw_area
+        self.drawing_is_active = False
+        self._tick_source: Optional[int] = None
 
         self.reset(dbg, pal_ani_durations, chunks_surfaces)
 
@@ -85,8 +87,6 @@ class Drawer:
 
         self.scale = 1
 
-        self.drawing_is_active = False
-
     # noinspection PyAttributeOutsideInit
     def reset(self, dbg, pal_ani_durations, chunks_surfaces):
         if isinstance(dbg, DbgProtocol):
@@ -97,6 +97,9 @@ class Drawer:
         self.animation_context = AnimationContext(
             [chunks_surfaces], 0, pal_ani_durations
         )
+        self._frame_changed = False
+        self._schedule_tick()
+        self.request_redraw()
 
     def start(self):
         """Start drawing on the DrawingArea"""
@@ -104,22 +107,45 @@ class Drawer:
         if isinstance(self.draw_area, Gtk.DrawingArea):
             self.draw_area.connect("draw", self.draw)
         self.draw_area.queue_draw()
-        GLib.timeout_add(int(1000 / FPS), self._tick)
+        self._schedule_tick()
 
     def stop(self):
         self.drawing_is_active = False
 
-    def _tick(self):
+    def request_redraw(self):
+        """Redraw the DrawingArea. Needs to be called if anything that is drawn changed."""
+        if self.drawing_is_active and self.draw_area is not None:
+            self.draw_area.queue_draw()
+
+    def _schedule_tick(self):
+        # Ticks are only needed for animations; static maps are only redrawn when requested.
+        if self._tick_source is not None or not self.drawing_is_active:
+            return
+        ticks = self.animation_context.ticks_until_next_change()
+        if ticks is not None:
+            self._tick_source = GLib.timeout_add(
+                int(1000 / FPS * ticks), self._tick, ticks
+            )
+
+    def _tick(self, ticks: int):
+        self._tick_source = None
         if self.draw_area is None:
             return False
         if self.draw_area is not None and self.draw_area.get_parent() is None:
             # XXX: Gtk doesn't remove the widget on switch sometimes...
             self.draw_area.destroy()
             return False
-        self.animation_context.advance()
-        if EventManager.instance().get_if_main_window_has_fous():
+        for _ in range(ticks):
+            if self.animation_context.advance():
+                self._frame_changed = True
+        if (
+            self._frame_changed
+            and EventManager.instance().get_if_main_window_has_fous()
+        ):
+            self._frame_changed = False
             self.draw_area.queue_draw()
-        return self.drawing_is_active
+        self._schedule_tick()
+        return False
 
     def draw(self, wdg, ctx: cairo.Context, do_translates=True):
         ctx.set_antialias(cairo.Antialias.NONE)
@@ -194,24 +220,30 @@ class Drawer:
     def set_mouse_position(self, x, y):
         self.mouse_x = x
         self.mouse_y = y
+        self.request_redraw()
 
     def set_selected_chunk(self, chunk_id):
         self.interaction_chunks_selected_id = chunk_id
+        self.request_redraw()
 
     def get_selected_chunk_id(self):
         return self.interaction_chunks_selected_id
 
     def set_draw_chunk_grid(self, v):
         self.draw_chunk_grid = v
+        self.request_redraw()
 
     def set_draw_tile_grid(self, v):
         self.draw_tile_grid = v
+        self.request_redraw()
 
     def set_pink_bg(self, v):
         self.use_pink_bg = v
+        self.request_redraw()
 
     def set_scale(self, v):
         self.scale = v
+        self.request_redraw()
 
 
 class DrawerCellRenderer(Drawer, Gtk.CellRenderer):
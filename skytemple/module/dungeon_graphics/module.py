@@ -95,6 +95,10 @@ class DungeonGraphicsModule(AbstractModule):
     def sort_order(cls):
         return 220
 
+    @classmethod
+    def lazy_tree_root(cls):
+        return "skytemple-e-dungeon-tileset-symbolic", DUNGEON_GRAPHICS_NAME
+
     def __init__(self, rom_project: RomProject):
         self.project = rom_project
 
@@ -268,6 +268,7 @@ class StDungeonGraphicsDungeonBgPage(Gtk.Box):
                     chunk_x, chunk_y, self.drawer.get_selected_chunk_id()
                 )
                 self.drawer.mappings = self.dbg.mappings
+                self.drawer.request_redraw()
 
     def on_current_icon_view_selection_changed(self, icon_view: Gtk.IconView):
         model, treeiter = (icon_view.get_model(), icon_view.get_selected_items())
@@ -0,0 +1,197 @@
+"""Renders all animation frames of the chunks of a BPC layer into one surface."""
+
+#  Copyright 2020-2024 Capypara and the SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+
+import itertools
+import math
+from collections.abc import Sequence
+from typing import Optional
+
+import cairo
+from PIL import Image
+from skytemple_files.graphics.bpa.protocol import BpaProtocol
+from skytemple_files.graphics.bpc import BPC_TILE_DIM
+from skytemple_files.graphics.bpc.protocol import BpcProtocol
+from skytemple_files.graphics.bpl import BPL_NORMAL_MAX_PAL
+from skytemple_files.graphics.bpl.protocol import BplProtocol
+
+from skytemple.core.img_utils import pil_to_cairo_surface
+
+# Chunks per row in each block of the atlas.
+CHUNKS_PER_ROW = 20
+# Blocks are stacked in columns up to this height.
+MAX_COLUMN_HEIGHT = 8192
+# Alpha for each color index: The first color of each palette is transparent.
+_ALPHA_LUT = [0 if i % 16 == 0 else 255 for i in range(256)]
+
+
+class ChunkAtlas:
+    """
+    All frames of all chunks of a BPC layer (every BPA frame and, for chunks using animated palettes, every
+    palette animation frame), packed into a single surface.
+
+    The atlas is made of blocks, each containing all chunks (or all chunks with animated palettes) for one frame.
+    Those are rendered in one go and converted to RGBA by PIL, instead of per chunk and frame.
+
+    `frames[chunk_idx][palette_animation_frame][bpa_frame]` are sub-surfaces of the atlas,
+    which can be used anywhere a chunk surface is expected.
+    """
+
+    def __init__(
+        self,
+        bpc: BpcProtocol,
+        layer: int,
+        bpl: BplProtocol,
+        bpas: Sequence[Optional[BpaProtocol]],
+    ):
+        self.chunk_width = bpc.tiling_width * BPC_TILE_DIM
+        self.chunk_height = bpc.tiling_height * BPC_TILE_DIM
+        number_chunks = bpc.layers[layer].chunk_tilemap_len
+        bpa_frames = bpc.chunks_animated_to_pil(
+            layer, bpl.palettes, bpas, CHUNKS_PER_ROW
+        )
+        self.weird_palette = any(uses_weird_palette(img, bpl) for img in bpa_frames)
+
+        pal_ani_chunks = []
+        if len(bpl.animation_palette) > 0:
+            pal_ani_chunks = [
+                chunk_idx
+                for chunk_idx in range(0, number_chunks)
+                if any(
+                    bpl.is_palette_affected_by_animation(tile.pal_idx)
+                    for tile in bpc.get_chunk(layer, chunk_idx)
+                )
+            ]
+
+        # Blocks of the atlas: The RGBA image, and [bpa_frame] for the base blocks or
+        # [palette_animation_frame][bpa_frame] for the palette animation blocks.
+        base_blocks = [_to_rgba(img) for img in bpa_frames]
+        pal_ani_blocks: list[list[Image.Image]] = []
+        if len(pal_ani_chunks) > 0:
+            compact_frames = [self._compact(img, pal_ani_chunks) for img in bpa_frames]
+            for pal_ani in range(0, len(bpl.animation_palette)):
+                palette = list(
+                    itertools.chain.from_iterable(bpl.apply_palette_animations(pal_ani))
+                )
+                frames = []
+                for compact in compact_frames:
+                    compact.putpalette(palette)
+                    frames.append(_to_rgba(compact))
+                pal_ani_blocks.append(frames)
+
+        blocks = base_blocks + list(itertools.chain.from_iterable(pal_ani_blocks))
+        positions = self._pack(blocks)
+        self.surface = self._render(blocks, positions)
+        base_positions = positions[: len(base_blocks)]
+        pal_ani_positions = positions[len(base_blocks) :]
+
+        self.frames: list[list[list[cairo.Surface]]] = []
+        pal_ani_index = {chunk_idx: i for i, chunk_idx in enumerate(pal_ani_chunks)}
+        for chunk_idx in range(0, number_chunks):
+            if chunk_idx in pal_ani_index:
+                idx = pal_ani_index[chunk_idx]
+                self.frames.append(
+                    [
+                        [
+                            self._sub_surface(
+                                pal_ani_positions[
+                                    pal_ani * len(bpa_frames) + bpa_frame
+                                ],
+                                idx,
+                            )
+                            for bpa_frame in range(0, len(bpa_frames))
+                        ]
+                        for pal_ani in range(0, len(pal_ani_blocks))
+                    ]
+                )
+            else:
+                self.frames.append(
+                    [[self._sub_surface(pos, chunk_idx) for pos in base_positions]]
+                )
+
+    def _compact(self, img: Image.Image, chunks: list[int]) -> Image.Image:
+        """Copies the given chunks of a block into a new, smaller block."""
+        compact = Image.new(
+            "P",
+            (
+                CHUNKS_PER_ROW * self.chunk_width,
+                math.ceil(len(chunks) / CHUNKS_PER_ROW) * self.chunk_height,
+            ),
+        )
+        for i, chunk_idx in enumerate(chunks):
+            x, y = self._chunk_position(chunk_idx)
+            compact.paste(
+                img.crop((x, y, x + self.chunk_width, y + self.chunk_height)),
+                self._chunk_position(i),
+            )
+        return compact
+
+    @staticmethod
+    def _pack(blocks: list[Image.Image]) -> list[tuple[int, int]]:
+        """Positions of the blocks (which all have the same width) in columns of the atlas."""
+        positions = []
+        x = 0
+        y = 0
+        for block in blocks:
+            if y > 0 and y + block.height > MAX_COLUMN_HEIGHT:
+                x += block.width
+                y = 0
+            positions.append((x, y))
+            y += block.height
+        return positions
+
+    @staticmethod
+    def _render(
+        blocks: list[Image.Image], positions: list[tuple[int, int]]
+    ) -> cairo.ImageSurface:
+        width = max(x + block.width for block, (x, _) in zip(blocks, positions))
+        height = max(y + block.height for block, (_, y) in zip(blocks, positions))
+        atlas = Image.new("RGBA", (width, height))
+        for block, position in zip(blocks, positions):
+            atlas.paste(block, position)
+        return pil_to_cairo_surface(atlas)
+
+    def _chunk_position(self, i: int) -> tuple[int, int]:
+        return (
+            (i % CHUNKS_PER_ROW) * self.chunk_width,
+            (i // CHUNKS_PER_ROW) * self.chunk_height,
+        )
+
+    def _sub_surface(self, block_position: tuple[int, int], i: int) -> cairo.Surface:
+        x, y = self._chunk_position(i)
+        return self.surface.create_for_rectangle(
+            block_position[0] + x,
+            block_position[1] + y,
+            self.chunk_width,
+            self.chunk_height,
+        )
+
+
+def uses_weird_palette(img: Image.Image, bpl: BplProtocol) -> bool:
+    """Whether the image (with all palettes merged) uses a palette that doesn't exist or can't be used."""
+    _, max_idx = img.getextrema()
+    return max_idx // 16 >= min(bpl.number_palettes, BPL_NORMAL_MAX_PAL)
+
+
+def _to_rgba(img: Image.Image) -> Image.Image:
+    # The palette lookup and the alpha mask are both done by PIL for the whole image.
+    mask = Image.frombytes("L", img.size, img.tobytes()).point(_ALPHA_LUT)
+    rgba = img.convert("RGBA")
+    rgba.putalpha(mask)
+    return rgba
@@ -16,6 +16,7 @@
 #
 #  You should have received a copy of the GNU General Public License
 #  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+import math
 from enum import Enum, auto
 from typing import Union, Optional
 from collections.abc import Iterable, Sequence
@@ -63,6 +64,9 @@ class Drawer:
         :param chunks_surfaces: Bg controller format chunk surfaces
         """
         self.draw_area = draw_area
+        self.drawing_is_active = False
+        self._tick_source: Optional[int] = None
+        self._bma: Optional[BmaProtocol] = None
 
         self.reset(bma, bpa_durations, pal_ani_durations, chunks_surfaces)
 
@@ -98,9 +102,10 @@ class Drawer:
 
         self.scale = 1
 
-        self.drawing_is_active = False
-
     def reset_bma(self, bma):
+        if bma is not self._bma:
+            self._bma = bma
+            self.invalidate()
         if isinstance(bma, BmaProtocol):
             self.tiling_width = bma.tiling_width
             self.tiling_height = bma.tiling_height
@@ -123,14 +128,25 @@ class Drawer:
             self.collision1 = None
             self.collision2 = None
             self.data_layer = None
+        self.request_redraw()
 
     # noinspection PyAttributeOutsideInit
     def reset(self, bma, bpa_durations, pal_ani_durations, chunks_surfaces):
+        # Cache of the rendered background, layers, collision and data layer. Only the
+        # parts in _composite_valid are up-to-date.
+        self._composite: Optional[cairo.ImageSurface] = None
+        self._composite_valid = cairo.Region()
+        self._composite_state_key: Optional[tuple] = None
+        self._composite_frame: Optional[list[list[cairo.Surface]]] = None
+        self._bma = None
         self.reset_bma(bma)
 
         self.animation_context = AnimationContext(
             chunks_surfaces, bpa_durations, pal_ani_durations
         )
+        self._frame_changed = False
+        self._schedule_tick()
+        self.request_redraw()
         self._tileset_drawer_overlay: Optional[MapTilesetOverlay] = None
 
     def start(self):
@@ -139,26 +155,213 @@ class Drawer:
         if isinstance(self.draw_area, Gtk.DrawingArea):
             self.draw_area.connect("draw", self.draw)
         self.draw_area.queue_draw()
-        GLib.timeout_add(int(1000 / FPS), self._tick)
+        self._schedule_tick()
 
     def stop(self):
         self.drawing_is_active = False
 
-    def _tick(self):
+    def request_redraw(self):
+        """Redraw the DrawingArea. Needs to be called if anything that is drawn changed."""
+        if self.drawing_is_active and self.draw_area is not None:
+            self.draw_area.queue_draw()
+
+    def _schedule_tick(self):
+        # Ticks are only needed for animations; static maps are only redrawn when requested.
+        if self._tick_source is not None or not self.drawing_is_active:
+            return
+        ticks = self.animation_context.ticks_until_next_change()
+        if ticks is not None:
+            self._tick_source = GLib.timeout_add(
+                int(1000 / FPS * ticks), self._tick, ticks
+            )
+
+    def _tick(self, ticks: int):
+        self._tick_source = None
         if self.draw_area is None:
             return False
         if self.draw_area is not None and self.draw_area.get_parent() is None:
             # XXX: Gtk doesn't remove the widget on switch sometimes...
             self.draw_area.destroy()
             return False
-        self.animation_context.advance()
-        if EventManager.instance().get_if_main_window_has_fous():
+        for _ in range(ticks):
+            if self.animation_context.advance():
+                self._frame_changed = True
+        if (
+            self._frame_changed
+            and EventManager.instance().get_if_main_window_has_fous()
+        ):
+            self._frame_changed = False
             self.draw_area.queue_draw()
-        return self.drawing_is_active
+        self._schedule_tick()
+        return False
 
     def draw(self, wdg, ctx: cairo.Context, do_translates=True):
         ctx.set_antialias(cairo.Antialias.NONE)
         ctx.scale(self.scale, self.scale)
+        if do_translates:
+            self._draw_cached_layers(ctx)
+        else:
+            self._draw_layers(ctx, None, False)
+
+        size_w, size_h = self.draw_area.get_size_request()
+        assert size_w is not None and size_h is not None
+
+        size_w //= self.scale
+        size_h //= self.scale
+        # Selection
+        if self.interaction_mode == DrawerInteraction.CHUNKS:
+            self.selection_plugin.set_size(
+                self.tiling_width * BPC_TILE_DIM, self.tiling_height * BPC_TILE_DIM
+            )
+        else:
+            self.selection_plugin.set_size(BPC_TILE_DIM, BPC_TILE_DIM)
+        self.selection_plugin.draw(ctx, size_w, size_h, self.mouse_x, self.mouse_y)
+
+        # Tile Grid
+        if self.draw_tile_grid:
+            self.tile_grid_plugin.draw(ctx, size_w, size_h, self.mouse_x, self.mouse_y)
+
+        # Chunk Grid
+        if self.draw_chunk_grid:
+            self.chunk_grid_plugin.draw(ctx, size_w, size_h, self.mouse_x, self.mouse_y)
+        return True
+
+    def invalidate(self):
+        """Marks the cached layers as outdated. They are fully redrawn the next time they are visible."""
+        self._composite_valid = cairo.Region()
+        self.request_redraw()
+
+    def invalidate_chunk(self, chunk_x: int, chunk_y: int):
+        """Marks the chunk at the given chunk position as outdated in the cached layers."""
+        chunk_width = self.tiling_width * BPC_TILE_DIM
+        chunk_height = self.tiling_height * BPC_TILE_DIM
+        radius = 0
+        if (
+            self._tileset_drawer_overlay is not None
+            and self._tileset_drawer_overlay.enabled
+        ):
+            # The dungeon tiles picked by the overlay depend on the neighbouring chunks, so those
+            # change too.
+            radius = 1
+        self._composite_valid.subtract(
+            cairo.RectangleInt(
+                (chunk_x - radius) * chunk_width,
+                (chunk_y - radius) * chunk_height,
+                (1 + 2 * radius) * chunk_width,
+                (1 + 2 * radius) * chunk_height,
+            )
+        )
+        self.request_redraw()
+
+    def invalidate_tile(self, tile_x: int, tile_y: int):
+        """Marks the tile at the given tile position as outdated in the cached layers."""
+        self._composite_valid.subtract(
+            cairo.RectangleInt(
+                tile_x * BPC_TILE_DIM, tile_y * BPC_TILE_DIM, BPC_TILE_DIM, BPC_TILE_DIM
+            )
+        )
+        self.request_redraw()
+
+    def _composite_state(self):
+        """Everything the cached layers depend on, apart from the map data and the animation frame."""
+        return (
+            self.use_pink_bg,
+            self.edited_layer,
+            self.show_only_edited_layer,
+            self.dim_layers,
+            self.draw_collision1,
+            self.draw_collision2,
+            self.draw_data_layer,
+            self._tileset_drawer_overlay is not None
+            and self._tileset_drawer_overlay.enabled,
+            self.tiling_width,
+            self.tiling_height,
+            self.width_in_chunks,
+            self.height_in_chunks,
+        )
+
+    def _draw_cached_layers(self, ctx: cairo.Context):
+        """
+        Draws the background, layers, collision and data layer from a cached surface. Only the parts
+        of the cache that are visible in the clip region of ctx and have been invalidated since (by edits,
+        a new animation frame or changed display settings) are re-rendered.
+        """
+        width = self.width_in_chunks * self.tiling_width * BPC_TILE_DIM
+        height = self.height_in_chunks * self.tiling_height * BPC_TILE_DIM
+        frame = self.animation_context.current()
+        state = self._composite_state()
+        if (
+            self._composite is None
+            or self._composite.get_width() != width
+            or self._composite.get_height() != height
+        ):
+            self._composite = cairo.ImageSurface(cairo.FORMAT_ARGB32, width, height)
+            self.invalidate()
+        elif state != self._composite_state_key or frame is not self._composite_frame:
+            self.invalidate()
+        self._composite_state_key = state
+        self._composite_frame = frame
+
+        x1, y1, x2, y2 = ctx.clip_extents()
+        visible = cairo.RectangleInt(
+            max(0, math.floor(x1)),
+            max(0, math.floor(y1)),
+            max(0, min(width, math.ceil(x2)) - max(0, math.floor(x1))),
+            max(0, min(height, math.ceil(y2)) - max(0, math.floor(y1))),
+        )
+        missing = cairo.Region(visible)
+        missing.subtract(self._composite_valid)
+        if not missing.is_empty():
+            composite_ctx = cairo.Context(self._composite)
+            composite_ctx.set_antialias(cairo.Antialias.NONE)
+            for i in range(missing.num_rectangles()):
+                rect = missing.get_rectangle(i)
+                composite_ctx.save()
+                composite_ctx.rectangle(rect.x, rect.y, rect.width, rect.height)
+                composite_ctx.clip()
+                self._draw_layers(
+                    composite_ctx,
+                    (rect.x, rect.y, rect.x + rect.width, rect.y + rect.height),
+                    True,
+                )
+                composite_ctx.restore()
+            self._composite_valid.union(missing)
+
+        ctx.set_source_surface(self._composite, 0, 0)
+        ctx.get_source().set_filter(cairo.Filter.NEAREST)
+        ctx.paint()
+
+    @staticmethod
+    def _cells_in_area(
+        area: Optional[tuple[int, int, int, int]],
+        cell_width: int,
+        cell_height: int,
+        columns: int,
+        rows: int,
+    ) -> Iterable[tuple[int, int]]:
+        """Column and row of all cells of a grid that intersect with the area (x1, y1, x2, y2)."""
+        if area is None:
+            col_start, row_start, col_end, row_end = 0, 0, columns, rows
+        else:
+            col_start = max(0, area[0] // cell_width)
+            row_start = max(0, area[1] // cell_height)
+            col_end = min(columns, math.ceil(area[2] / cell_width))
+            row_end = min(rows, math.ceil(area[3] / cell_height))
+        for row in range(row_start, row_end):
+            for col in range(col_start, col_end):
+                yield col, row
+
+    def _draw_layers(
+        self,
+        ctx: cairo.Context,
+        area: Optional[tuple[int, int, int, int]],
+        do_translates: bool,
+    ):
+        """
+        Draws the background, layers, collision and data layer. Only chunks and tiles intersecting
+        area (x1, y1, x2, y2) are drawn, or all if it is None. If do_translates is False, all
+        chunks and tiles are drawn at the origin.
+        """
         chunk_width = self.tiling_width * BPC_TILE_DIM
         chunk_height = self.tiling_height * BPC_TILE_DIM
         # Background
@@ -189,10 +392,25 @@ class Drawer:
                 if self.show_only_edited_layer and layer_idx != self.edited_layer:
                     continue
                 current_layer_mappings = self.mappings[layer_idx]
-                for i, chunk_at_pos in enumerate(current_layer_mappings):
+                if do_translates:
+                    cells: Iterable[tuple[int, int]] = self._cells_in_area(
+                        area,
+                        chunk_width,
+                        chunk_height,
+                        self.width_in_chunks,
+                        self.height_in_chunks,
+                    )
+                else:
+                    cells = ((0, 0) for _ in current_layer_mappings)
+                for i, (x, y) in enumerate(cells):
+                    if do_translates:
+                        i = y * self.width_in_chunks + x
+                        if i >= len(current_layer_mappings):
+                            continue
+                    chunk_at_pos = current_layer_mappings[i]
                     if 0 < chunk_at_pos < len(chunks_at_frame):
                         chunk = chunks_at_frame[chunk_at_pos]
-                        ctx.set_source_surface(chunk, 0, 0)
+                        ctx.set_source_surface(chunk, x * chunk_width, y * chunk_height)
                         ctx.get_source().set_filter(cairo.Filter.NEAREST)
                         if (
                             self.edited_layer != -1
@@ -203,20 +421,6 @@ class Drawer:
                             ctx.paint_with_alpha(0.7)
                         else:
                             ctx.paint()
-                    if (i + 1) % self.width_in_chunks == 0:
-                        # Move to beginning of next line
-                        if do_translates:
-                            ctx.translate(
-                                -chunk_width * (self.width_in_chunks - 1), chunk_height
-                            )
-                    else:
-                        # Move to next tile in line
-                        if do_translates:
-                            ctx.translate(chunk_width, 0)
-
-                # Move back to beginning
-                if do_translates:
-                    ctx.translate(0, -chunk_height * self.height_in_chunks)
 
                 if (
                     (
@@ -255,24 +459,10 @@ class Drawer:
                     ctx.set_source_rgba(0, 1, 0, 0.4)
                     col = self.collision2  # type: ignore
 
-                for i, c in enumerate(col):
-                    if c:
-                        ctx.rectangle(0, 0, BPC_TILE_DIM, BPC_TILE_DIM)
+                for i, x, y in self._tiles_in_area(area, len(col), do_translates):
+                    if col[i]:
+                        ctx.rectangle(x, y, BPC_TILE_DIM, BPC_TILE_DIM)
                         ctx.fill()
-                    if (i + 1) % self.width_in_tiles == 0:  # type: ignore
-                        # Move to beginning of next line
-                        if do_translates:
-                            ctx.translate(
-                                -BPC_TILE_DIM * (self.width_in_tiles - 1),  # type: ignore
-                                BPC_TILE_DIM,
-                            )
-                    else:
-                        # Move to next tile in line
-                        if do_translates:
-                            ctx.translate(BPC_TILE_DIM, 0)
-                # Move back to beginning
-                if do_translates:
-                    ctx.translate(0, -BPC_TILE_DIM * self.height_in_tiles)  # type: ignore
 
         # Data
         if self.draw_data_layer:
@@ -282,47 +472,33 @@ class Drawer:
             ctx.set_font_size(6)
             ctx.set_source_rgb(0, 0, 1)
             assert self.data_layer is not None
-            for i, dat in enumerate(self.data_layer):
+            for i, x, y in self._tiles_in_area(
+                area, len(self.data_layer), do_translates
+            ):
+                dat = self.data_layer[i]
                 if dat > 0:
-                    ctx.move_to(0, BPC_TILE_DIM - 2)
+                    ctx.move_to(x, y + BPC_TILE_DIM - 2)
                     ctx.show_text(f"{dat:02x}")
-                if (i + 1) % self.width_in_tiles == 0:  # type: ignore
-                    # Move to beginning of next line
-                    if do_translates:
-                        ctx.translate(
-                            -BPC_TILE_DIM * (self.width_in_tiles - 1),  # type: ignore
-                            BPC_TILE_DIM,
-                        )
-                else:
-                    # Move to next tile in line
-                    if do_translates:
-                        ctx.translate(BPC_TILE_DIM, 0)
-            # Move back to beginning
-            if do_translates:
-                ctx.translate(0, -BPC_TILE_DIM * self.height_in_tiles)  # type: ignore
 
-        size_w, size_h = self.draw_area.get_size_request()
-        assert size_w is not None and size_h is not None
-
-        size_w //= self.scale
-        size_h //= self.scale
-        # Selection
-        if self.interaction_mode == DrawerInteraction.CHUNKS:
-            self.selection_plugin.set_size(
-                self.tiling_width * BPC_TILE_DIM, self.tiling_height * BPC_TILE_DIM
-            )
-        else:
-            self.selection_plugin.set_size(BPC_TILE_DIM, BPC_TILE_DIM)
-        self.selection_plugin.draw(ctx, size_w, size_h, self.mouse_x, self.mouse_y)
-
-        # Tile Grid
-        if self.draw_tile_grid:
-            self.tile_grid_plugin.draw(ctx, size_w, size_h, self.mouse_x, self.mouse_y)
-
-        # Chunk Grid
-        if self.draw_chunk_grid:
-            self.chunk_grid_plugin.draw(ctx, size_w, size_h, self.mouse_x, self.mouse_y)
-        return True
+    def _tiles_in_area(
+        self,
+        area: Optional[tuple[int, int, int, int]],
+        number_tiles: int,
+        do_translates: bool,
+    ) -> Iterable[tuple[int, int, int]]:
+        """Index and drawing position of all tiles intersecting area (see _draw_layers)."""
+        if not do_translates:
+            for i in range(0, number_tiles):
+                yield i, 0, 0
+            return
+        assert self.width_in_tiles is not None
+        rows = math.ceil(number_tiles / self.width_in_tiles)
+        for x, y in self._cells_in_area(
+            area, BPC_TILE_DIM, BPC_TILE_DIM, self.width_in_tiles, rows
+        ):
+            i = y * self.width_in_tiles + x
+            if i < number_tiles:
+                yield i, x * BPC_TILE_DIM, y * BPC_TILE_DIM
 
     def selection_draw_callback(self, ctx: cairo.Context, x: int, y: int):
         if self.interaction_mode == DrawerInteraction.CHUNKS:
@@ -353,21 +529,25 @@ class Drawer:
     def set_mouse_position(self, x, y):
         self.mouse_x = x
         self.mouse_y = y
+        self.request_redraw()
 
     def set_selected_chunk(self, chunk_id):
         self.interaction_chunks_selected_id = chunk_id
+        self.request_redraw()
 
     def get_selected_chunk_id(self):
         return self.interaction_chunks_selected_id
 
     def set_interaction_col_solid(self, v):
         self.interaction_col_solid = v
+        self.request_redraw()
 
     def get_interaction_col_solid(self):
         return self.interaction_col_solid
 
     def set_interaction_dat_value(self, v):
         self.interaction_dat_value = v
+        self.request_redraw()
 
     def get_interaction_dat_value(self):
         return self.interaction_dat_value
@@ -382,9 +562,11 @@ class Drawer:
         self.draw_data_layer = False
         self.edited_collision = -1
         self.interaction_mode = DrawerInteraction.CHUNKS
+        self.request_redraw()
 
     def set_show_only_edited_layer(self, v):
         self.show_only_edited_layer = v
+        self.request_redraw()
 
     def set_edited_collision(self, collision_id):
         self.dim_layers = True
@@ -398,6 +580,7 @@ class Drawer:
             self.draw_collision2 = True
         self.edited_collision = collision_id
         self.interaction_mode = DrawerInteraction.COL
+        self.request_redraw()
 
     def get_edited_collision(self):
         return self.edited_collision
@@ -410,24 +593,30 @@ class Drawer:
         self.draw_collision2 = False
         self.draw_data_layer = True
         self.interaction_mode = DrawerInteraction.DAT
+        self.request_redraw()
 
     def get_interaction_mode(self):
         return self.interaction_mode
 
     def set_draw_chunk_grid(self, v):
         self.draw_chunk_grid = v
+        self.request_redraw()
 
     def set_draw_tile_grid(self, v):
         self.draw_tile_grid = v
+        self.request_redraw()
 
     def set_pink_bg(self, v):
         self.use_pink_bg = v
+        self.request_redraw()
 
     def set_scale(self, v):
         self.scale = v
+        self.request_redraw()
 
     def add_overlay(self, tileset_drawer_overlay):
         self._tileset_drawer_overlay = tileset_drawer_overlay
+        self.request_redraw()
 
 
 class DrawerCellRenderer(Drawer, Gtk.CellRenderer):
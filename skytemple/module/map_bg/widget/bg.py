@@ -15,7 +15,6 @@
 #  You should have received a copy of the GNU General Public License
 #  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
 from __future__ import annotations
-import itertools
 import typing
 from typing import TYPE_CHECKING, cast
 from collections.abc import Iterable, Sequence
@@ -23,20 +22,18 @@ import cairo
 from gi.repository import Gtk, Gdk
 from skytemple.controller.main import MainController
 from skytemple.core.canvas_scale import CanvasScale
-from skytemple.core.img_utils import pil_to_cairo_surface
 from skytemple.core.mapbg_util.map_tileset_overlay import MapTilesetOverlay
 from skytemple.core.message_dialog import SkyTempleMessageDialog
 from skytemple.core.open_request import OpenRequest, REQUEST_TYPE_SCENE
 from skytemple.core.ui_utils import data_dir, safe_destroy
+from skytemple.module.map_bg.chunk_atlas import ChunkAtlas
 from skytemple.module.map_bg.controller.bg_menu import BgMenuController
 from skytemple.module.map_bg.drawer import Drawer, DrawerCellRenderer, DrawerInteraction
 from skytemple_files.common.ppmdu_config.script_data import Pmd2ScriptLevelMapType
 from skytemple_files.common.types.file_types import FileType
 from skytemple_files.graphics.bg_list_dat import BMA_EXT, BPC_EXT, BPL_EXT, BPA_EXT, DIR
-from skytemple_files.graphics.bma import MASK_PAL
 from skytemple_files.graphics.bma.protocol import BmaProtocol
 from skytemple_files.graphics.bpc import BPC_TILE_DIM
-from skytemple_files.graphics.bpl import BPL_NORMAL_MAX_PAL
 from skytemple_files.common.i18n_util import _
 from skytemple_files.hardcoded.ground_dungeon_tilesets import resolve_mapping_for_level
 
@@ -440,6 +437,7 @@ class StMapBgBgPage(Gtk.Box):
                     self.bma.collision = last_bma_copy.collision
                     self.bma.collision2 = last_bma_copy.collision2
                     self.bma.unknown_data_block = last_bma_copy.unknown_data_block
+                    self.drawer.invalidate()
                     x_pos = [snap_x, self.first_cursor_pos[0]]
                     x_pos.sort()
                     y_pos = [snap_y, self.first_cursor_pos[1]]
@@ -490,6 +488,7 @@ class StMapBgBgPage(Gtk.Box):
                     self.drawer.get_selected_chunk_id(),
                 )
                 self.drawer.mappings = [self.bma.layer0, self.bma.layer1]  # type: ignore
+                self.drawer.invalidate_chunk(chunk_x, chunk_y)
 
     def _set_col_at_pos(self, mouse_x, mouse_y):
         if self.drawer:
@@ -507,6 +506,7 @@ class StMapBgBgPage(Gtk.Box):
                     tile_y,
                     self.drawer.get_interaction_col_solid(),
                 )
+                self.drawer.invalidate_tile(tile_x, tile_y)
 
     def _set_data_at_pos(self, mouse_x, mouse_y):
         if self.drawer:
@@ -521,6 +521,7 @@ class StMapBgBgPage(Gtk.Box):
                 self.bma.place_data(
                     tile_x, tile_y, self.drawer.get_interaction_dat_value()
                 )
+                self.drawer.invalidate_tile(tile_x, tile_y)
 
     def on_current_icon_view_selection_changed(self, icon_view: Gtk.IconView):
         model, treeiter = (icon_view.get_model(), icon_view.get_selected_items())
@@ -745,51 +746,12 @@ class StMapBgBgPage(Gtk.Box):
             layer_idxs_bpc = [0]
         self.chunks_surfaces = []
         # For each layer...
-        for layer_idx, layer_idx_bpc in enumerate(layer_idxs_bpc):
-            chunks_current_layer: list[list[list[cairo.Surface]]] = []
-            self.chunks_surfaces.append(chunks_current_layer)
-            # For each chunk...
-            for chunk_idx in range(0, self.bpc.layers[layer_idx_bpc].chunk_tilemap_len):
-                # For each frame of palette animation... ( applicable for this chunk )
-                pal_ani_frames: list[list[cairo.Surface]] = []
-                chunks_current_layer.append(pal_ani_frames)
-                chunk_data = self.bpc.get_chunk(layer_idx_bpc, chunk_idx)
-                chunk_images = self.bpc.single_chunk_animated_to_pil(
-                    layer_idx_bpc, chunk_idx, self.bpl.palettes, self.bpas
-                )
-                if not self.weird_palette:
-                    for x in chunk_images:
-                        for n in x.tobytes("raw", "P"):
-                            n //= 16
-                            if n >= self.bpl.number_palettes or n >= BPL_NORMAL_MAX_PAL:
-                                # If one chunk uses weird palette values, display the warning
-                                self.weird_palette = True
-                                break
-                        if self.weird_palette:
-                            break
-                has_pal_ani = any(
-                    self.bpl.is_palette_affected_by_animation(chunk.pal_idx)
-                    for chunk in chunk_data
-                )
-                len_pal_ani = len(self.bpl.animation_palette) if has_pal_ani else 1
-                for pal_ani in range(0, len_pal_ani):
-                    # For each frame of tile animation...
-                    bpa_ani_frames: list[cairo.Surface] = []
-                    pal_ani_frames.append(bpa_ani_frames)
-                    for img in chunk_images:
-                        # Switch out the palette with that from the palette animation
-                        if has_pal_ani:
-                            pal_for_frame = itertools.chain.from_iterable(
-                                self.bpl.apply_palette_animations(pal_ani)
-                            )
-                            img.putpalette(pal_for_frame)
-                        # Remove alpha first
-                        img_mask = img.copy()
-                        img_mask.putpalette(MASK_PAL)
-                        img_mask = img_mask.convert("1")
-                        img = img.convert("RGBA")
-                        img.putalpha(img_mask)
-                        bpa_ani_frames.append(pil_to_cairo_surface(img))
+        for layer_idx_bpc in layer_idxs_bpc:
+            # All chunks and frames of the layer are rendered into one atlas surface.
+            atlas = ChunkAtlas(self.bpc, layer_idx_bpc, self.bpl, self.bpas)
+            self.chunks_surfaces.append(atlas.frames)
+            # If one chunk uses weird palette values, display the warning
+            self.weird_palette = self.weird_palette or atlas.weird_palette
             # TODO: No BPAs at different speeds supported at the moment
             self.bpa_durations = 0
             for bpa in self.bpas:
@@ -1185,3 +1147,5 @@ class StMapBgBgPage(Gtk.Box):
     def on_btn_toggle_overlay_rendering_clicked(self, *args):
         assert self._tileset_drawer_overlay is not None
         self._tileset_drawer_overlay.enabled = not self._tileset_drawer_overlay.enabled
+        if self.drawer:
+            self.drawer.request_redraw()
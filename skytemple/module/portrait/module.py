@@ -17,6 +17,8 @@
 import logging
 import math
 import sys
+from collections.abc import Sequence
+from typing import Optional
 
 from gi.repository import Gtk
 from skytemple_files.common.i18n_util import _, f
@@ -30,7 +32,7 @@ from skytemple.core.item_tree import ItemTree
 from skytemple.core.rom_project import RomProject
 from skytemple.module.portrait.portrait_provider import PortraitProvider
 from skytemple_files.common.types.file_types import FileType
-from skytemple_files.graphics.kao.protocol import KaoProtocol
+from skytemple_files.graphics.kao.protocol import KaoImageProtocol, KaoProtocol
 
 from skytemple.module.portrait.widget.portrait import StPortraitPortraitPage
 
@@ -102,6 +104,23 @@ class PortraitModule(AbstractModule):
         # Mark as modified
         self.mark_as_modified()
 
+    def import_portraits(
+        self,
+        idx: int,
+        portraits: Sequence[Optional[KaoImageProtocol]],
+        clear_other_slots=True,
+    ):
+        """
+        Imports already converted portraits (eg. as returned by SpriteCollab), one entry per subindex.
+        None entries are skipped (or cleared if clear_other_slots is set).
+        """
+        for subindex, portrait in enumerate(portraits[:SUBENTRIES]):
+            if portrait is not None:
+                self.kao.set(idx, subindex, portrait)
+            elif clear_other_slots:
+                self.kao.delete(idx, subindex)
+        self.mark_as_modified()
+
     def get_portrait_name(self, subindex):
         portrait_name = (
             self.project.get_rom_module()
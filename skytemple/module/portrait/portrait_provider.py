@@ -24,6 +24,7 @@ from skytemple_files.common.types.file_types import FileType
 
 from skytemple.core.img_utils import pil_to_cairo_surface
 from skytemple.core.async_tasks.delegator import AsyncTaskDelegator
+from skytemple.core.async_tasks.pool import TaskPriority
 from skytemple_files.graphics.kao import KAO_IMG_METAPIXELS_DIM, KAO_IMG_IMG_DIM
 from skytemple_files.graphics.kao.protocol import KaoProtocol
 
@@ -93,6 +94,7 @@ class PortraitProvider:
         sub_id: int,
         after_load_cb=lambda: None,
         allow_fallback=True,
+        priority: TaskPriority = TaskPriority.VISIBLE,
     ) -> cairo.Surface:
         """
         Returns a portrait.
@@ -110,12 +112,16 @@ class PortraitProvider:
                     return self.get_error()
             if (entry_id, sub_id) not in self._requests:
                 self._requests.append((entry_id, sub_id))
-                self._load(entry_id, sub_id, after_load_cb, allow_fallback)
+                self._load(entry_id, sub_id, after_load_cb, allow_fallback, priority)
+            else:
+                AsyncTaskDelegator.raise_priority((self, entry_id, sub_id), priority)
         return self.get_loader()
 
-    def _load(self, entry_id, sub_id, after_load_cb, allow_fallback):
-        AsyncTaskDelegator.run_task(
-            self._load__impl(entry_id, sub_id, after_load_cb, allow_fallback)
+    def _load(self, entry_id, sub_id, after_load_cb, allow_fallback, priority):
+        AsyncTaskDelegator.run_load(
+            self._load__impl(entry_id, sub_id, after_load_cb, allow_fallback),
+            priority,
+            (self, entry_id, sub_id),
         )
 
     async def _load__impl(self, entry_id, sub_id, after_load_cb, allow_fallback):
@@ -22,6 +22,7 @@ import cairo
 from gi.repository import Gtk, GLib
 
 from explorerscript.source_map import SourceMapPositionMark
+from skytemple.core.async_tasks.pool import TaskPriority
 from skytemple.core.mapbg_util.drawer_plugin.grid import GridDrawerPlugin
 from skytemple.core.mapbg_util.drawer_plugin.selection import SelectionDrawerPlugin
 from skytemple.core.sprite_provider import SpriteProvider
@@ -326,12 +327,14 @@ class Drawer:
                 actor.actor.id,
                 assert_not_none(actor.pos.direction).id,
                 lambda: GLib.idle_add(self._redraw),
+                TaskPriority.BACKGROUND,
             )
         else:
             _, cx, cy, w, h = self.sprite_provider.get_monster(
                 actor.actor.entid,
                 assert_not_none(actor.pos.direction).id,
                 lambda: GLib.idle_add(self._redraw),
+                TaskPriority.BACKGROUND,
             )
         return x - cx, y - cy, w, h
 
@@ -345,7 +348,7 @@ class Drawer:
         self._draw_hitbox(ctx, COLOR_ACTORS, *coords_hitbox)
 
     def _draw_actor(self, ctx: cairo.Context, actor: SsaActor, *sprite_coords):
-        self._draw_actor_sprite(ctx, actor, sprite_coords[0], sprite_coords[1])
+        self._draw_actor_sprite(ctx, actor, *sprite_coords)
         self._draw_name(
             ctx, COLOR_ACTORS, actor.actor.name, sprite_coords[0], sprite_coords[1]
         )
@@ -360,7 +363,9 @@ class Drawer:
         if object.object.name != "NULL":
             # Load sprite to get dims.
             _, cx, cy, w, h = self.sprite_provider.get_for_object(
-                object.object.name, lambda: GLib.idle_add(self._redraw)
+                object.object.name,
+                lambda: GLib.idle_add(self._redraw),
+                TaskPriority.BACKGROUND,
             )
             return x - cx, y - cy, w, h
         return self._get_pmd_bounding_box(
@@ -384,7 +389,7 @@ class Drawer:
     ):
         # Draw sprite representation
         if object.object.name != "NULL":
-            self._draw_object_sprite(ctx, object, sprite_coords[0], sprite_coords[1])
+            self._draw_object_sprite(ctx, object, *sprite_coords)
             self._draw_name(
                 ctx,
                 COLOR_OBJECTS,
@@ -699,17 +704,22 @@ class Drawer:
         else:
             ctx.fill()
 
-    def _draw_actor_sprite(self, ctx: cairo.Context, actor: SsaActor, x, y):
+    def _draw_actor_sprite(self, ctx: cairo.Context, actor: SsaActor, x, y, w, h):
         """Draws the sprite for an actor"""
+        priority = self._load_priority(ctx, x, y, w, h)
         if actor.actor.entid == 0:
             sprite = self.sprite_provider.get_actor_placeholder(
-                actor.actor.id, assert_not_none(actor.pos.direction).id, self._redraw
+                actor.actor.id,
+                assert_not_none(actor.pos.direction).id,
+                self._redraw,
+                priority,
             )[0]
         else:
             sprite = self.sprite_provider.get_monster(
                 actor.actor.entid,
                 assert_not_none(actor.pos.direction).id,
                 lambda: GLib.idle_add(self._redraw),
+                priority,
             )[0]
         ctx.translate(x, y)
         ctx.set_source_surface(sprite)
@@ -717,10 +727,12 @@ class Drawer:
         ctx.paint()
         ctx.translate(-x, -y)
 
-    def _draw_object_sprite(self, ctx: cairo.Context, obj: SsaObject, x, y):
+    def _draw_object_sprite(self, ctx: cairo.Context, obj: SsaObject, x, y, w, h):
         """Draws the sprite for an object"""
         sprite = self.sprite_provider.get_for_object(
-            obj.object.name, lambda: GLib.idle_add(self._redraw)
+            obj.object.name,
+            lambda: GLib.idle_add(self._redraw),
+            self._load_priority(ctx, x, y, w, h),
         )[0]
         ctx.translate(x, y)
         ctx.set_source_surface(sprite)
@@ -728,6 +740,14 @@ class Drawer:
         ctx.paint()
         ctx.translate(-x, -y)
 
+    @staticmethod
+    def _load_priority(ctx: cairo.Context, x, y, w, h) -> TaskPriority:
+        """Sprites in the area being drawn (the visible part of the scene) are loaded first."""
+        x1, y1, x2, y2 = ctx.clip_extents()
+        if x < x2 and x + w > x1 and y < y2 and y + h > y1:
+            return TaskPriority.VISIBLE
+        return TaskPriority.BACKGROUND
+
     def _surface_place_actor(self, ctx: cairo.Context, x, y, w, h):
         ctx.set_line_width(1)
         sprite_surface = self.sprite_provider.get_monster_outline(1, 1)[0]
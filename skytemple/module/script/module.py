@@ -86,6 +86,10 @@ class ScriptModule(AbstractModule):
     def sort_order(cls):
         return 50
 
+    @classmethod
+    def lazy_tree_root(cls):
+        return "skytemple-e-ground-symbolic", SCRIPT_SCENES
+
     def __init__(self, rom_project: RomProject):
         """Loads the list of backgrounds for the ROM."""
         self.project = rom_project
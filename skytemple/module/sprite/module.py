@@ -317,7 +317,7 @@ class SpriteModule(AbstractModule):
     def get_monster_monster_sprite_chara(
         self, id, raw: bool = False
     ) -> Union[bytes, WanFile]:
-        with self.get_monster_bin_ctx() as bin_pack:
+        with self.get_monster_bin_ctx().read() as bin_pack:
             decompressed = FileType.PKDPX.deserialize(bin_pack[id]).decompress()
             if raw:
                 return decompressed
@@ -334,7 +334,7 @@ class SpriteModule(AbstractModule):
     def get_monster_ground_sprite_chara(
         self, id, raw: bool = False
     ) -> Union[bytes, WanFile]:
-        with self.get_ground_bin_ctx() as bin_pack:
+        with self.get_ground_bin_ctx().read() as bin_pack:
             if raw:
                 return bin_pack[id]
             return FileType.WAN.CHARA.deserialize(bin_pack[id])
@@ -350,7 +350,7 @@ class SpriteModule(AbstractModule):
     def get_monster_attack_sprite_chara(
         self, id, raw: bool = False
     ) -> Union[bytes, WanFile]:
-        with self.get_attack_bin_ctx() as bin_pack:
+        with self.get_attack_bin_ctx().read() as bin_pack:
             decompressed = FileType.PKDPX.deserialize(bin_pack[id]).decompress()
             if raw:
                 return decompressed
@@ -394,6 +394,31 @@ class SpriteModule(AbstractModule):
 
     def save_monster_sprite(self, id, wan: WanFile):
         """Import all three sprite variation of the monster"""
+        self._check_monster_sprite_id(id)
+
+        monster, ground, attack = FileType.WAN.CHARA.split_wan(wan)
+        # First prepare them all. This make sure we catch any conversion error and avoid partial import
+        ground_prepared = self.prepare_monster_sprite(ground, False)
+        monster_prepared = self.prepare_monster_sprite(monster, True)
+        attack_prepared = self.prepare_monster_sprite(attack, True)
+
+        self.save_monster_sprite_prepared(
+            id, monster_prepared, ground_prepared, attack_prepared
+        )
+
+    def save_monster_sprite_prepared(
+        self, id, monster: bytes, ground: bytes, attack: bytes
+    ):
+        """
+        Import all three sprite variation of the monster, already prepared with `prepare_monster_sprite`
+        (eg. by a worker process in batch mode).
+        """
+        self._check_monster_sprite_id(id)
+        self.save_monster_ground_sprite_prepared(id, ground)
+        self.save_monster_monster_sprite_prepared(id, monster)
+        self.save_monster_attack_sprite_prepared(id, attack)
+
+    def _check_monster_sprite_id(self, id):
         with self.get_ground_bin_ctx() as bin_pack:
             # We allow id to be the exact length, because this then adds a new entry!
             if id > len(bin_pack):
@@ -403,16 +428,6 @@ class SpriteModule(AbstractModule):
                     )
                 )
 
-        monster, ground, attack = FileType.WAN.CHARA.split_wan(wan)
-        # First prepare them all. This make sure we catch any conversion error and avoid partial import
-        ground_prepared = self.prepare_monster_sprite(ground, False)
-        monster_prepared = self.prepare_monster_sprite(monster, True)
-        attack_prepared = self.prepare_monster_sprite(attack, True)
-
-        self.save_monster_ground_sprite_prepared(id, ground_prepared)
-        self.save_monster_monster_sprite_prepared(id, monster_prepared)
-        self.save_monster_attack_sprite_prepared(id, attack_prepared)
-
     def prepare_monster_sprite(
         self, data: Union[bytes, WanFile], compress: bool
     ) -> bytes:
@@ -404,7 +404,7 @@ class StSpriteMonsterSpritePage(Gtk.Box):
         return current[1]
 
     def _load_frames(self):
-        with self._monster_bin as monster_bin:
+        with self._monster_bin.read() as monster_bin:
             sprite = self._load_sprite_from_bin_pack(monster_bin, self.item_data)
             ani_group = sprite.anim_groups[0]
             frame_id = 2
@@ -0,0 +1,320 @@
+"""Persistent on-disk cache for requests made to SpriteCollab servers."""
+
+#  Copyright 2020-2024 Capypara and the SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+from collections.abc import AsyncGenerator
+from typing import Any, Optional
+
+import aiohttp
+from gql.transport import AsyncTransport
+from gql.transport.aiohttp import AIOHTTPTransport
+from gql.transport.exceptions import TransportError
+from graphql import DocumentNode, ExecutionResult, print_ast
+from skytemple_files.common.project_file_manager import ProjectFileManager
+from skytemple_files.common.spritecollab.requests import AioRequestAdapter
+
+from skytemple.core.lru_cache import SizeBoundedLruCache
+
+logger = logging.getLogger(__name__)
+# Cached query results (eg. the list of Pokémon) are used without asking the server for this long.
+QUERY_TTL_S = 60 * 60
+# Cached files (eg. portrait sheets) are used without revalidating them with the server for this long.
+FILE_TTL_S = 24 * 60 * 60
+MAX_DISK_CACHE_SIZE = 256 * 1024 * 1024
+MAX_MEMORY_CACHE_SIZE = 32 * 1024 * 1024
+MAX_CONCURRENT_REQUESTS = 8
+REQUEST_TIMEOUT_S = 120
+# Errors after which the cached value is used, even if it is outdated.
+OFFLINE_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError, OSError)
+QUERY_OFFLINE_ERRORS = OFFLINE_ERRORS + (TransportError,)
+
+
+def default_cache_dir(server_url: str) -> str:
+    """The cache directory for a server, in the shared configuration directory."""
+    return os.path.join(
+        ProjectFileManager.shared_config_dir(),
+        "spritecollab_cache",
+        _hash(server_url)[:16],
+    )
+
+
+def _hash(value: str) -> str:
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+class DiskCache:
+    """
+    Entries stored as files in a directory, each with a JSON file of metadata.
+    If the directory grows over MAX_DISK_CACHE_SIZE, the least recently written entries are removed when
+    the cache is opened.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._prune()
+
+    def read(self, key: str) -> Optional[tuple[bytes, dict[str, Any]]]:
+        """
+        Returns the data and metadata of an entry. Entries without a valid `fetched_at` timestamp in
+        their metadata (eg. written by an older or a broken version) are treated as missing.
+        """
+        path = self._path(key)
+        try:
+            with open(path + ".json", "rb") as meta_file:
+                meta = json.load(meta_file)
+            if not isinstance(meta, dict) or not isinstance(
+                meta.get("fetched_at"), (int, float)
+            ):
+                return None
+            with open(path, "rb") as data_file:
+                return data_file.read(), meta
+        except (OSError, ValueError):
+            return None
+
+    def write(self, key: str, data: bytes, meta: dict[str, Any]):
+        path = self._path(key)
+        try:
+            self._write_atomic(path, data)
+            self._write_atomic(path + ".json", json.dumps(meta).encode("utf-8"))
+        except OSError as ex:
+            logger.warning(
+                f"Failed writing SpriteCollab cache entry {key}.", exc_info=ex
+            )
+
+    def write_meta(self, key: str, meta: dict[str, Any]):
+        try:
+            self._write_atomic(
+                self._path(key) + ".json", json.dumps(meta).encode("utf-8")
+            )
+        except OSError as ex:
+            logger.warning(
+                f"Failed writing SpriteCollab cache entry {key}.", exc_info=ex
+            )
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    @staticmethod
+    def _write_atomic(path: str, data: bytes):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _prune(self):
+        try:
+            entries = []
+            total = 0
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.is_file() and not entry.name.endswith(".json"):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+                        total += stat.st_size
+            entries.sort()
+            for _mtime, size, path in entries:
+                if total <= MAX_DISK_CACHE_SIZE:
+                    break
+                for p in (path, path + ".json"):
+                    try:
+                        os.remove(p)
+                    except OSError:
+                        pass
+                total -= size
+        except OSError as ex:
+            logger.warning("Failed pruning the SpriteCollab cache.", exc_info=ex)
+
+
+class DiskCachedRequestAdapter(AioRequestAdapter):
+    """
+    Request adapter for the SpriteCollab client, that keeps query results and downloaded files on disk.
+
+    Files are revalidated with the server using their ETag or modification date once they are older than
+    FILE_TTL_S, query results are fetched again once they are older than QUERY_TTL_S.
+    If the server can not be reached, cached entries are used regardless of their age, so that
+    everything browsed before is available offline.
+    At most MAX_CONCURRENT_REQUESTS files are downloaded at the same time (per event loop).
+    """
+
+    def __init__(self, cache_dir: str, *, use_certifi_ssl=False):
+        self.use_certifi_ssl = use_certifi_ssl
+        self.disk = DiskCache(cache_dir)
+        self._memory: SizeBoundedLruCache[str, bytes] = SizeBoundedLruCache(
+            MAX_MEMORY_CACHE_SIZE, len
+        )
+        # The client is used from multiple threads, each with their own event loop.
+        self._semaphores: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, asyncio.Semaphore
+        ] = weakref.WeakKeyDictionary()
+        self._semaphores_lock = threading.Lock()
+
+    async def fetch_bin(self, url: str) -> bytes:
+        data = self._memory.get(url)
+        if data is not None:
+            return data
+        key = _hash(url)
+        cached = self.disk.read(key)
+        if cached is not None and time.time() - cached[1]["fetched_at"] < FILE_TTL_S:
+            self._memory.put(url, cached[0])
+            return cached[0]
+        headers = {}
+        if cached is not None:
+            if cached[1].get("etag") is not None:
+                headers["If-None-Match"] = cached[1]["etag"]
+            if cached[1].get("last_modified") is not None:
+                headers["If-Modified-Since"] = cached[1]["last_modified"]
+        try:
+            async with self._semaphore():
+                async with aiohttp.ClientSession() as session:
+                    async with session.get(
+                        url,
+                        headers=headers,
+                        ssl=self._ssl_context(),
+                        timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT_S),
+                    ) as resp:
+                        if resp.status == 304 and cached is not None:
+                            data = cached[0]
+                            meta = cached[1]
+                            meta["fetched_at"] = time.time()
+                            self.disk.write_meta(key, meta)
+                        else:
+                            resp.raise_for_status()
+                            data = await resp.read()
+                            self.disk.write(
+                                key,
+                                data,
+                                {
+                                    "url": url,
+                                    "etag": resp.headers.get("ETag"),
+                                    "last_modified": resp.headers.get("Last-Modified"),
+                                    "fetched_at": time.time(),
+                                },
+                            )
+        except OFFLINE_ERRORS as ex:
+            if cached is None:
+                raise
+            logger.info(f"Using outdated cache entry for {url}: {ex}")
+            data = cached[0]
+        self._memory.put(url, data)
+        return data
+
+    def graphql_transport(self, url: str) -> DiskCachedTransport:
+        return DiskCachedTransport(
+            url, self.disk, self._transport_kwargs(), QUERY_TTL_S
+        )
+
+    def flush_cache(self):
+        """Clears the in-memory cache. Entries on disk are kept."""
+        self._memory.clear()
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._semaphores_lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+                self._semaphores[loop] = semaphore
+            return semaphore
+
+    def _ssl_context(self) -> Any:
+        if self.use_certifi_ssl:
+            import certifi  # type: ignore
+            import ssl
+
+            return ssl.create_default_context(cafile=certifi.where())
+        return None
+
+    def _transport_kwargs(self) -> dict[str, Any]:
+        ssl_context = self._ssl_context()
+        if ssl_context is not None:
+            return {"ssl": ssl_context}
+        return {}
+
+
+class DiskCachedTransport(AsyncTransport):
+    """GraphQL transport that keeps the results of successful queries in a DiskCache."""
+
+    def __init__(
+        self, url: str, disk: DiskCache, transport_kwargs: dict[str, Any], ttl: float
+    ):
+        self._url = url
+        self._transport = AIOHTTPTransport(url=url, **transport_kwargs)
+        self._disk = disk
+        self._ttl = ttl
+
+    async def connect(self):
+        return await self._transport.connect()
+
+    async def close(self):
+        return await self._transport.close()
+
+    # gql 3 passes the document, variables and operation name, gql 4 passes a single GraphQLRequest.
+    # Both are passed on to the wrapped transport unchanged.
+    async def execute(self, request: Any, *args: Any, **kwargs: Any) -> ExecutionResult:
+        key = self._cache_key(request, *args, **kwargs)
+        cached = self._disk.read(key)
+        if cached is not None and time.time() - cached[1]["fetched_at"] < self._ttl:
+            return ExecutionResult(data=json.loads(cached[0]))
+        try:
+            result = await self._transport.execute(request, *args, **kwargs)
+        except QUERY_OFFLINE_ERRORS as ex:
+            if cached is None:
+                raise
+            logger.info(f"Using outdated cached query result: {ex}")
+            return ExecutionResult(data=json.loads(cached[0]))
+        if result.errors is None and result.data is not None:
+            self._disk.write(
+                key,
+                json.dumps(result.data).encode("utf-8"),
+                {"url": self._url, "fetched_at": time.time()},
+            )
+        return result
+
+    def subscribe(
+        self, request: Any, *args: Any, **kwargs: Any
+    ) -> AsyncGenerator[ExecutionResult, None]:
+        # We don't cache these.
+        return self._transport.subscribe(request, *args, **kwargs)
+
+    def _cache_key(
+        self,
+        request: Any,
+        variable_values: Optional[dict[str, Any]] = None,
+        operation_name: Optional[str] = None,
+    ) -> str:
+        document: DocumentNode = request
+        if not isinstance(request, DocumentNode):
+            document = request.document
+            variable_values = request.variable_values
+            operation_name = request.operation_name
+        return _hash(
+            json.dumps(
+                [self._url, print_ast(document), variable_values, operation_name],
+                sort_keys=True,
+            )
+        )
@@ -14,32 +14,48 @@
 #
 #  You should have received a copy of the GNU General Public License
 #  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
-import asyncio
-import os
+import logging
 import sys
-from tempfile import NamedTemporaryFile
-from typing import Optional
+from collections.abc import Sequence
+from typing import Callable, NamedTuple, Optional
 
-from PIL import Image
 from gi.repository import Gtk, GLib, Pango
 from range_typed_integers import i16
-from skytemple_files.common.i18n_util import _
+from skytemple_files.common.i18n_util import _, f
 from skytemple_files.common.ppmdu_config.data import Pmd2Sprite
 from skytemple_files.common.spritecollab.client import (
     MonsterFormDetails,
     SpriteCollabClient,
 )
+from skytemple_files.common.types.file_types import FileType
 from skytemple_files.data.md.protocol import ShadowSize
 from skytemple_files.graphics.chara_wan.model import WanFile
+from skytemple_files.graphics.kao.protocol import KaoImageProtocol
 
 from skytemple.controller.main import MainController
 from skytemple.core.abstract_module import AbstractModule
+from skytemple.core.async_tasks.delegator import AsyncTaskDelegator
 from skytemple.core.error_handler import display_error
 from skytemple.core.item_tree import ItemTree
 from skytemple.core.message_dialog import SkyTempleMessageDialog
 from skytemple.core.rom_project import RomProject
 from skytemple.module.spritecollab.widget.browser import StSpritecollabBrowserPage
 
+logger = logging.getLogger(__name__)
+# Monster ID and form path of a form on SpriteCollab.
+SpriteCollabForm = tuple[int, str]
+# The merged WAN file, the action mappings and the shadow size of a sprite.
+SpriteCollabSprite = tuple[WanFile, Pmd2Sprite, int]
+# Receives a message describing what is currently done, or None when done.
+ProgressCallback = Callable[[Optional[str]], None]
+
+
+class FetchedAssets(NamedTuple):
+    """Assets of one form fetched from SpriteCollab. None if not requested (or not available)."""
+
+    portraits: Optional[list[Optional[KaoImageProtocol]]]
+    sprite: Optional[SpriteCollabSprite]
+
 
 class SpritecollabModule(AbstractModule):
     @classmethod
@@ -59,7 +75,17 @@ class SpritecollabModule(AbstractModule):
     def show_spritecollab_browser(self):
         return StSpritecollabBrowserPage.get_instance(self).show()
 
-    def apply_portraits(self, window: Gtk.Window, portraits: Image.Image):
+    def apply_portraits(
+        self,
+        window: Gtk.Window,
+        client: SpriteCollabClient,
+        form: MonsterFormDetails,
+        on_progress: Optional[ProgressCallback] = None,
+    ):
+        """
+        Downloads the portraits of the form and applies them to the currently opened Pokémon.
+        The portraits are fetched as KaoImages, the same way as for batch applying.
+        """
         project = RomProject.get_current()
         monster_idx = self._check_opened(window)
         if monster_idx is None:
@@ -70,26 +96,38 @@ class SpritecollabModule(AbstractModule):
         if not portrait_module.is_idx_supported(prt_idx):
             self._msg_not_supported(window)
             return
-        fname: Optional[str] = None
-        try:
-            with NamedTemporaryFile("w+b", delete=False, suffix=".png") as f:
-                fname = f.name
-                portraits.save(f)
-            portrait_module.import_sheet(prt_idx, fname)
-            GLib.idle_add(lambda: MainController.reload_view())
-            GLib.idle_add(
-                lambda: self._msg_success(window, _("Portraits successfully imported."))
-            )
-        finally:
-            try:
-                if fname is not None:
-                    os.remove(fname)
-            except Exception:
-                pass
+
+        def on_fetched(assets: list[FetchedAssets]):
+            portraits = assets[0].portraits
+            if portraits is None:
+                self._msg_no_data(window)
+                return
+            portrait_module.import_portraits(prt_idx, portraits)
+            MainController.reload_view()
+            self._msg_success(window, _("Portraits successfully imported."))
+
+        self._run_fetch(
+            window,
+            client,
+            [(form.monster_id, form.form_path)],
+            True,
+            False,
+            False,
+            on_fetched,
+            on_progress,
+        )
 
     def apply_sprites(
-        self, window: Gtk.Window, client: SpriteCollabClient, form: MonsterFormDetails
+        self,
+        window: Gtk.Window,
+        client: SpriteCollabClient,
+        form: MonsterFormDetails,
+        on_progress: Optional[ProgressCallback] = None,
     ):
+        """
+        Downloads and converts the sprites of the form and applies them to the currently opened Pokémon.
+        The download runs as an async task, `on_progress` is updated while it is running.
+        """
         project = RomProject.get_current()
         monster_idx = self._check_opened(window)
         if monster_idx is None:
@@ -112,31 +150,191 @@ class SpritecollabModule(AbstractModule):
             self._msg_not_supported(window)
             return
 
-        spr_result = asyncio.run(
-            get_sprites(client, (form.monster_id, form.form_path), copy_event_sleep)
+        def on_fetched(assets: list[FetchedAssets]):
+            spr_result = assets[0].sprite
+            try:
+                if spr_result is None:
+                    self._msg_no_data(window)
+                    return
+                self.import_sprite(monster_idx, sprite_idx, spr_result)
+                MainController.reload_view()
+                self._msg_success(window, _("Sprites successfully imported."))
+            except BaseException as e:
+                display_error(
+                    sys.exc_info(), str(e), _("Error importing the spritesheet.")
+                )
+
+        self._run_fetch(
+            window,
+            client,
+            [(form.monster_id, form.form_path)],
+            False,
+            True,
+            copy_event_sleep,
+            on_fetched,
+            on_progress,
         )
-        try:
-            if spr_result is not None:
-                wan_file, pmd2_sprite, shadow_size_id = spr_result
-                # update sprite
-                sprite_module.save_monster_sprite(sprite_idx, wan_file)
-
-                monster_module.set_sprite_idx(monster_idx, sprite_idx)
-                monster_module.set_shadow_size(
-                    monster_idx,
-                    ShadowSize(shadow_size_id),  # type: ignore
+
+    def apply_batch(
+        self,
+        window: Gtk.Window,
+        client: SpriteCollabClient,
+        targets: Sequence[tuple[int, SpriteCollabForm]],
+        portraits: bool,
+        sprites: bool,
+        copy_event_sleep: bool,
+        on_progress: Optional[ProgressCallback] = None,
+    ):
+        """
+        Applies the assets of many forms in one pass. `targets` are pairs of the ID of a Pokémon in the ROM
+        and the SpriteCollab form to apply to it. All assets are downloaded at once, sprites replace the
+        existing sprite of each Pokémon.
+        """
+        project = RomProject.get_current()
+        if project is None:
+            self._msg_not_opened(window)
+            return
+        if len(targets) < 1:
+            return
+
+        def on_fetched(assets: list[FetchedAssets]):
+            failed = []
+            for (monster_idx, form), asset in zip(targets, assets):
+                try:
+                    self.import_assets(monster_idx, asset)
+                except BaseException as e:
+                    logger.warning(
+                        f"Failed applying {form} to {monster_idx}.", exc_info=e
+                    )
+                    failed.append(f"#{monster_idx:04}: {e}")
+            MainController.reload_view()
+            if len(failed) > 0:
+                errors = "\n".join(failed)
+                display_error(
+                    None,
+                    f(_("The assets of some Pokémon could not be applied:\n{errors}")),
+                    _("Error importing assets."),
+                    window=window,
+                    should_report=False,
                 )
-                sprite_module.update_sprconf(pmd2_sprite)
             else:
-                self._msg_no_data(window)
-                return
+                count = len(targets)
+                self._msg_success(
+                    window, f(_("Assets of {count} Pokémon successfully imported."))
+                )
 
-            GLib.idle_add(lambda: MainController.reload_view())
+        self._run_fetch(
+            window,
+            client,
+            [form for _monster_idx, form in targets],
+            portraits,
+            sprites,
+            copy_event_sleep,
+            on_fetched,
+            on_progress,
+        )
+
+    def import_assets(self, monster_idx: int, assets: FetchedAssets):
+        """
+        Imports the fetched assets for a Pokémon of the ROM. The portraits replace all portraits of the Pokémon,
+        the sprite replaces its current sprite. Missing assets are skipped.
+        """
+        project = RomProject.get_current()
+        assert project is not None
+        if assets.portraits is not None:
+            prt_idx = monster_idx - 1
+            portrait_module = project.get_module("portrait")
+            if not portrait_module.is_idx_supported(prt_idx):
+                raise ValueError(_("This Pokémon does not support portraits."))
+            portrait_module.import_portraits(prt_idx, assets.portraits)
+        if assets.sprite is not None:
+            sprite_idx = project.get_module("monster").get_sprite_idx(monster_idx)
+            if not project.get_module("sprite").is_idx_supported(sprite_idx):
+                raise ValueError(_("This Pokémon does not support sprites."))
+            self.import_sprite(monster_idx, sprite_idx, assets.sprite)
+
+    def import_sprite(
+        self, monster_idx: int, sprite_idx: i16, sprite: SpriteCollabSprite
+    ):
+        """Imports a sprite as sprite_idx and assigns it to the Pokémon."""
+        project = RomProject.get_current()
+        assert project is not None
+        sprite_module = project.get_module("sprite")
+        monster_module = project.get_module("monster")
+        wan_file, pmd2_sprite, shadow_size_id = sprite
+        # update sprite
+        sprite_module.save_monster_sprite(sprite_idx, wan_file)
+
+        monster_module.set_sprite_idx(monster_idx, sprite_idx)
+        monster_module.set_shadow_size(
+            monster_idx,
+            ShadowSize(shadow_size_id),  # type: ignore
+        )
+        sprite_module.update_sprconf(pmd2_sprite)
+
+    def get_batch_targets(
+        self, first_idx: int, last_idx: int, forms: dict[int, str]
+    ) -> list[tuple[int, SpriteCollabForm]]:
+        """
+        Pairs each Pokémon of the ROM with an ID between first_idx and last_idx (inclusive) with the
+        SpriteCollab form for its National Pokédex number. `forms` maps SpriteCollab monster IDs to the
+        form path to use. Pokémon without a form on SpriteCollab are skipped.
+        """
+        project = RomProject.get_current()
+        assert project is not None
+        md = project.get_module("monster").monster_md
+        # Only the entries of the first gender, the second gender entries usually share their assets.
+        last_idx = min(last_idx, len(md) - 1, FileType.MD.properties().num_entities - 1)
+        targets: list[tuple[int, SpriteCollabForm]] = []
+        for idx in range(max(first_idx, 1), last_idx + 1):
+            dex_number = int(md[idx].national_pokedex_number)
+            if dex_number in forms:
+                targets.append((idx, (dex_number, forms[dex_number])))
+        return targets
+
+    def _run_fetch(
+        self,
+        window: Gtk.Window,
+        client: SpriteCollabClient,
+        forms: list[SpriteCollabForm],
+        portraits: bool,
+        sprites: bool,
+        copy_event_sleep: bool,
+        on_fetched: Callable[[list[FetchedAssets]], None],
+        on_progress: Optional[ProgressCallback],
+    ):
+        # The assets are fetched as an async task, the callbacks are always called on the UI thread.
+        def progress(msg: Optional[str]):
+            if on_progress is not None:
+                GLib.idle_add(lambda: on_progress(msg))
+
+        def done(assets: list[FetchedAssets]):
+            progress(None)
+            GLib.idle_add(lambda: on_fetched(assets))
+
+        def error(err: Exception):
+            progress(None)
             GLib.idle_add(
-                lambda: self._msg_success(window, _("Sprites successfully imported."))
+                lambda: display_error(
+                    err,
+                    _("Failed downloading the assets from SpriteCollab."),
+                    _("Error importing assets."),
+                    window=window,
+                )
             )
-        except BaseException as e:
-            display_error(sys.exc_info(), str(e), _("Error importing the spritesheet."))
+
+        AsyncTaskDelegator.run_task(
+            fetch_assets(
+                client,
+                forms,
+                portraits,
+                sprites,
+                copy_event_sleep,
+                progress,
+                done,
+                error,
+            )
+        )
 
     def _check_opened(self, window: Gtk.Window) -> Optional[int]:
         project = RomProject.get_current()
@@ -238,15 +436,43 @@ class SpritecollabModule(AbstractModule):
             md.destroy()
 
 
-async def get_sprites(
+async def fetch_assets(
     client: SpriteCollabClient,
-    form: tuple[int, str],
+    forms: Sequence[SpriteCollabForm],
+    portraits: bool,
+    sprites: bool,
     copy_to_event_sleep_if_missing: bool,
-) -> Optional[tuple[WanFile, Pmd2Sprite, int]]:
-    async with client as session:
-        sprites = await session.fetch_sprites(
-            [form],
-            [None],
-            copy_to_event_sleep_if_missing=copy_to_event_sleep_if_missing,
-        )
-        return sprites[0]
+    on_progress: ProgressCallback,
+    callback: Callable[[list[FetchedAssets]], None],
+    error_callback: Callable[[Exception], None],
+):
+    """Fetches the portraits and/or sprites of all forms, with one request per asset type."""
+    try:
+        fetched_portraits: Optional[list[list[Optional[KaoImageProtocol]]]] = None
+        fetched_sprites: Optional[list[Optional[SpriteCollabSprite]]] = None
+        count = len(forms)
+        async with client as session:
+            if portraits:
+                on_progress(f(_("Downloading portraits of {count} Pokémon...")))
+                fetched_portraits = await session.fetch_portraits(forms)
+            if sprites:
+                on_progress(
+                    f(_("Downloading and converting sprites of {count} Pokémon..."))
+                )
+                fetched_sprites = await session.fetch_sprites(
+                    forms,
+                    [None] * count,
+                    copy_to_event_sleep_if_missing=copy_to_event_sleep_if_missing,
+                )
+    except Exception as err:
+        error_callback(err)
+        return
+    callback(
+        [
+            FetchedAssets(
+                fetched_portraits[i] if fetched_portraits is not None else None,
+                fetched_sprites[i] if fetched_sprites is not None else None,
+            )
+            for i in range(count)
+        ]
+    )
@@ -36,9 +36,14 @@ from skytemple_files.common.spritecollab.client import (
     MonsterFormDetails,
 )
 from skytemple_files.common.spritecollab.schema import Credit
+from skytemple_files.common.types.file_types import FileType
 from skytemple.controller.main import MainController
 from skytemple.core.error_handler import display_error
 from skytemple.core.list_icon_renderer import ListIconRenderer
+from skytemple.module.spritecollab.cache import (
+    DiskCachedRequestAdapter,
+    default_cache_dir,
+)
 
 if TYPE_CHECKING:
     from skytemple.module.spritecollab.module import SpritecollabModule
@@ -126,6 +131,7 @@ class StSpritecollabBrowserPage(Gtk.Window):
     sc_paned: Gtk.Paned = cast(Gtk.Paned, Gtk.Template.Child())
     sc_left: Gtk.Box = cast(Gtk.Box, Gtk.Template.Child())
     sc_infobar: Gtk.InfoBar = cast(Gtk.InfoBar, Gtk.Template.Child())
+    sc_infobar_label: Gtk.Label = cast(Gtk.Label, Gtk.Template.Child())
     sc_tree: Gtk.TreeView = cast(Gtk.TreeView, Gtk.Template.Child())
     sc_stack: Gtk.Stack = cast(Gtk.Stack, Gtk.Template.Child())
     sc_page_welcome: Gtk.Box = cast(Gtk.Box, Gtk.Template.Child())
@@ -138,6 +144,7 @@ class StSpritecollabBrowserPage(Gtk.Window):
     sc_external: Gtk.Button = cast(Gtk.Button, Gtk.Template.Child())
     sc_settings: Gtk.Button = cast(Gtk.Button, Gtk.Template.Child())
     sc_help: Gtk.Button = cast(Gtk.Button, Gtk.Template.Child())
+    sc_batch: Gtk.Button = cast(Gtk.Button, Gtk.Template.Child())
     sc_diag_settings: Gtk.Dialog = cast(Gtk.Dialog, Gtk.Template.Child())
     button1: Gtk.Button = cast(Gtk.Button, Gtk.Template.Child())
     button2: Gtk.Button = cast(Gtk.Button, Gtk.Template.Child())
@@ -157,6 +164,8 @@ class StSpritecollabBrowserPage(Gtk.Window):
         self._spriteclient: SpriteCollabClient | None = None
         self._disable_switch = True
         self._something_loading = False
+        # SpriteCollab monster ID -> form path of the default form
+        self._default_forms: dict[int, str] = {}
         self.set_parent(MainController.window())
         self.resize(1100, 720)
         # Filtered, Name, ID, Display Label, Form Paths (List[str])
@@ -198,12 +207,18 @@ class StSpritecollabBrowserPage(Gtk.Window):
             )
             external_button.set_sensitive(False)
         self._store.clear()
+        self._default_forms = {}
         self._filter.refilter()
         search.set_text("")
+        self.sc_infobar_label.set_text(_("Loading..."))
         info_bar.set_revealed(True)
         stack.set_visible_child(self.sc_page_welcome)
         self._spriteclient = SpriteCollabClient(
-            server_url=self._spriteserver_url, use_ssl=platform.system() != "Windows"
+            server_url=self._spriteserver_url,
+            use_ssl=platform.system() != "Windows",
+            request_adapter=DiskCachedRequestAdapter(
+                default_cache_dir(self._spriteserver_url)
+            ),
         )
         Thread(
             target=loader,
@@ -224,6 +239,7 @@ class StSpritecollabBrowserPage(Gtk.Window):
                 or monster.form_path == "0"
                 or monster.form_path == "0000"
             ):
+                self._default_forms[monster.monster_id] = monster.form_path
                 self._store.append(
                     [
                         True,
@@ -303,6 +319,103 @@ class StSpritecollabBrowserPage(Gtk.Window):
             self._spritebrowser_url = browser_text if browser_text != "" else None
             self.reinit()
 
+    @Gtk.Template.Callback()
+    def on_sc_batch_clicked(self, *args):
+        if self._spriteclient is None or len(self._default_forms) < 1:
+            return
+        batch_diag = self._show_batch_diag()
+        if batch_diag is None:
+            return
+        first_idx, last_idx, portraits, sprites, copy_event_sleep = batch_diag
+        targets = self.module.get_batch_targets(
+            first_idx, last_idx, self._default_forms
+        )
+        if len(targets) < 1:
+            display_error(
+                None,
+                _("None of the selected Pokémon are available on SpriteCollab."),
+                window=self,
+                should_report=False,
+            )
+            return
+        self.module.apply_batch(
+            self,
+            self._spriteclient,
+            targets,
+            portraits,
+            sprites,
+            copy_event_sleep,
+            self.show_progress,
+        )
+
+    def show_progress(self, msg: Optional[str]):
+        """Shows the progress of applying assets in the info bar. None hides it again."""
+        busy = msg is not None
+        if busy:
+            self.sc_infobar_label.set_text(msg)
+        self.sc_infobar.set_revealed(busy)
+        self.sc_batch.set_sensitive(not busy)
+        self.sc_content_stack.set_sensitive(not busy)
+
+    def _show_batch_diag(self) -> Optional[tuple[int, int, bool, bool, bool]]:
+        diag: Gtk.Dialog = Gtk.Dialog()
+        diag.set_parent(self)
+        diag.set_transient_for(self)
+        diag.set_modal(True)
+        diag.add_buttons(
+            _("Cancel"), Gtk.ResponseType.CLOSE, _("Apply"), Gtk.ResponseType.APPLY
+        )
+        content: Gtk.Box = diag.get_content_area()
+        content.set_spacing(10)
+        content.set_margin_start(5)
+        content.set_margin_end(5)
+        content_label: Gtk.Label = Gtk.Label.new(
+            _(
+                "This will apply the default form from the repository to all Pokémon in the ROM with an ID\n"
+                "in the range below, matched by their National Pokédex number.\n"
+                "The portraits and sprites of these Pokémon will be replaced."
+            )
+        )
+        content_label.set_line_wrap(True)
+        content.pack_start(content_label, True, True, 0)
+        range_box: Gtk.Box = Gtk.Box.new(Gtk.Orientation.HORIZONTAL, 5)
+        first_idx: Gtk.SpinButton = Gtk.SpinButton.new_with_range(1, 9999, 1)
+        last_idx: Gtk.SpinButton = Gtk.SpinButton.new_with_range(1, 9999, 1)
+        last_idx.set_value(FileType.MD.properties().num_entities - 1)
+        range_box.pack_start(Gtk.Label.new(_("From ID:")), False, False, 0)
+        range_box.pack_start(first_idx, False, False, 0)
+        range_box.pack_start(Gtk.Label.new(_("To ID:")), False, False, 0)
+        range_box.pack_start(last_idx, False, False, 0)
+        content.pack_start(range_box, True, True, 0)
+        portraits: Gtk.CheckButton = Gtk.CheckButton.new_with_label(
+            _("Apply portraits.")
+        )
+        portraits.set_active(True)
+        content.pack_start(portraits, True, True, 0)
+        sprites: Gtk.CheckButton = Gtk.CheckButton.new_with_label(_("Apply sprites."))
+        sprites.set_active(True)
+        content.pack_start(sprites, True, True, 0)
+        copy_event_sleep: Gtk.CheckButton = Gtk.CheckButton.new_with_label(
+            _("Copy the Sleep animation to EventSleep/Laying/Waking.")
+        )
+        copy_event_sleep.set_active(True)
+        content.pack_start(copy_event_sleep, True, True, 0)
+        content.show_all()
+        response = diag.run()
+        diag.hide()
+        diag.destroy()
+        if response == Gtk.ResponseType.APPLY and (
+            portraits.get_active() or sprites.get_active()
+        ):
+            return (
+                first_idx.get_value_as_int(),
+                last_idx.get_value_as_int(),
+                portraits.get_active(),
+                sprites.get_active(),
+                copy_event_sleep.get_active(),
+            )
+        return None
+
     @Gtk.Template.Callback()
     def on_sc_help_clicked(self, *args):
         from skytemple.controller.main import SKYTEMPLE_WIKI_LINK
@@ -487,7 +600,9 @@ class StSpritecollabBrowserPage(Gtk.Window):
         portraits_button: Gtk.Button = Gtk.Button.new_with_label(_("Apply Portraits"))
         portraits_button.connect(
             "clicked",
-            lambda *args: self.module.apply_portraits(self, portrait),
+            lambda *args: self.module.apply_portraits(
+                self, assert_not_none(self._spriteclient), form, self.show_progress
+            ),
         )
         new_child.attach(portraits_button, 0, 3, 1, 1)
         # Sprites
@@ -516,7 +631,7 @@ class StSpritecollabBrowserPage(Gtk.Window):
         sprite_button.connect(
             "clicked",
             lambda *args: self.module.apply_sprites(
-                self, assert_not_none(self._spriteclient), form
+                self, assert_not_none(self._spriteclient), form, self.show_progress
             ),
         )
         new_child.attach(sprite_button, 1, 3, 1, 1)
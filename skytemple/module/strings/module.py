@@ -27,12 +27,14 @@ from skytemple.core.item_tree import (
     RecursionType,
 )
 from skytemple.core.module_controller import AbstractController
+from skytemple.core.open_request import OpenRequest, REQUEST_TYPE_STRING
 from skytemple.core.rom_project import RomProject
 from skytemple.core.widget.status_page import StStatusPageData, StStatusPage
 
 from skytemple_files.common.types.file_types import FileType
 from skytemple_files.data.str.model import Str
 
+from skytemple.module.strings.search_index import StringSearchIndex
 from skytemple.module.strings.widget.strings import StStringsStringsPage
 
 MAIN_VIEW_DATA = StStatusPageData(
@@ -62,6 +64,7 @@ class StringsModule(AbstractModule):
 
         self._item_tree: Optional[ItemTree] = None
         self._tree_iters: dict[str, ItemTreeEntryRef] = {}
+        self._search_index: Optional[StringSearchIndex] = None
 
     def load_tree_items(self, item_tree: ItemTree):
         root = item_tree.add_entry(
@@ -91,6 +94,12 @@ class StringsModule(AbstractModule):
     def get_string_file(self, filename: str) -> Str:
         return self.project.open_file_in_rom(f"MESSAGE/{filename}", FileType.STR)
 
+    def get_search_index(self) -> StringSearchIndex:
+        """Returns the search index over the strings of all languages. It is built on first use."""
+        if self._search_index is None:
+            self._search_index = StringSearchIndex(self.project.get_string_provider())
+        return self._search_index
+
     def mark_as_modified(self, filename: str):
         """Mark as modified"""
         self.project.mark_as_modified(f"MESSAGE/{filename}")
@@ -100,6 +109,14 @@ class StringsModule(AbstractModule):
                 self._tree_iters[filename], RecursionType.UP
             )
 
+    def handle_request(self, request: OpenRequest) -> Optional[ItemTreeEntryRef]:
+        if request.type == REQUEST_TYPE_STRING:
+            filename, index = request.identifier
+            if filename in self._tree_iters:
+                StStringsStringsPage.focus_string_on_open = index
+                return self._tree_iters[filename]
+        return None
+
     def collect_debugging_info(
         self, open_view: Union[AbstractController, Gtk.Widget]
     ) -> Optional[DebuggingInfo]:
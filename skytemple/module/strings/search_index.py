@@ -0,0 +1,149 @@
+#  Copyright 2020-2024 Capypara and the SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+"""Case-insensitive substring search over the text strings of all languages."""
+
+from __future__ import annotations
+
+from bisect import bisect_right
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from skytemple.core.string_provider import StringProvider
+
+# Number of strings per block. Changing a string only rebuilds the block it is in.
+BLOCK_SIZE = 256
+# Joins the strings of a block. Queries never contain it, so a match never spans two strings.
+SEPARATOR = "\0"
+
+
+class StringSearchResult(NamedTuple):
+    language: str  # filename of the language's string file
+    idx: int
+
+
+class _Block:
+    """The case-folded strings of a block joined into one text, which can then be searched with str.find."""
+
+    __slots__ = ("text", "starts")
+
+    def __init__(self, strings: list[str]):
+        self.starts: list[int] = []
+        offset = 0
+        folded = []
+        for string in strings:
+            s = string.casefold()
+            self.starts.append(offset)
+            folded.append(s)
+            offset += len(s) + len(SEPARATOR)
+        self.text = SEPARATOR.join(folded)
+
+    def find(self, query: str) -> list[int]:
+        """Returns the indices (relative to the block) of all strings containing query."""
+        found = []
+        starts = self.starts
+        i = 0
+        pos = self.text.find(query)
+        while pos != -1:
+            i = bisect_right(starts, pos, i) - 1
+            found.append(i)
+            if i + 1 >= len(starts):
+                break
+            # Continue with the next string, every string is only reported once.
+            pos = self.text.find(query, starts[i + 1])
+        return found
+
+
+class StringSearchIndex:
+    """
+    Index of the text strings of all languages (as returned by the StringProvider).
+
+    The strings are kept case-folded in blocks, so a search is one str.find pass per block instead of
+    comparing every string in Python. The index is kept up to date incrementally: `update` rebuilds the
+    block of a single changed string and before every search, strings changed in other ways
+    (eg. imported or edited by other modules) are detected and their blocks rebuilt.
+    """
+
+    def __init__(self, string_provider: StringProvider):
+        self._string_provider = string_provider
+        self._languages = string_provider.get_languages()
+        # Language filename -> strings as they were indexed
+        self._indexed: dict[str, list[str]] = {}
+        # Language filename -> blocks
+        self._blocks: dict[str, list[_Block]] = {}
+
+    def search(self, query: str) -> list[StringSearchResult]:
+        """
+        Returns all strings containing query (case-insensitive), ordered by language (in the order of
+        the StringProvider) and index.
+        """
+        query = query.casefold().replace(SEPARATOR, "")
+        if query == "":
+            return []
+        self._sync()
+        results = []
+        for language in self._languages:
+            fn = language.filename
+            for block_no, block in enumerate(self._blocks[fn]):
+                base = block_no * BLOCK_SIZE
+                for i in block.find(query):
+                    results.append(StringSearchResult(fn, base + i))
+        return results
+
+    def update(self, language: str, index: int, text: str):
+        """Updates a single string of a language (by filename), after it was changed."""
+        indexed = self._indexed.get(language)
+        if indexed is None:
+            # Not built yet, will be read from the model when needed.
+            return
+        if index >= len(indexed):
+            self._invalidate(language)
+            return
+        indexed[index] = text
+        self._rebuild_block(language, index // BLOCK_SIZE)
+
+    def _sync(self):
+        for language in self._languages:
+            fn = language.filename
+            strings = self._string_provider.get_model(language).strings
+            indexed = self._indexed.get(fn)
+            if indexed is None or len(indexed) != len(strings):
+                self._build(fn, strings)
+            elif indexed != strings:
+                changed_blocks = set()
+                for i, (old, new) in enumerate(zip(indexed, strings)):
+                    if old != new:
+                        indexed[i] = new
+                        changed_blocks.add(i // BLOCK_SIZE)
+                for block_no in changed_blocks:
+                    self._rebuild_block(fn, block_no)
+
+    def _build(self, language: str, strings: list[str]):
+        self._indexed[language] = list(strings)
+        self._blocks[language] = [
+            _Block(strings[i : i + BLOCK_SIZE])
+            for i in range(0, len(strings), BLOCK_SIZE)
+        ]
+
+    def _rebuild_block(self, language: str, block_no: int):
+        start = block_no * BLOCK_SIZE
+        self._blocks[language][block_no] = _Block(
+            self._indexed[language][start : start + BLOCK_SIZE]
+        )
+
+    def _invalidate(self, language: str):
+        self._indexed.pop(language, None)
+        self._blocks.pop(language, None)
@@ -20,12 +20,14 @@ import logging
 import re
 import sys
 import typing
-from typing import TYPE_CHECKING, cast
+from bisect import bisect_right
+from typing import TYPE_CHECKING, Optional, cast
 from gi.repository import Gtk
 from gi.repository.Gtk import TreeModelFilter, TreeSelection
 from skytemple.controller.main import MainController
 from skytemple.core.error_handler import display_error
 from skytemple.core.message_dialog import SkyTempleMessageDialog
+from skytemple.core.open_request import OpenRequest, REQUEST_TYPE_STRING
 from skytemple.core.third_party_util.cellrenderercustomtext import CellRendererTextView
 from skytemple.core.ui_utils import (
     add_dialog_csv_filter,
@@ -43,6 +45,8 @@ if TYPE_CHECKING:
 ORANGE = "orange"
 ORANGE_RGB = (1, 0.65, 0)
 PATTERN_MD_ENTRY = re.compile(".*\\(\\$(\\d+)\\).*")
+# Maximum number of search results (of all languages) listed below the search field.
+MAX_SEARCH_RESULTS = 1000
 logger = logging.getLogger(__name__)
 import os
 
@@ -63,6 +67,14 @@ class StStringsStringsPage(Gtk.Box):
     btn_export: Gtk.Button = cast(Gtk.Button, Gtk.Template.Child())
     string_tree: Gtk.TreeView = cast(Gtk.TreeView, Gtk.Template.Child())
     search: Gtk.SearchEntry = cast(Gtk.SearchEntry, Gtk.Template.Child())
+    search_results_store: Gtk.ListStore = cast(Gtk.ListStore, Gtk.Template.Child())
+    search_results_label: Gtk.Label = cast(Gtk.Label, Gtk.Template.Child())
+    search_results_window: Gtk.ScrolledWindow = cast(
+        Gtk.ScrolledWindow, Gtk.Template.Child()
+    )
+    search_results_tree: Gtk.TreeView = cast(Gtk.TreeView, Gtk.Template.Child())
+    # If set, this string will be focused on first load
+    focus_string_on_open: Optional[int] = None
 
     def __init__(self, module: StringsModule, item_data: Pmd2Language):
         super().__init__()
@@ -78,6 +90,8 @@ class StStringsStringsPage(Gtk.Box):
         self._filter: TreeModelFilter
         self._active_category: Pmd2StringBlock | None = None
         self._search_text = ""
+        # Indices of the strings of this language matching the search, None if not searching.
+        self._search_matches: Optional[set[int]] = None
         self.lang_name.set_text(f(_("{self.langname} Text Strings")))
         self._str = self.module.get_string_file(self.filename)
         self._string_cats = (
@@ -85,8 +99,13 @@ class StStringsStringsPage(Gtk.Box):
             .get_static_data()
             .string_index_data.string_blocks
         )
+        self._cats = list(self._collect_categories())
+        self._cat_begins = [cat.begin for cat in self._cats]
         self.refresh_cats()
         self.refresh_list()
+        if self.__class__.focus_string_on_open is not None:
+            self._focus_string(self.__class__.focus_string_on_open)
+            self.__class__.focus_string_on_open = None
         self._suppress_signals = False
 
     def on_cr_string_edited(self, widget, path, text):
@@ -96,6 +115,10 @@ class StStringsStringsPage(Gtk.Box):
         )
         self._filter[path][1] = text
         self._str.strings[idx] = text
+        self.module.get_search_index().update(self.filename, idx, text)
+        for row in self.search_results_store:
+            if row[0] == self.filename and row[1] == idx + 1:
+                row[4] = text
         self.module.mark_as_modified(self.filename)
 
     def refresh_cats(self):
@@ -103,7 +126,7 @@ class StStringsStringsPage(Gtk.Box):
         cat_store = typing.cast(Gtk.ListStore, assert_not_none(tree.get_model()))
         cat_store.clear()
         cat_store.append([_("(All)"), None])
-        for cat in self._collect_categories():
+        for cat in self._cats:
             cat_store.append([cat.name_localized, cat])
         first = cat_store.get_iter_first()
         if first:
@@ -143,8 +166,22 @@ class StStringsStringsPage(Gtk.Box):
         if self._suppress_signals:
             return
         self._search_text = search.get_text()
+        self._update_search()
         self._filter.refilter()
 
+    @Gtk.Template.Callback()
+    def on_search_results_tree_row_activated(
+        self, tree: Gtk.TreeView, path: Gtk.TreePath, column: Gtk.TreeViewColumn
+    ):
+        row = self.search_results_store[path]
+        language, idx = row[0], row[1] - 1
+        if language == self.filename:
+            self._focus_string(idx)
+        else:
+            self.module.project.request_open(
+                OpenRequest(REQUEST_TYPE_STRING, (language, idx))
+            )
+
     @Gtk.Template.Callback()
     def on_btn_import_clicked(self, *args):
         md = SkyTempleMessageDialog(
@@ -231,11 +268,97 @@ class StStringsStringsPage(Gtk.Box):
                 < self._active_category.end
             ):
                 return False
-        if self._search_text != "":
-            if self._search_text.lower() not in model[iter][1].lower():
+        if self._search_matches is not None:
+            if model[iter][0] - 1 not in self._search_matches:
                 return False
         return True
 
+    def _update_search(self):
+        """Searches all languages and lists the results. This language's list is filtered to the matches."""
+        self.search_results_store.clear()
+        if self._search_text == "":
+            self._search_matches = None
+            self.search_results_label.hide()
+            self.search_results_window.hide()
+            return
+        results = self.module.get_search_index().search(self._search_text)
+        self._search_matches = {r.idx for r in results if r.language == self.filename}
+        lang_names = {
+            lang.filename: lang.name_localized
+            for lang in self.module.project.get_string_provider().get_languages()
+        }
+        for result in results[:MAX_SEARCH_RESULTS]:
+            strings = (
+                self._str
+                if result.language == self.filename
+                else self.module.get_string_file(result.language)
+            ).strings
+            self.search_results_store.append(
+                [
+                    result.language,
+                    result.idx + 1,
+                    lang_names.get(result.language, result.language),
+                    self._category_name(result.idx),
+                    strings[result.idx],
+                ]
+            )
+        count = len(results)
+        if count > MAX_SEARCH_RESULTS:
+            self.search_results_label.set_text(
+                f(
+                    _(
+                        "{count} matches in all languages (showing the first {MAX_SEARCH_RESULTS}). Double-click to jump to a string."
+                    )
+                )
+            )
+        else:
+            self.search_results_label.set_text(
+                f(
+                    _(
+                        "{count} matches in all languages. Double-click to jump to a string."
+                    )
+                )
+            )
+        self.search_results_label.show()
+        self.search_results_window.show()
+
+    def _focus_string(self, idx: int):
+        """Selects the category of the string and then the string itself."""
+        cat_store = typing.cast(
+            Gtk.ListStore, assert_not_none(self.category_tree.get_model())
+        )
+        for row in cat_store:
+            cat = row[1]
+            if cat is not None and cat.begin <= idx < cat.end:
+                suppress_before = self._suppress_signals
+                self._suppress_signals = True
+                self.category_tree.get_selection().select_iter(row.iter)
+                self._suppress_signals = suppress_before
+                self._active_category = cat
+                self._filter.refilter()
+                break
+        path = self._filter.convert_child_path_to_path(
+            Gtk.TreePath.new_from_indices([idx])
+        )
+        if path is None:
+            # Hidden by the search.
+            self.search.set_text("")
+            self._search_text = ""
+            self._update_search()
+            self._filter.refilter()
+            path = self._filter.convert_child_path_to_path(
+                Gtk.TreePath.new_from_indices([idx])
+            )
+        if path is not None:
+            self.string_tree.get_selection().select_path(path)
+            self.string_tree.scroll_to_cell(path, None, True, 0.5, 0.0)
+
+    def _category_name(self, idx: int) -> str:
+        i = bisect_right(self._cat_begins, idx) - 1
+        if i >= 0 and idx < self._cats[i].end:
+            return self._cats[i].name_localized
+        return ""
+
     def _collect_categories(self):
         current_index = 0
         for cat in sorted(self._string_cats.values(), key=lambda c: c.begin):
@@ -51,10 +51,42 @@ class AnimationContext:
 
         self.frame_counter = 0
 
+        # Whether any surface actually has more than one BPA / palette animation frame.
+        self._has_bpa_animation = bpa_durations > 0 and any(
+            len(bpa_ani_frames) > 1
+            for collection in surfaces
+            for pal_ani_frames in collection
+            for bpa_ani_frames in pal_ani_frames
+        )
+        self._has_pal_animation = pal_ani_durations > 0 and any(
+            len(pal_ani_frames) > 1
+            for collection in surfaces
+            for pal_ani_frames in collection
+        )
+
     @property
     def num_layers(self) -> int:
         return len(self.surfaces)
 
+    @property
+    def is_animated(self) -> bool:
+        """Whether the surfaces returned by current() ever change."""
+        return self._has_bpa_animation or self._has_pal_animation
+
+    def ticks_until_next_change(self) -> Optional[int]:
+        """
+        Returns after how many calls to advance the surfaces returned by current() change next
+        (the call that changes them included), or None if they never change.
+        """
+        ticks = []
+        if self._has_bpa_animation:
+            ticks.append(-self.frame_counter % self.bpa_durations + 1)
+        if self._has_pal_animation:
+            ticks.append(-self.frame_counter % self.pal_ani_durations + 1)
+        if len(ticks) < 1:
+            return None
+        return min(ticks)
+
     def current(self) -> list[list[cairo.Surface]]:
         """Returns the surfaces for this frame"""
         if (self._pal_counter, self._bpa_counter) == self._current_cache_hash:
@@ -72,20 +104,25 @@ class AnimationContext:
         self._current_cache_hash = (self._pal_counter, self._bpa_counter)
         return self._current_cache
 
-    def advance(self):
+    def advance(self) -> bool:
+        """Advances by one tick. Returns whether the surfaces returned by current() changed."""
+        changed = False
         # Advance frame if enough time passed
         if self.bpa_durations > 0:
             if self.frame_counter % self.bpa_durations == 0:
                 self._bpa_counter += 1
                 if self._bpa_counter > FRAME_COUNTER_MAX:
                     self._bpa_counter = 0
+                changed = changed or self._has_bpa_animation
 
         if self.pal_ani_durations > 0:
             if self.frame_counter % self.pal_ani_durations == 0:
                 self._pal_counter += 1
                 if self._pal_counter > FRAME_COUNTER_MAX:
                     self._pal_counter = 0
+                changed = changed or self._has_pal_animation
 
         self.frame_counter += 1
         if self.frame_counter > FRAME_COUNTER_MAX:
             self.frame_counter = 0
+        return changed